@@ -1,15 +1,29 @@
 # SPDX-License-Identifier: BSD-3-Clause
 from .client import (
     Client,
+    InFlightStats,
     MessagesIterator,
+    OverflowPolicy,
     ProtocolVersion,
     ProxySettings,
     TLSParameters,
     Will,
 )
-from .exceptions import MqttCodeError, MqttError, MqttReentrantError
+from .codecs import Codec, CodecRegistry, JSONCodec, StructCodec
+from .compression import Compression
+from .exceptions import (
+    MqttBulkPublishError,
+    MqttCodeError,
+    MqttError,
+    MqttReentrantError,
+)
 from .message import Message
-from .topic import Topic, TopicLike, Wildcard, WildcardLike
+from .offload import ExecutorDispatcher
+from .outbox import Outbox
+from .pool import ClientPool
+from .router import Router
+from .topic import Topic, TopicCache, TopicLike, Wildcard, WildcardLike
+from .workers import WorkerGroup, WorkerStats
 
 # These are placeholders that are managed by poetry-dynamic-versioning
 __version__ = "0.0.0"
@@ -20,15 +34,30 @@ __all__ = [
     "__version_tuple__",
     "MessagesIterator",
     "Client",
+    "ClientPool",
+    "Codec",
+    "CodecRegistry",
+    "Compression",
+    "ExecutorDispatcher",
+    "InFlightStats",
+    "JSONCodec",
     "Message",
+    "Outbox",
+    "OverflowPolicy",
     "ProtocolVersion",
     "ProxySettings",
+    "Router",
+    "StructCodec",
     "TLSParameters",
     "Topic",
+    "TopicCache",
     "TopicLike",
     "Wildcard",
     "WildcardLike",
     "Will",
+    "WorkerGroup",
+    "WorkerStats",
+    "MqttBulkPublishError",
     "MqttCodeError",
     "MqttReentrantError",
     "MqttError",
@@ -2,23 +2,28 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
+import collections
 import contextlib
 import dataclasses
 import enum
 import functools
+import heapq
+import inspect
 import logging
 import math
 import socket
 import ssl
 import sys
+import time
 from types import TracebackType
 from typing import (
+    TYPE_CHECKING,
     Any,
     AsyncIterator,
     Awaitable,
     Callable,
     Coroutine,
-    Generator,
     Iterable,
     Iterator,
     Literal,
@@ -27,13 +32,26 @@ from typing import (
 )
 
 import paho.mqtt.client as mqtt
-from paho.mqtt.enums import CallbackAPIVersion
+import paho.mqtt.enums
+from paho.mqtt.enums import CallbackAPIVersion, MQTTErrorCode
+from paho.mqtt.packettypes import PacketTypes
 from paho.mqtt.properties import Properties
 from paho.mqtt.reasoncodes import ReasonCode
 from paho.mqtt.subscribeoptions import SubscribeOptions
 
-from .exceptions import MqttCodeError, MqttConnectError, MqttError, MqttReentrantError
+from .codecs import CodecRegistry, _encode_payload
+from .compression import Compression, _compress_payload
+from .exceptions import (
+    MqttBulkPublishError,
+    MqttCodeError,
+    MqttConnectError,
+    MqttError,
+    MqttReentrantError,
+)
 from .message import Message
+from .native import NativeClient, encode_payload
+from .router import MessageHandler, TopicTrie
+from .topic import TopicCache, WildcardLike
 from .types import (
     P,
     PayloadType,
@@ -44,6 +62,9 @@ from .types import (
     _PahoSocket,
 )
 
+if TYPE_CHECKING:
+    from .outbox import Outbox
+
 if sys.version_info >= (3, 11):
     from typing import Concatenate, Self
 elif sys.version_info >= (3, 10):
@@ -59,6 +80,32 @@ MQTT_LOGGER.setLevel(logging.WARNING)
 
 ClientT = TypeVar("ClientT", bound="Client")
 
+# Interval in seconds between warnings about discarded incoming messages
+DROPPED_MESSAGES_REPORT_INTERVAL = 5
+# Minimum number of expired or discarded deadlines before we compact the heap
+MIN_CANCELLED_DEADLINES = 100
+# Maximum number of bytes of queued packets that are joined into a single send
+MAX_COALESCED_WRITE = 65536
+# Number of bytes that we try to receive from the socket at once
+READ_BUFFER_SIZE = 65536
+# Upper bounds in seconds of the buckets of the pending call latency histogram
+LATENCY_HISTOGRAM_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    math.inf,
+)
+
 
 class ProtocolVersion(enum.IntEnum):
     """Map paho-mqtt protocol versions to an Enum for use in type hints."""
@@ -68,6 +115,19 @@ class ProtocolVersion(enum.IntEnum):
     V5 = mqtt.MQTTv5
 
 
+class OverflowPolicy(enum.Enum):
+    """What to do with an incoming message when the message queue is full."""
+
+    DROP_NEWEST = "drop_newest"
+    """Discard the incoming message."""
+    DROP_OLDEST = "drop_oldest"
+    """Discard the queued message that would be returned next to make room."""
+    CONFLATE = "conflate"
+    """Replace the queued message of the same topic, also when the queue isn't full,
+    so that each topic has at most one message in the queue. If there is none and the
+    queue is full, discard the queued message that would be returned next."""
+
+
 @dataclasses.dataclass(frozen=True)
 class TLSParameters:
     ca_certs: str | None = None
@@ -115,6 +175,17 @@ def _outgoing_call(
     return decorated
 
 
+def _subscribed_wildcards(
+    topic: SubscribeTopic, qos: int, options: SubscribeOptions | None
+) -> list[tuple[str, int | SubscribeOptions]]:
+    """Normalize the arguments of ``subscribe()`` to ``(wildcard, qos)`` pairs."""
+    if isinstance(topic, str):
+        return [(topic, qos if options is None else options)]
+    if isinstance(topic, tuple):
+        return [topic]
+    return list(topic)
+
+
 @dataclasses.dataclass(frozen=True)
 class Will:
     topic: str
@@ -124,38 +195,725 @@ class Will:
     properties: Properties | None = None
 
 
+@dataclasses.dataclass(frozen=True)
+class InFlightStats:
+    """Snapshot of the calls that wait for an acknowledgement from the broker.
+
+    Attributes:
+        subscribes: The number of pending subscribe calls.
+        unsubscribes: The number of pending unsubscribe calls.
+        publishes: The number of pending QoS 1 and QoS 2 publications.
+        oldest_age: The time in seconds since the oldest pending call was made, or
+            ``None`` if there are no pending calls.
+        latency_histogram: The number of acknowledged calls per latency bucket. Maps
+            the upper bound of each bucket in seconds to the number of calls that
+            were acknowledged within it, but not within the previous bucket.
+    """
+
+    subscribes: int
+    unsubscribes: int
+    publishes: int
+    oldest_age: float | None
+    latency_histogram: dict[float, int]
+
+    @property
+    def total(self) -> int:
+        """The total number of pending calls."""
+        return self.subscribes + self.unsubscribes + self.publishes
+
+
+class _CallKind(enum.Enum):
+    SUBSCRIBE = enum.auto()
+    UNSUBSCRIBE = enum.auto()
+    PUBLISH = enum.auto()
+
+
+class _PendingCall:
+    """Entry of the in-flight ledger."""
+
+    __slots__ = ("kind", "value", "started")
+
+    def __init__(self, kind: _CallKind, value: Any, started: float) -> None:
+        self.kind = kind
+        self.value = value
+        self.started = started
+
+
+class _InFlightLedger:
+    """Index of pending calls by message ID that keeps running metrics.
+
+    Calls are kept in the order in which they were made, so that the oldest one is
+    always first. Counting, adding and removing calls take constant time.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._calls: collections.OrderedDict[int, _PendingCall] = (
+            collections.OrderedDict()
+        )
+        self._counts = dict.fromkeys(_CallKind, 0)
+        self._latencies = [0] * len(LATENCY_HISTOGRAM_BUCKETS)
+
+    def __len__(self) -> int:
+        """Return the number of pending calls."""
+        return len(self._calls)
+
+    def __contains__(self, mid: int) -> bool:
+        return mid in self._calls
+
+    def add(self, mid: int, kind: _CallKind, value: Any) -> None:
+        """Add a pending call that waits for the acknowledgement of a message ID."""
+        if mid in self._calls:
+            msg = f'There already exists a pending call for message ID "{mid}"'
+            raise RuntimeError(msg)
+        self._calls[mid] = _PendingCall(kind, value, self._loop.time())
+        self._counts[kind] += 1
+
+    def pop(self, mid: int, kind: _CallKind) -> Any:
+        """Remove an acknowledged call, record its latency, and return its value.
+
+        Raises:
+            KeyError: If there is no pending call of this kind for the message ID.
+        """
+        call = self._calls[mid]
+        if call.kind is not kind:
+            raise KeyError(mid)
+        del self._calls[mid]
+        self._counts[kind] -= 1
+        latency = self._loop.time() - call.started
+        self._latencies[bisect.bisect_left(LATENCY_HISTOGRAM_BUCKETS, latency)] += 1
+        return call.value
+
+    def discard(self, mid: int, value: Any) -> None:
+        """Remove a call that was not acknowledged, e.g., because it timed out."""
+        call = self._calls.get(mid)
+        if call is not None and call.value is value:
+            del self._calls[mid]
+            self._counts[call.kind] -= 1
+
+    def stats(self) -> InFlightStats:
+        oldest_age = None
+        if self._calls:
+            oldest = next(iter(self._calls.values()))
+            oldest_age = self._loop.time() - oldest.started
+        return InFlightStats(
+            subscribes=self._counts[_CallKind.SUBSCRIBE],
+            unsubscribes=self._counts[_CallKind.UNSUBSCRIBE],
+            publishes=self._counts[_CallKind.PUBLISH],
+            oldest_age=oldest_age,
+            latency_histogram=dict(zip(LATENCY_HISTOGRAM_BUCKETS, self._latencies)),
+        )
+
+
+class _Deadline:
+    """Entry of the deadline heap."""
+
+    __slots__ = ("when", "future", "cancelled")
+
+    def __init__(self, when: float, future: asyncio.Future[Any]) -> None:
+        self.when = when
+        self.future = future
+        self.cancelled = False
+
+    def __lt__(self, other: _Deadline) -> bool:
+        return self.when < other.when
+
+
+class _DeadlineScheduler:
+    """Fails pending futures with ``MqttError`` once their deadline has passed.
+
+    All deadlines of a client share one heap and one timer handle, which is only
+    rearmed when the earliest deadline changes. With a constant timeout, deadlines
+    are added in order, so adding one is a heap push and discarding one is a flag.
+    Like asyncio does for its own timers, discarded entries are removed lazily and
+    the heap is compacted once they make up more than half of it.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._heap: list[_Deadline] = []
+        self._cancelled = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def __len__(self) -> int:
+        """Return the number of pending deadlines."""
+        return len(self._heap) - self._cancelled
+
+    def add(self, future: asyncio.Future[Any], when: float) -> _Deadline:
+        """Fail the future at the given loop time unless it's done by then."""
+        deadline = _Deadline(when, future)
+        heapq.heappush(self._heap, deadline)
+        if self._heap[0] is deadline:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = self._loop.call_at(when, self._expire, when)
+        return deadline
+
+    def discard(self, deadline: _Deadline) -> None:
+        """Forget a deadline, e.g., because its future is done."""
+        if deadline.cancelled:
+            return
+        deadline.cancelled = True
+        self._cancelled += 1
+        if self._cancelled == len(self._heap):
+            self._heap.clear()
+            self._cancelled = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        elif self._cancelled > MIN_CANCELLED_DEADLINES and self._cancelled * 2 > len(
+            self._heap
+        ):
+            self._heap = [entry for entry in self._heap if not entry.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def _expire(self, when: float) -> None:
+        self._timer = None
+        # The loop may run timers slightly early, within its clock resolution
+        now = max(self._loop.time(), when)
+        heap = self._heap
+        while heap and (heap[0].cancelled or heap[0].when <= now):
+            deadline = heapq.heappop(heap)
+            if deadline.cancelled:
+                self._cancelled -= 1
+                continue
+            deadline.cancelled = True
+            if not deadline.future.done():
+                msg = "Operation timed out"
+                deadline.future.set_exception(MqttError(msg))
+        if heap:
+            self._timer = self._loop.call_at(heap[0].when, self._expire, heap[0].when)
+
+
+class _MessageStream:
+    """Queue of incoming messages together with the consumers waiting for it."""
+
+    def __init__(self, queue: asyncio.Queue[Message]) -> None:
+        self.queue = queue
+        # Futures of consumers that wait for the queue to become non-empty
+        self.waiters: collections.deque[asyncio.Future[bool]] = collections.deque()
+        # With `OverflowPolicy.CONFLATE`, maps the raw topic of each queued message to
+        # the newest message of that topic. The queued message only holds the place.
+        self.latest: dict[str, Message] = {}
+
+    def put(self, message: Message, policy: OverflowPolicy) -> bool:
+        """Queue a message and wake up a waiting consumer.
+
+        Returns:
+            True if a message was discarded because the queue is full.
+        """
+        if policy is OverflowPolicy.CONFLATE:
+            topic = message._raw_topic()  # noqa: SLF001
+            if topic in self.latest:
+                self.latest[topic] = message
+                return self.queue.full()
+        if not self.queue.full():
+            self._put(message, policy)
+            self.wakeup_next()
+            return False
+        if policy is OverflowPolicy.DROP_NEWEST:
+            return True
+        self.get()
+        self._put(message, policy)
+        return True
+
+    def _put(self, message: Message, policy: OverflowPolicy) -> None:
+        self.queue.put_nowait(message)
+        if policy is OverflowPolicy.CONFLATE:
+            self.latest[message._raw_topic()] = message  # noqa: SLF001
+
+    def get(self) -> Message:
+        """Return the next queued message without waiting.
+
+        Raises:
+            asyncio.QueueEmpty: If the queue is empty.
+        """
+        message = self.queue.get_nowait()
+        if self.latest:
+            return self.latest.pop(message._raw_topic(), message)  # noqa: SLF001
+        return message
+
+    async def wait(
+        self, loop: asyncio.AbstractEventLoop, deadline: float | None
+    ) -> None:
+        """Wait until a message is queued, we disconnect, or the deadline passes."""
+        waiter: asyncio.Future[bool] = loop.create_future()
+        self.waiters.append(waiter)
+        timer = None
+        if deadline is not None:
+            timer = loop.call_at(deadline, _set_future_result, waiter, False)
+        try:
+            woken = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                # We were woken up, but cancelled before we could get the message
+                self.wakeup_next()
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if not woken:
+            # Woken up by the timer, so we may still be in the deque
+            self._remove(waiter)
+
+    def wakeup_next(self) -> None:
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+
+    def wakeup_all(self) -> None:
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+
+    def _remove(self, waiter: asyncio.Future[bool]) -> None:
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            # Wakeups pop done waiters from the deque, so it may no longer be there
+            pass
+
+
+class _PublishBatch:
+    """Tracks the acknowledgements of the messages of one ``publish_many`` call."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Maps the message ID of each unacknowledged message to its position
+        self.pending: dict[int, int] = {}
+        self.acknowledged: asyncio.Future[None] = loop.create_future()
+
+    def acknowledge(self, mid: int) -> None:
+        del self.pending[mid]
+        if not self.pending and not self.acknowledged.done():
+            self.acknowledged.set_result(None)
+
+
+def _paho_io_internals_match(client: mqtt.Client) -> bool:
+    """Check that paho-mqtt's private read and write path is as ``_PahoClient`` expects.
+
+    ``_PahoClient`` overrides ``_sock_recv()`` and ``_packet_write()``, and finishes
+    written packets itself. This relies on the methods' signatures, on the packets
+    that ``_packet_queue()`` puts into the ``_out_packet`` deque, and on further
+    private attributes of paho-mqtt 2.1.
+    """
+    try:
+        signatures = {
+            name: list(inspect.signature(getattr(client, name)).parameters)
+            for name in (
+                "_packet_queue",
+                "_packet_read",
+                "_packet_write",
+                "_sock_recv",
+                "_sock_send",
+                "_loop_rc_handle",
+                "_do_on_disconnect",
+            )
+        }
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return (
+        signatures
+        == {
+            "_packet_queue": ["command", "packet", "mid", "qos", "info"],
+            "_packet_read": [],
+            "_packet_write": [],
+            "_sock_recv": ["bufsize"],
+            "_sock_send": ["buf"],
+            "_loop_rc_handle": ["rc"],
+            "_do_on_disconnect": [
+                "packet_from_broker",
+                "v1_rc",
+                "reason",
+                "properties",
+            ],
+        }
+        and isinstance(getattr(client, "_out_packet", None), collections.deque)
+        and all(
+            hasattr(client, name)
+            for name in (
+                "_in_callback_mutex",
+                "_msgtime_mutex",
+                "_last_msg_out",
+                "_state",
+            )
+        )
+        and hasattr(mqtt.MQTTMessageInfo, "_set_as_published")
+        and hasattr(paho.mqtt.enums, "_ConnectionState")
+    )
+
+
+class _PahoClient(mqtt.Client):
+    """paho-mqtt client that can use a socket that was connected on the event loop.
+
+    paho-mqtt's ``connect()`` resolves the hostname, connects, and does the TLS
+    handshake with blocking calls. ``open_socket()`` does the same without blocking
+    the event loop. The next ``connect()`` then picks up the ready socket instead of
+    opening a new one.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Whether we buffer reads and coalesce writes. Both replace private methods of
+        # paho-mqtt, so we fall back to paho-mqtt's own ones if they changed.
+        self.replaces_io = _paho_io_internals_match(self)
+        self._ready_socket: socket.socket | None = None
+        # Data that we received from the socket, but paho-mqtt didn't read yet
+        self._read_buffer = b""
+        self._read_pos = 0
+        # Total number of bytes that paho-mqtt read
+        self.bytes_read = 0
+
+    @property
+    def connects_on_loop(self) -> bool:
+        """Whether ``open_socket()`` supports the configured transport."""
+        # Websocket and proxy handshakes are implemented with blocking calls only
+        return self._transport != "websockets" and not self._get_proxy()
+
+    async def open_socket(
+        self, host: str, port: int, bind_address: str, bind_port: int
+    ) -> None:
+        """Open the socket for the next ``connect()`` call on the event loop."""
+        loop = asyncio.get_running_loop()
+        try:
+            sock = await asyncio.wait_for(
+                self._open_socket(loop, host, port, bind_address, bind_port),
+                self._connect_timeout,
+            )
+        except asyncio.TimeoutError:
+            msg = "Timed out while connecting to the broker"
+            raise TimeoutError(msg) from None
+        if self._ready_socket is not None:
+            self._ready_socket.close()
+        self._ready_socket = sock
+
+    async def _open_socket(  # noqa: PLR0913
+        self,
+        loop: asyncio.AbstractEventLoop,
+        host: str,
+        port: int,
+        bind_address: str,
+        bind_port: int,
+    ) -> socket.socket:
+        if self._transport == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.setblocking(False)
+                await loop.sock_connect(sock, host)
+            except BaseException:
+                sock.close()
+                raise
+        else:
+            sock = await _connect_tcp(loop, host, port, bind_address, bind_port)
+        if self._ssl and self._ssl_context is not None:
+            ssl_sock = self._ssl_context.wrap_socket(
+                sock, server_hostname=host, do_handshake_on_connect=False
+            )
+            try:
+                await _do_tls_handshake(loop, ssl_sock)
+            except BaseException:
+                ssl_sock.close()
+                raise
+            return ssl_sock
+        return sock
+
+    def keepalive_deadline(self) -> float | None:
+        """Return the ``time.monotonic()`` time of the next keepalive check.
+
+        This is when ``loop_misc()`` next has to send a PINGREQ or close a connection
+        that timed out, or ``None`` if there is nothing to check.
+        """
+        if self._sock is None or self._keepalive == 0:
+            return None
+        with self._msgtime_mutex:
+            deadline = min(self._last_msg_in, self._last_msg_out) + self._keepalive
+        if self._ping_t > 0:
+            deadline = min(deadline, self._ping_t + self._keepalive)
+        return deadline
+
+    def _create_socket(self) -> _PahoSocket:
+        sock, self._ready_socket = self._ready_socket, None
+        if sock is None:
+            return super()._create_socket()
+        return sock
+
+    def unacknowledged_mids(self) -> set[int]:
+        """Return the IDs of the QoS 1 and QoS 2 messages that wait for an ack.
+
+        paho-mqtt publishes these messages again after reconnecting.
+        """
+        with self._out_message_mutex:
+            return set(self._out_messages)
+
+    @property
+    def has_buffered_data(self) -> bool:
+        """Whether data was received from the socket that wasn't read yet.
+
+        The selector doesn't report the socket as readable for this data, nor for
+        data that an SSL socket decrypted, but didn't return yet.
+        """
+        if self._read_pos < len(self._read_buffer):
+            return True
+        return isinstance(self._sock, ssl.SSLSocket) and self._sock.pending() > 0
+
+    def read_packet(self) -> bool:
+        """Read and handle the next packet, like one round of ``loop_read()``.
+
+        Returns:
+            Whether the packet was read completely and the next one can be read.
+        """
+        if self._sock is None:
+            return False
+        if not self.replaces_io:
+            # Without buffered reads, the next packet may need another wakeup
+            self.loop_read()
+            return False
+        rc = self._packet_read()
+        if rc > 0:
+            self._loop_rc_handle(rc)
+            return False
+        return rc != mqtt.MQTT_ERR_AGAIN
+
+    def _sock_recv(self, bufsize: int) -> bytes:
+        # paho-mqtt reads each packet with at least three calls: the command byte,
+        # the remaining length byte by byte, and the rest. We receive as much as the
+        # socket has at once and serve these calls from the buffer.
+        if not self.replaces_io:
+            return super()._sock_recv(bufsize)
+        buffer = self._read_buffer
+        pos = self._read_pos
+        if pos >= len(buffer):
+            buffer = super()._sock_recv(max(bufsize, READ_BUFFER_SIZE))
+            self._read_buffer = buffer
+            pos = 0
+        end = min(pos + bufsize, len(buffer))
+        self._read_pos = end
+        self.bytes_read += end - pos
+        if pos == 0 and end == len(buffer):
+            return buffer
+        return buffer[pos:end]
+
+    def _sock_close(self) -> None:
+        super()._sock_close()
+        self._read_buffer = b""
+        self._read_pos = 0
+
+    def _packet_write(self) -> MQTTErrorCode:  # noqa: PLR0911
+        """Write the queued packets, joining small packets into a single send.
+
+        paho-mqtt calls ``send()`` once per packet. Here, the packets that are queued
+        when we write, e.g. all publications and acknowledgements of one event loop
+        iteration, go out together, up to ``MAX_COALESCED_WRITE`` bytes per call.
+        """
+        if not self.replaces_io:
+            return super()._packet_write()
+        out_packet = self._out_packet
+        while out_packet:
+            try:
+                written = self._sock_send(self._coalesce())
+            except (AttributeError, ValueError):
+                return mqtt.MQTT_ERR_SUCCESS
+            except BlockingIOError:
+                return mqtt.MQTT_ERR_AGAIN
+            except OSError as err:
+                self._easy_log(mqtt.MQTT_LOG_ERR, "failed to send on socket: %s", err)
+                return mqtt.MQTT_ERR_CONN_LOST
+            # Anything that we send postpones the next PINGREQ
+            with self._msgtime_mutex:
+                self._last_msg_out = time.monotonic()
+            if written <= 0:
+                return mqtt.MQTT_ERR_SUCCESS
+            # Account the written bytes to the packets in order
+            while written > 0:
+                packet = out_packet[0]
+                count = min(written, packet["to_process"])
+                packet["to_process"] -= count
+                packet["pos"] += count
+                written -= count
+                if packet["to_process"] > 0:
+                    break
+                out_packet.popleft()
+                if self._packet_written(packet):
+                    return mqtt.MQTT_ERR_SUCCESS
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def _coalesce(self) -> bytes:
+        """Return the unwritten bytes of the next queued packets."""
+        chunks: list[bytes] = []
+        size = 0
+        for packet in self._out_packet:
+            if chunks and size + packet["to_process"] > MAX_COALESCED_WRITE:
+                break
+            chunks.append(packet["packet"][packet["pos"] :])
+            size += packet["to_process"]
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+    def _packet_written(self, packet: Any) -> bool:
+        """Finish a packet that was written completely, like paho-mqtt does.
+
+        Returns:
+            Whether the packet was a DISCONNECT and the socket is closed.
+        """
+        command = packet["command"] & 0xF0
+        if command == mqtt.PUBLISH and packet["qos"] == 0:
+            on_publish = cast("Callable[..., None] | None", self.on_publish)
+            if on_publish is not None:
+                with self._in_callback_mutex:
+                    try:
+                        on_publish(
+                            self,
+                            self._userdata,
+                            packet["mid"],
+                            ReasonCode(PacketTypes.PUBACK),
+                            Properties(PacketTypes.PUBACK),  # type: ignore[no-untyped-call]
+                        )
+                    except Exception as err:
+                        self._easy_log(
+                            mqtt.MQTT_LOG_ERR, "Caught exception in on_publish: %s", err
+                        )
+                        if not self.suppress_exceptions:
+                            raise
+            packet["info"]._set_as_published()  # noqa: SLF001
+        elif command == mqtt.DISCONNECT:
+            self._do_on_disconnect(
+                packet_from_broker=False, v1_rc=mqtt.MQTT_ERR_SUCCESS
+            )
+            self._sock_close()
+            # Only the disconnections that we asked for are final
+            states = paho.mqtt.enums._ConnectionState  # noqa: SLF001
+            if self._state == states.MQTT_CS_DISCONNECTING:
+                self._state = states.MQTT_CS_DISCONNECTED
+            return True
+        return False
+
+
 class MessagesIterator:
     """Dynamic view of the client's message queue."""
 
-    def __init__(self, client: Client) -> None:
+    def __init__(self, client: Client, stream: _MessageStream | None = None) -> None:
         self._client = client
+        self._stream = client._stream if stream is None else stream  # noqa: SLF001
 
     def __aiter__(self) -> AsyncIterator[Message]:
         return self
 
     async def __anext__(self) -> Message:
-        # Wait until we either (1) receive a message or (2) disconnect
-        task = self._client._loop.create_task(self._client._queue.get())  # noqa: SLF001
-        try:
-            done, _ = await asyncio.wait(
-                (task, self._client._disconnected),  # noqa: SLF001
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-        # If the asyncio.wait is cancelled, we must also cancel the queue task
-        except asyncio.CancelledError:
-            task.cancel()
-            raise
-        # When we receive a message, return it
-        if task in done:
-            return task.result()
-        # If we disconnect from the broker, stop the generator with an exception
-        task.cancel()
-        msg = "Disconnected during message iteration"
-        raise MqttError(msg)
+        # Without a timeout, we only return once we receive a message
+        return cast("Message", await self._get(timeout=None))
+
+    async def batches(
+        self, max_size: int, max_wait: float = 0
+    ) -> AsyncIterator[list[Message]]:
+        """Iterate over incoming messages in batches.
+
+        Each batch contains at least one message. After the first message arrives,
+        the batch is filled with up to ``max_size`` messages that are already queued,
+        or that arrive within ``max_wait`` seconds.
+
+        Args:
+            max_size: The maximum number of messages per batch.
+            max_wait: The maximum time in seconds to wait for more messages to fill a
+                batch after its first message arrived.
+
+        Raises:
+            MqttError: If the client disconnects. Messages that were collected for the
+                current batch before the disconnection are yielded first.
+        """
+        if max_size < 1:
+            msg = "max_size must be at least 1"
+            raise ValueError(msg)
+        loop = self._client._loop  # noqa: SLF001
+        while True:
+            batch = [await self.__anext__()]
+            self._drain(batch, max_size)
+            deadline = loop.time() + max_wait
+            while len(batch) < max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await self._get(timeout=remaining)
+                except MqttError:
+                    # Yield what we have; The next batch raises the error
+                    break
+                if message is None:
+                    break
+                batch.append(message)
+                self._drain(batch, max_size)
+            yield batch
+
+    def _drain(self, batch: list[Message], max_size: int) -> None:
+        """Move already queued messages into the batch without waiting."""
+        stream = self._stream
+        while len(batch) < max_size and not stream.queue.empty():
+            batch.append(stream.get())
+        self._client._resume_reading()  # noqa: SLF001
+
+    async def _get(self, timeout: float | None) -> Message | None:
+        """Wait for the next message; Return ``None`` if the timeout expires first."""
+        client = self._client
+        queue = self._stream.queue
+        deadline = None if timeout is None else client._loop.time() + timeout  # noqa: SLF001
+        while True:
+            # Return queued messages right away without involving the event loop
+            if not queue.empty():
+                message = self._stream.get()
+                client._resume_reading()  # noqa: SLF001
+                return message
+            # If we disconnect from the broker, stop the generator with an exception
+            if client._disconnected.done():  # noqa: SLF001
+                msg = "Disconnected during message iteration"
+                raise MqttError(msg)
+            if deadline is not None and client._loop.time() >= deadline:  # noqa: SLF001
+                return None
+            # Wait until we either (1) receive a message, (2) disconnect, or (3) time out
+            await self._stream.wait(client._loop, deadline)  # noqa: SLF001
 
     def __len__(self) -> int:
         """Return the number of messages in the message queue."""
-        return self._client._queue.qsize()  # noqa: SLF001
+        return self._stream.queue.qsize()
+
+
+async def _wait_for_any_message(iterators: Iterable[MessagesIterator]) -> None:
+    """Wait until one of the iterators has a message or its client disconnects.
+
+    Raises:
+        MqttError: If the clients of all iterators are disconnected.
+    """
+    streams = [
+        iterator._stream  # noqa: SLF001
+        for iterator in iterators
+        if not iterator._client._disconnected.done()  # noqa: SLF001
+    ]
+    if not streams:
+        msg = "Disconnected during message iteration"
+        raise MqttError(msg)
+    # Wait on all streams at once; The first one to get a message or to disconnect
+    # wakes us up
+    waiter: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+    for stream in streams:
+        stream.waiters.append(waiter)
+    try:
+        await waiter
+    except asyncio.CancelledError:
+        if waiter.done() and not waiter.cancelled():
+            # Pass the wakeup on, so that no message is left waiting
+            for stream in streams:
+                stream.wakeup_next()
+        raise
+    finally:
+        for stream in streams:
+            stream._remove(waiter)  # noqa: SLF001
+
+
+def _add_disconnect_callback(client: Client, callback: Callable[[], None]) -> None:
+    """Call the callback once the client's current connection is lost or closed."""
+    client._disconnected.add_done_callback(lambda _: callback())  # noqa: SLF001
 
 
 class Client:
@@ -187,14 +945,37 @@ class Client:
         clean_start: (MQTT v5.0 only) Set the clean start flag always, never, or only
             on the first successful connection to the broker.
         max_queued_incoming_messages: Restricts the incoming message queue size. If the
-            queue is full, further incoming messages are discarded. ``0`` or less means
-            unlimited (the default).
+            queue is full, messages are discarded according to ``overflow_policy``.
+            ``0`` or less means unlimited (the default).
+        incoming_high_water: Stop reading from the socket when a message queue holds
+            this many messages. The broker then has to hold back further messages
+            through TCP flow control instead of the client discarding them. Reading
+            resumes when all queues are back at ``incoming_low_water``. Note that the
+            client can't receive the broker's keepalive responses while reading is
+            paused. Must not exceed ``max_queued_incoming_messages``. Disabled by
+            default.
+        incoming_low_water: Resume reading from the socket when all message queues
+            hold at most this many messages. Defaults to half of
+            ``incoming_high_water``.
+        overflow_policy: Which messages to discard when the incoming message queue
+            (or the queue of a subscription) is full. By default, incoming messages are
+            discarded. Discarded messages are counted in ``dropped_messages`` and
+            summarized in a periodic warning.
         max_queued_outgoing_messages: Resticts the outgoing message queue size. If the
             queue is full, further outgoing messages are discarded. ``0`` means
             unlimited (the default).
         max_inflight_messages: The maximum number of messages with QoS > ``0`` that can
             be part way through their network flow at once.
         max_concurrent_outgoing_calls: The maximum number of concurrent outgoing calls.
+        topic_cache: Cache that reuses ``Topic`` instances for the topics of incoming
+            messages. Can be shared between clients. Disabled by default.
+        codecs: The codecs that convert between payloads and Python objects. Values
+            published to a topic that a codec matches are encoded with it, and
+            ``Message.decoded`` decodes incoming payloads with it. Can be shared
+            between clients. Disabled by default.
+        compression: (MQTT v5.0 only) Compress the payloads of published messages
+            that reach the size threshold. Incoming compressed messages are always
+            decompressed. Disabled by default.
         properties: (MQTT v5.0 only) The properties associated with the client.
         tls_context: The SSL/TLS context.
         tls_params: The SSL/TLS configuration to use.
@@ -203,6 +984,29 @@ class Client:
         socket_options: Options to pass to the underlying socket.
         websocket_path: The path to use for websockets.
         websocket_headers: The headers to use for websockets.
+        engine: The network engine to use. ``"paho"`` (the default) drives
+            paho-mqtt's network loop from the event loop. ``"native"`` encodes and
+            decodes MQTT packets on top of asyncio's transports, which is faster and
+            uses asyncio's SSL transport, but doesn't support websockets or proxies.
+        max_packets_per_read: The maximum number of packets to read each time the
+            socket becomes readable. The client receives as much data as is available
+            at once and reads further packets from it until the socket has no more
+            data or this budget is used up. Then it lets other tasks run before it
+            continues. Raising this speeds up bursts of many small messages at the
+            expense of fairness. Applies to the ``"paho"`` engine.
+        max_bytes_per_read: The maximum number of bytes to read each time the
+            socket becomes readable, in addition to ``max_packets_per_read``. Reading
+            stops after the packet that reaches it. Unlimited by default.
+        outbox: Store the messages of ``publish()`` in this outbox until they are
+            published, so that they survive disconnections and restarts. While
+            disconnected, ``publish()`` stores the message and returns. The stored
+            messages are published once the client connects. ``publish_many()``
+            doesn't use the outbox. Disabled by default.
+        eager_writes: Write each packet to the socket right away, e.g. from
+            ``publish()``, instead of collecting the packets of an event loop
+            iteration and writing them together. This lowers the latency of
+            request/response traffic, but costs a system call per packet. The client
+            only waits for the socket to become writable if its buffer is full.
     """
 
     def __init__(  # noqa: C901, PLR0912, PLR0913, PLR0915
@@ -225,9 +1029,15 @@ class Client:
         bind_port: int = 0,
         clean_start: mqtt.CleanStartOption = mqtt.MQTT_CLEAN_START_FIRST_ONLY,
         max_queued_incoming_messages: int | None = None,
+        incoming_high_water: int | None = None,
+        incoming_low_water: int | None = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
         max_queued_outgoing_messages: int | None = None,
         max_inflight_messages: int | None = None,
         max_concurrent_outgoing_calls: int | None = None,
+        topic_cache: TopicCache | None = None,
+        codecs: CodecRegistry | None = None,
+        compression: Compression | None = None,
         properties: Properties | None = None,
         tls_context: ssl.SSLContext | None = None,
         tls_params: TLSParameters | None = None,
@@ -236,6 +1046,11 @@ class Client:
         socket_options: Iterable[SocketOption] | None = None,
         websocket_path: str | None = None,
         websocket_headers: WebSocketHeaders | None = None,
+        engine: Literal["paho", "native"] = "paho",
+        max_packets_per_read: int = 1,
+        max_bytes_per_read: int | None = None,
+        outbox: Outbox | None = None,
+        eager_writes: bool = False,
     ) -> None:
         self._hostname = hostname
         self._port = port
@@ -249,23 +1064,81 @@ class Client:
         # Connection state
         self._connected: asyncio.Future[None] = asyncio.Future()
         self._disconnected: asyncio.Future[None] = asyncio.Future()
+        self._disconnected.add_done_callback(self._wakeup_message_waiters)
         self._lock: asyncio.Lock = asyncio.Lock()
 
         # Pending subscribe, unsubscribe, and publish calls
-        self._pending_subscribes: dict[
-            int, asyncio.Future[tuple[int, ...] | list[ReasonCode]]
-        ] = {}
-        self._pending_unsubscribes: dict[int, asyncio.Event] = {}
-        self._pending_publishes: dict[int, asyncio.Event] = {}
+        self._pending_calls = _InFlightLedger(self._loop)
         self.pending_calls_threshold: int = 10
-        self._misc_task: asyncio.Task[None] | None = None
+        # Timeouts of pending calls
+        self._deadlines = _DeadlineScheduler(self._loop)
+        # Timer that fires when paho-mqtt next needs to send a PINGREQ or time out
+        self._keepalive_timer: asyncio.TimerHandle | None = None
 
         # Queue that holds incoming messages
         if queue_type is None:
             queue_type = cast("type[asyncio.Queue[Message]]", asyncio.Queue)
         if max_queued_incoming_messages is None:
             max_queued_incoming_messages = 0
-        self._queue = queue_type(maxsize=max_queued_incoming_messages)
+        self._stream = _MessageStream(queue_type(maxsize=max_queued_incoming_messages))
+        # Separate queues for the messages of `Client.subscription` wildcards
+        self._subscription_streams: TopicTrie[_MessageStream] = TopicTrie()
+        # Number of active `Client.subscription` contexts per wildcard
+        self._subscription_counts: dict[str, int] = {}
+        # Wildcards that were subscribed to with `Client.subscribe`
+        self._subscribed: set[str] = set()
+        # Handlers that receive the messages of their wildcards instead of any queue
+        self._message_callbacks: TopicTrie[MessageHandler] = TopicTrie()
+        # Running tasks of coroutine message callbacks
+        self._callback_tasks: set[asyncio.Task[Any]] = set()
+        self._overflow_policy = overflow_policy
+        self._dropped_messages = 0
+        # Number of discarded messages that we didn't yet log a warning for
+        self._dropped_messages_unreported = 0
+
+        # Socket-level backpressure on incoming messages
+        if incoming_high_water is not None and incoming_low_water is None:
+            incoming_low_water = incoming_high_water // 2
+        if (
+            incoming_high_water is not None
+            and incoming_low_water is not None
+            and not 0 <= incoming_low_water < incoming_high_water
+        ):
+            msg = "incoming_low_water must be between 0 and incoming_high_water"
+            raise ValueError(msg)
+        if (
+            incoming_high_water is not None
+            and max_queued_incoming_messages > 0
+            and incoming_high_water > max_queued_incoming_messages
+        ):
+            # The queue would discard messages before we stop reading
+            msg = "incoming_high_water must not exceed max_queued_incoming_messages"
+            raise ValueError(msg)
+        self._incoming_high_water = incoming_high_water
+        self._incoming_low_water = incoming_low_water
+        # File descriptor and callback of the socket reader, while the socket is open
+        self._reader: tuple[int, Callable[[], None]] | None = None
+        self._reading_paused = False
+        self._topic_cache = topic_cache
+        self._codecs = codecs
+        self._compression = compression
+        self._eager_writes = eager_writes
+        if max_packets_per_read < 1:
+            msg = "max_packets_per_read must be at least 1"
+            raise ValueError(msg)
+        if max_bytes_per_read is not None and max_bytes_per_read < 1:
+            msg = "max_bytes_per_read must be at least 1"
+            raise ValueError(msg)
+        self._max_packets_per_read = max_packets_per_read
+        self._max_bytes_per_read = max_bytes_per_read
+        self._outbox = outbox
+        # Outbox messages that were handed to paho-mqtt, by message ID
+        self._outbox_mids: dict[int, int] = {}
+        # ID of the last outbox message that was handed to paho-mqtt
+        self._outbox_sent_up_to = 0
+        # Whether publications go to paho-mqtt right away, which is only the case
+        # once the stored messages were handed over after connecting
+        self._outbox_online = False
 
         # Semaphore to limit the number of concurrent outgoing calls
         self._outgoing_calls_sem: asyncio.Semaphore | None
@@ -276,9 +1149,14 @@ class Client:
 
         if protocol is None:
             protocol = ProtocolVersion.V311
+        self._protocol = protocol
+        if compression is not None and protocol != ProtocolVersion.V5:
+            msg = "Compression requires MQTT v5.0 to mark compressed payloads"
+            raise ValueError(msg)
 
         # Create the underlying paho-mqtt client instance
-        self._client: mqtt.Client = mqtt.Client(
+        client_type = NativeClient if engine == "native" else _PahoClient
+        self._client: mqtt.Client = client_type(
             callback_api_version=CallbackAPIVersion.VERSION2,
             client_id=identifier,
             protocol=protocol.value,
@@ -299,6 +1177,8 @@ class Client:
         self._client.on_socket_register_write = self._on_socket_register_write
         self._client.on_socket_unregister_write = self._on_socket_unregister_write
 
+        if isinstance(self._client, NativeClient):
+            self._client.eager_writes = eager_writes
         if max_inflight_messages is not None:
             self._client.max_inflight_messages_set(max_inflight_messages)
         if max_queued_outgoing_messages is not None:
@@ -363,13 +1243,30 @@ class Client:
         return MessagesIterator(self)
 
     @property
-    def _pending_calls(self) -> Generator[int, None, None]:
-        """Yield all message IDs with pending calls."""
-        yield from self._pending_subscribes.keys()
-        yield from self._pending_unsubscribes.keys()
-        yield from self._pending_publishes.keys()
+    def is_connected(self) -> bool:
+        """Whether the client is connected to the broker."""
+        return self._connected.done() and not self._disconnected.done()
+
+    @property
+    def dropped_messages(self) -> int:
+        """The number of incoming messages discarded because a queue was full."""
+        return self._dropped_messages
+
+    @property
+    def topic_cache(self) -> TopicCache | None:
+        """The cache for the topics of incoming messages, if enabled."""
+        return self._topic_cache
+
+    @property
+    def codecs(self) -> CodecRegistry | None:
+        """The codecs for payloads, if enabled."""
+        return self._codecs
+
+    @property
+    def in_flight(self) -> InFlightStats:
+        """Metrics of the calls that wait for an acknowledgement from the broker."""
+        return self._pending_calls.stats()
 
-    @_outgoing_call
     async def subscribe(  # noqa: PLR0913
         self,
         /,
@@ -396,21 +1293,14 @@ class Client:
                 method.
 
         """
-        result, mid = self._client.subscribe(
-            topic, qos, options, properties, *args, **kwargs
+        result = await self._subscribe(
+            topic, qos, options, properties, *args, timeout=timeout, **kwargs
         )
-        # Early out on error
-        if result != mqtt.MQTT_ERR_SUCCESS or mid is None:
-            raise MqttCodeError(result, "Could not subscribe to topic")
-        # Create future for when the on_subscribe callback is called
-        callback_result: asyncio.Future[tuple[int, ...] | list[ReasonCode]] = (
-            asyncio.Future()
+        self._subscribed.update(
+            wildcard for wildcard, _ in _subscribed_wildcards(topic, qos, options)
         )
-        with self._pending_call(mid, callback_result, self._pending_subscribes):
-            # Wait for callback_result
-            return await self._wait_for(callback_result, timeout=timeout)
+        return result
 
-    @_outgoing_call
     async def unsubscribe(
         self,
         /,
@@ -432,22 +1322,189 @@ class Client:
             **kwargs: Additional keyword arguments to pass to paho-mqtt's unsubscribe
                 method.
         """
+        await self._unsubscribe(topic, properties, *args, timeout=timeout, **kwargs)
+        self._subscribed.difference_update([topic] if isinstance(topic, str) else topic)
+
+    @_outgoing_call
+    async def _subscribe(  # noqa: PLR0913
+        self,
+        /,
+        topic: SubscribeTopic,
+        qos: int = 0,
+        options: SubscribeOptions | None = None,
+        properties: Properties | None = None,
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> tuple[int, ...] | list[ReasonCode]:
+        result, mid = self._client.subscribe(
+            topic, qos, options, properties, *args, **kwargs
+        )
+        # Early out on error
+        if result != mqtt.MQTT_ERR_SUCCESS or mid is None:
+            raise MqttCodeError(result, "Could not subscribe to topic")
+        # Create future for when the on_subscribe callback is called
+        callback_result: asyncio.Future[tuple[int, ...] | list[ReasonCode]] = (
+            asyncio.Future()
+        )
+        with self._pending_call(mid, _CallKind.SUBSCRIBE, callback_result):
+            # Wait for callback_result
+            return await self._wait_for(callback_result, timeout=timeout)
+
+    @_outgoing_call
+    async def _unsubscribe(
+        self,
+        /,
+        topic: str | list[str],
+        properties: Properties | None = None,
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> None:
         result, mid = self._client.unsubscribe(topic, properties, *args, **kwargs)
         # Early out on error
         if result != mqtt.MQTT_ERR_SUCCESS or mid is None:
             raise MqttCodeError(result, "Could not unsubscribe from topic")
-        # Create event for when the on_unsubscribe callback is called
-        confirmation = asyncio.Event()
-        with self._pending_call(mid, confirmation, self._pending_unsubscribes):
+        # Create future for when the on_unsubscribe callback is called
+        confirmation: asyncio.Future[None] = self._loop.create_future()
+        with self._pending_call(mid, _CallKind.UNSUBSCRIBE, confirmation):
             # Wait for confirmation
-            await self._wait_for(confirmation.wait(), timeout=timeout)
+            await self._wait_for(confirmation, timeout=timeout)
+
+    @contextlib.asynccontextmanager
+    async def subscription(  # noqa: PLR0913
+        self,
+        /,
+        wildcard: WildcardLike,
+        qos: int = 0,
+        options: SubscribeOptions | None = None,
+        properties: Properties | None = None,
+        *,
+        max_queued_messages: int | None = None,
+        queue_type: type[asyncio.Queue[Message]] | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterator[MessagesIterator]:
+        """Subscribe to a wildcard and receive its messages through a separate queue.
+
+        Incoming messages that match the wildcard are put into the subscription's own
+        queue instead of into the client's message queue. This way, a slow consumer of
+        one subscription does not hold up the consumers of others. Messages that
+        match multiple subscriptions are put into each of their queues. The wildcard
+        is unsubscribed from when the last subscription to it exits, unless it was
+        also subscribed to with ``subscribe()``.
+
+        Example:
+            .. code-block:: python
+
+                async with client.subscription("logs/#") as messages:
+                    async for message in messages:
+                        print(message.payload)
+
+        Args:
+            wildcard: The wildcard to subscribe to.
+            qos: The requested QoS level for the subscription.
+            options: (MQTT v5.0 only) Optional paho-mqtt subscription options.
+            properties: (MQTT v5.0 only) Optional paho-mqtt properties.
+            max_queued_messages: Restricts the size of the subscription's queue. If the
+                queue is full, further matching messages are discarded. ``0`` or less
+                means unlimited (the default). Must not be below the client's
+                ``incoming_high_water``.
+            queue_type: The class to use for the subscription's queue. Defaults to
+                ``asyncio.Queue``.
+            timeout: The maximum time in seconds to wait for the subscription and
+                unsubscription to complete. Use ``math.inf`` to wait indefinitely.
+
+        Raises:
+            ValueError: If ``max_queued_messages`` is below ``incoming_high_water``.
+        """
+        if queue_type is None:
+            queue_type = cast("type[asyncio.Queue[Message]]", asyncio.Queue)
+        if max_queued_messages is None:
+            max_queued_messages = 0
+        if (
+            self._incoming_high_water is not None
+            and 0 < max_queued_messages < self._incoming_high_water
+        ):
+            # The queue would discard messages before we stop reading
+            msg = "max_queued_messages must not be below incoming_high_water"
+            raise ValueError(msg)
+        stream = _MessageStream(queue_type(maxsize=max_queued_messages))
+        topic = str(wildcard)
+        # Register the queue before subscribing so that no message slips through into
+        # the client's message queue, e.g. retained messages
+        self._subscription_streams.insert(wildcard, stream)
+        self._subscription_counts[topic] = self._subscription_counts.get(topic, 0) + 1
+        try:
+            await self._subscribe(topic, qos, options, properties, timeout=timeout)
+            yield MessagesIterator(self, stream)
+        finally:
+            self._subscription_streams.remove(wildcard, stream)
+            count = self._subscription_counts.pop(topic) - 1
+            if count > 0:
+                self._subscription_counts[topic] = count
+            self._resume_reading()
+            # Keep the subscription while other subscriptions or a separate
+            # `subscribe()` call still need the wildcard's messages
+            if (
+                count == 0
+                and topic not in self._subscribed
+                and self._connected.done()
+                and not self._disconnected.done()
+            ):
+                await self._unsubscribe(topic, timeout=timeout)
+
+    def add_message_callback(
+        self, wildcard: WildcardLike, callback: MessageHandler
+    ) -> None:
+        """Deliver the messages that match a wildcard directly to a callback.
+
+        The callback is called with each matching message as soon as the client
+        reads it, without going through a message queue. Coroutine callbacks are
+        wrapped in a task, which runs until its first suspension right away on Python
+        3.12 and later. Tasks that still run when the client's context manager exits
+        are cancelled. Matching messages are not put into any queue; all other
+        messages are queued as usual. Exceptions of the callback are logged.
+
+        This is meant for latency-critical messages. The client doesn't read further
+        messages while a synchronous callback runs, and there is no backpressure on
+        coroutine callbacks.
+
+        Example:
+            .. code-block:: python
+
+                def handle_command(message):
+                    print(message.payload)
+
+                client.add_message_callback("commands/#", handle_command)
+                await client.subscribe("commands/#")
+
+        Args:
+            wildcard: The wildcard to match incoming messages against. This doesn't
+                subscribe to the wildcard.
+            callback: The function to call with matching messages.
+        """
+        self._message_callbacks.insert(wildcard, callback)
+
+    def remove_message_callback(
+        self, wildcard: WildcardLike, callback: MessageHandler
+    ) -> None:
+        """Remove a callback that was previously added for the given wildcard.
+
+        Args:
+            wildcard: The wildcard the callback was added for.
+            callback: The callback to remove.
+
+        Raises:
+            KeyError: If the callback is not registered for the wildcard.
+        """
+        self._message_callbacks.remove(wildcard, callback)
 
     @_outgoing_call
     async def publish(  # noqa: PLR0913
         self,
         /,
         topic: str,
-        payload: PayloadType = None,
+        payload: PayloadType | Any = None,
         qos: int = 0,
         retain: bool = False,
         properties: Properties | None = None,
@@ -459,7 +1516,8 @@ class Client:
 
         Args:
             topic: The topic to publish to.
-            payload: The message payload.
+            payload: The message payload. If a codec of the client matches the topic,
+                values other than ``bytes`` and ``bytearray`` are encoded with it.
             qos: The QoS level to use for publication.
             retain: If set to ``True``, the message will be retained by the broker.
             properties: (MQTT v5.0 only) Optional paho-mqtt properties.
@@ -468,8 +1526,18 @@ class Client:
             timeout: The maximum time in seconds to wait for publication to complete.
                 Use ``math.inf`` to wait indefinitely.
             **kwargs: Additional keyword arguments to pass to paho-mqtt's publish
-                method.
+                method. Not supported with an outbox.
         """
+        if self._codecs is not None or self._compression is not None:
+            payload, properties = self._encode_payload(topic, payload, properties)
+        if self._outbox is not None:
+            if args or kwargs:
+                msg = "Additional paho-mqtt arguments are not supported with an outbox"
+                raise TypeError(msg)
+            await self._publish_durably(
+                topic, payload, qos, retain, properties, timeout=timeout
+            )
+            return
         info = self._client.publish(
             topic, payload, qos, retain, properties, *args, **kwargs
         )  # [2]
@@ -479,51 +1547,219 @@ class Client:
         # Early out on immediate success
         if info.is_published():
             return
-        # Create event for when the on_publish callback is called
-        confirmation = asyncio.Event()
-        with self._pending_call(info.mid, confirmation, self._pending_publishes):
+        # Create future for when the on_publish callback is called
+        confirmation: asyncio.Future[None] = self._loop.create_future()
+        with self._pending_call(info.mid, _CallKind.PUBLISH, confirmation):
             # Wait for confirmation
-            await self._wait_for(confirmation.wait(), timeout=timeout)
+            await self._wait_for(confirmation, timeout=timeout)
+
+    @_outgoing_call
+    async def publish_many(  # noqa: PLR0913
+        self,
+        /,
+        messages: Iterable[tuple[str, PayloadType | Any]],
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+        *,
+        timeout: float | None = None,
+    ) -> None:
+        """Publish many messages at once and wait until all are acknowledged.
+
+        All messages are handed to paho-mqtt right away, so that the throughput is
+        only limited by ``max_inflight_messages`` and the network, instead of by
+        waiting for each acknowledgement in turn. Messages beyond
+        ``max_inflight_messages`` are queued by paho-mqtt until there is room.
+
+        Args:
+            messages: The ``(topic, payload)`` pairs to publish. Payloads are encoded
+                like in ``publish()``.
+            qos: The QoS level to use for publication.
+            retain: If set to ``True``, the messages will be retained by the broker.
+            properties: (MQTT v5.0 only) Optional paho-mqtt properties.
+            timeout: The maximum time in seconds to wait for all messages to be
+                acknowledged. Use ``math.inf`` to wait indefinitely.
+
+        Raises:
+            MqttBulkPublishError: If some messages could not be published or were
+                not acknowledged before the timeout. Its ``failed`` attribute maps the
+                position of each of these messages to the error.
+        """
+        batch = _PublishBatch(self._loop)
+        failed: dict[int, MqttError] = {}
+        try:
+            for index, (topic, value) in enumerate(messages):
+                payload, message_properties = value, properties
+                if self._codecs is not None or self._compression is not None:
+                    payload, message_properties = self._encode_payload(
+                        topic, value, properties
+                    )
+                info = self._client.publish(
+                    topic, payload, qos, retain, message_properties
+                )
+                if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                    failed[index] = MqttCodeError(info.rc, "Could not publish message")
+                elif not info.is_published():
+                    self._add_pending_call(info.mid, _CallKind.PUBLISH, batch)
+                    batch.pending[info.mid] = index
+            if batch.pending:
+                try:
+                    await self._wait_for(batch.acknowledged, timeout=timeout)
+                except MqttError as exc:
+                    for index in batch.pending.values():
+                        failed[index] = exc
+        finally:
+            for mid in batch.pending:
+                self._pending_calls.discard(mid, batch)
+        if failed:
+            raise MqttBulkPublishError(dict(sorted(failed.items())))
+
+    async def _publish_durably(  # noqa: PLR0913
+        self,
+        topic: str,
+        payload: PayloadType,
+        qos: int,
+        retain: bool,
+        properties: Properties | None,
+        *,
+        timeout: float | None,
+    ) -> None:
+        """Store a message in the outbox and publish it if we're connected."""
+        outbox = cast("Outbox", self._outbox)
+        data = encode_payload(payload)
+        row_id = outbox._append(  # noqa: SLF001
+            topic, data, qos, retain, properties, sent_up_to=self._outbox_sent_up_to
+        )
+        if row_id is None or not self._outbox_online or self._disconnected.done():
+            return
+        info = self._publish_from_outbox(row_id, topic, data, qos, retain, properties)
+        if info is None or info.is_published():
+            return
+        confirmation: asyncio.Future[None] = self._loop.create_future()
+        # Stop waiting if the connection is lost. The message stays in the outbox and
+        # is published again once we're connected.
+        disconnected = self._disconnected
+
+        def stop_waiting(_: asyncio.Future[None]) -> None:
+            _set_future_result(confirmation, None)
+
+        disconnected.add_done_callback(stop_waiting)
+        try:
+            with self._pending_call(info.mid, _CallKind.PUBLISH, confirmation):
+                await self._wait_for(confirmation, timeout=timeout)
+        finally:
+            disconnected.remove_done_callback(stop_waiting)
+
+    def _publish_from_outbox(  # noqa: PLR0913
+        self,
+        row_id: int,
+        topic: str,
+        payload: bytes,
+        qos: int,
+        retain: bool,
+        properties: Properties | None,
+    ) -> mqtt.MQTTMessageInfo | None:
+        """Hand a stored message to paho-mqtt and remember its message ID."""
+        outbox = cast("Outbox", self._outbox)
+        self._outbox_sent_up_to = max(self._outbox_sent_up_to, row_id)
+        info = self._client.publish(topic, payload, qos, retain, properties)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            # The message stays in the outbox until we connect the next time
+            self._logger.warning(
+                "Could not publish message from outbox: %s", mqtt.error_string(info.rc)
+            )
+            return None
+        if info.is_published():
+            outbox._remove(row_id)  # noqa: SLF001
+        else:
+            self._outbox_mids[info.mid] = row_id
+        return info
+
+    def _flush_outbox(self) -> None:
+        """Publish the stored messages in order after connecting."""
+        outbox = cast("Outbox", self._outbox)
+        # paho-mqtt publishes its unacknowledged QoS 1 and QoS 2 messages again after
+        # reconnecting, so we skip these. Everything else was lost with the
+        # connection, e.g. QoS 0 messages that weren't written yet.
+        resent = set()
+        if isinstance(self._client, _PahoClient):
+            resent = self._client.unacknowledged_mids()
+        self._outbox_mids = {
+            mid: row_id for mid, row_id in self._outbox_mids.items() if mid in resent
+        }
+        skipped = set(self._outbox_mids.values())
+        self._outbox_sent_up_to = 0
+        for entry in outbox._entries():  # noqa: SLF001
+            if entry.id in skipped:
+                self._outbox_sent_up_to = entry.id
+                continue
+            info = self._publish_from_outbox(
+                entry.id,
+                entry.topic,
+                entry.payload,
+                entry.qos,
+                entry.retain,
+                entry.properties,
+            )
+            if info is None:
+                break
+        self._outbox_online = True
+
+    def _encode_payload(
+        self, topic: str, value: Any, properties: Properties | None
+    ) -> tuple[PayloadType, Properties | None]:
+        """Apply the codecs and the compression to a payload to publish."""
+        payload = value
+        if self._codecs is not None:
+            payload, properties = _encode_payload(
+                self._codecs,
+                topic,
+                value,
+                properties,
+                v5=self._protocol == ProtocolVersion.V5,
+            )
+        if self._compression is not None:
+            payload, properties = _compress_payload(
+                self._compression, payload, properties
+            )
+        return payload, properties
 
-    async def _wait_for(
-        self, fut: Awaitable[T], timeout: float | None, **kwargs: Any
-    ) -> T:
+    async def _wait_for(self, fut: asyncio.Future[T], timeout: float | None) -> T:
         if timeout is None:
             timeout = self.timeout
-        # Note that asyncio uses `None` to mean "No timeout". We use `math.inf`.
-        timeout_for_asyncio = None if timeout == math.inf else timeout
+        # We use `math.inf` to mean "No timeout"
+        if timeout == math.inf:
+            return await fut
+        # Instead of arming a timer per call with `asyncio.wait_for`, the deadline
+        # scheduler fails the future with `MqttError` if it's still pending by then
+        deadline = self._deadlines.add(fut, self._loop.time() + timeout)
         try:
-            return await asyncio.wait_for(fut, timeout=timeout_for_asyncio, **kwargs)
-        except asyncio.TimeoutError:
-            msg = "Operation timed out"
-            raise MqttError(msg) from None
+            return await fut
+        finally:
+            self._deadlines.discard(deadline)
 
     @contextlib.contextmanager
-    def _pending_call(
-        self, mid: int, value: T, pending_dict: dict[int, T]
-    ) -> Iterator[None]:
-        if mid in self._pending_calls:
-            msg = f'There already exists a pending call for message ID "{mid}"'
-            raise RuntimeError(msg)
-        pending_dict[mid] = value  # [1]
+    def _pending_call(self, mid: int, kind: _CallKind, value: Any) -> Iterator[None]:
+        self._add_pending_call(mid, kind, value)  # [1]
         try:
-            # Log a warning if there is a concerning number of pending calls
-            pending = len(list(self._pending_calls))
-            if pending > self.pending_calls_threshold:
-                self._logger.warning("There are %d pending publish calls.", pending)
             # Back to the caller (run whatever is inside the with statement)
             yield
         finally:
             # The normal procedure is:
-            #  * We add the item at [1]
-            #  * A callback will remove the item
+            #  * We add the call at [1]
+            #  * A callback will remove the call
             #
             # However, if the callback doesn't get called (e.g., due to a
-            # network error) we still need to remove the item from the dict.
-            try:
-                del pending_dict[mid]
-            except KeyError:
-                pass
+            # network error) we still need to remove the call from the ledger.
+            self._pending_calls.discard(mid, value)
+
+    def _add_pending_call(self, mid: int, kind: _CallKind, value: Any) -> None:
+        self._pending_calls.add(mid, kind, value)
+        # Log a warning when the number of pending calls becomes concerning. We only
+        # warn when crossing the threshold, not for every call above it.
+        pending = len(self._pending_calls)
+        if pending == self.pending_calls_threshold + 1:
+            self._logger.warning("There are %d pending calls.", pending)
 
     def _on_connect(  # noqa: PLR0913
         self,
@@ -541,6 +1777,9 @@ class Client:
         if self._connected.done():
             return
         if reason_code == mqtt.CONNACK_ACCEPTED:
+            if not flags.session_present:
+                # The broker forgot the subscriptions of previous connections
+                self._subscribed.clear()
             self._connected.set_result(None)
         else:
             # We received a negative CONNACK response
@@ -588,7 +1827,7 @@ class Client:
     ) -> None:
         """Called when we receive a SUBACK message from the broker."""
         try:
-            fut = self._pending_subscribes.pop(mid)
+            fut = self._pending_calls.pop(mid, _CallKind.SUBSCRIBE)
             if not fut.done():
                 fut.set_result(reason_codes)
         except KeyError:
@@ -606,7 +1845,9 @@ class Client:
     ) -> None:
         """Called when we receive an UNSUBACK message from the broker."""
         try:
-            self._pending_unsubscribes.pop(mid).set()
+            _set_future_result(
+                self._pending_calls.pop(mid, _CallKind.UNSUBSCRIBE), None
+            )
         except KeyError:
             self._logger.exception(
                 'Unexpected message ID "%d" in on_unsubscribe callback', mid
@@ -616,12 +1857,110 @@ class Client:
         self, client: mqtt.Client, userdata: Any, message: mqtt.MQTTMessage
     ) -> None:
         # Convert the paho.mqtt message into our own Message type
-        m = Message._from_paho_message(message)  # noqa: SLF001
-        # Put the message in the message queue
+        m = Message._from_paho_message(  # noqa: SLF001
+            message, self._topic_cache, self._codecs
+        )
+        if len(self._message_callbacks) > 0:
+            callbacks = self._message_callbacks.match(m.topic)
+            if callbacks:
+                for callback in callbacks:
+                    self._run_message_callback(callback, m)
+                return
+        # Put the message in the queues of matching subscriptions, or otherwise in
+        # the client's message queue
+        streams = None
+        if len(self._subscription_streams) > 0:
+            streams = self._subscription_streams.match(m.topic)
+        for stream in streams or (self._stream,):
+            if stream.put(m, self._overflow_policy):
+                self._count_dropped_message()
+            if (
+                self._incoming_high_water is not None
+                and stream.queue.qsize() >= self._incoming_high_water
+            ):
+                self._pause_reading()
+
+    def _run_message_callback(self, callback: MessageHandler, message: Message) -> None:
+        # We're called from within paho-mqtt's read loop, which must not be broken by
+        # an exception of the callback
         try:
-            self._queue.put_nowait(m)
-        except asyncio.QueueFull:
-            self._logger.warning("Message queue is full. Discarding message.")
+            result = callback(message)
+            if not inspect.isawaitable(result):
+                return
+            coro = result if inspect.iscoroutine(result) else _await(result)
+            if sys.version_info >= (3, 12):
+                # Run the coroutine until its first suspension right away
+                task = asyncio.Task(coro, loop=self._loop, eager_start=True)
+            else:
+                task = self._loop.create_task(coro)
+        except Exception:
+            self._logger.exception("Message callback %r raised an exception", callback)
+            return
+        if not task.done():
+            self._callback_tasks.add(task)
+        task.add_done_callback(self._message_callback_done)
+
+    async def _cancel_callback_tasks(self) -> None:
+        tasks = list(self._callback_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _message_callback_done(self, task: asyncio.Task[Any]) -> None:
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._logger.error(
+                "Message callback raised an exception", exc_info=task.exception()
+            )
+
+    def _pause_reading(self) -> None:
+        if self._reading_paused:
+            return
+        if isinstance(self._client, NativeClient):
+            self._reading_paused = self._client.pause_reading()
+        elif self._reader is not None:
+            self._reading_paused = True
+            self._loop.remove_reader(self._reader[0])
+
+    def _resume_reading(self) -> None:
+        """Resume reading if all message queues are back at the low-water mark."""
+        if not self._reading_paused:
+            return
+        low_water = cast("int", self._incoming_low_water)
+        if self._stream.queue.qsize() > low_water or any(
+            stream.queue.qsize() > low_water for stream in self._subscription_streams
+        ):
+            return
+        self._reading_paused = False
+        if isinstance(self._client, NativeClient):
+            self._client.resume_reading()
+        elif self._reader is not None:
+            self._loop.add_reader(*self._reader)
+            # Process data that an SSL socket may already have buffered internally
+            self._loop.call_soon(self._reader[1])
+
+    def _count_dropped_message(self) -> None:
+        self._dropped_messages += 1
+        self._dropped_messages_unreported += 1
+        # Summarize discarded messages periodically instead of logging each one
+        if self._dropped_messages_unreported == 1:
+            self._loop.call_later(
+                DROPPED_MESSAGES_REPORT_INTERVAL, self._report_dropped_messages
+            )
+
+    def _report_dropped_messages(self) -> None:
+        self._logger.warning(
+            "Message queue is full. Discarded %d messages in the last %d seconds.",
+            self._dropped_messages_unreported,
+            DROPPED_MESSAGES_REPORT_INTERVAL,
+        )
+        self._dropped_messages_unreported = 0
+
+    def _wakeup_message_waiters(self, _: asyncio.Future[None]) -> None:
+        """Wake up all consumers when we disconnect."""
+        self._stream.wakeup_all()
+        for stream in self._subscription_streams:
+            stream.wakeup_all()
 
     def _on_publish(  # noqa: PLR0913
         self,
@@ -631,44 +1970,80 @@ class Client:
         reason_code: ReasonCode,
         properties: Properties,
     ) -> None:
+        if self._outbox_mids:
+            row_id = self._outbox_mids.pop(mid, None)
+            if row_id is not None:
+                cast("Outbox", self._outbox)._remove(row_id)  # noqa: SLF001
         try:
-            self._pending_publishes.pop(mid).set()
+            call = self._pending_calls.pop(mid, _CallKind.PUBLISH)
         except KeyError:
             # Do nothing since [2] may call on_publish before it even returns.
             # That is, the message may already be published before we even get a
             # chance to set up the 'pending_call' logic.
-            pass
+            return
+        if isinstance(call, _PublishBatch):
+            call.acknowledge(mid)
+        else:
+            _set_future_result(call, None)
 
     def _on_socket_open(
         self, client: mqtt.Client, userdata: Any, sock: _PahoSocket
     ) -> None:
+        paho = cast("_PahoClient", client)
+
         def callback() -> None:
-            # client.loop_read() may raise an exception, such as BadPipe. It's
-            # usually a sign that the underlaying connection broke, therefore we
-            # disconnect straight away
+            # Reading may raise an exception, such as BadPipe. It's usually a sign
+            # that the underlaying connection broke, therefore we disconnect straight
+            # away
             try:
-                client.loop_read()
+                self._read_burst(paho)
             except Exception as exc:
                 if not self._disconnected.done():
                     self._disconnected.set_exception(exc)
-
-        # paho-mqtt calls this function from the executor thread on which we've called
-        # `self._client.connect()` (see [3]), so we can't do most operations on
+                return
+            # Packets that we already received from the socket don't wake up the
+            # selector, so we continue with them at the next iteration
+            if (
+                paho.has_buffered_data
+                and not self._reading_paused
+                and self._reader is not None
+            ):
+                self._loop.call_soon(callback)
+
+        # paho-mqtt may call this function from the executor thread on which we've
+        # called `self._client.connect()` (see [3]), so we can't do most operations on
         # self._loop directly.
-        def create_misc_task() -> None:
-            self._misc_task = self._loop.create_task(self._misc_loop())
-
+        self._reader = (sock.fileno(), callback)
+        self._reading_paused = False
         self._loop.call_soon_threadsafe(self._loop.add_reader, sock.fileno(), callback)
-        self._loop.call_soon_threadsafe(create_misc_task)
+        self._loop.call_soon_threadsafe(self._schedule_keepalive)
+
+    def _read_burst(self, client: _PahoClient) -> None:
+        """Read packets until the socket has no more data or the budget is used up."""
+        packets = 0
+        start = client.bytes_read
+        while client.read_packet():
+            packets += 1
+            if (
+                packets >= self._max_packets_per_read
+                or self._reading_paused
+                or (
+                    self._max_bytes_per_read is not None
+                    and client.bytes_read - start >= self._max_bytes_per_read
+                )
+            ):
+                return
 
     def _on_socket_close(
         self, client: mqtt.Client, userdata: Any, sock: _PahoSocket
     ) -> None:
+        self._reader = None
+        self._reading_paused = False
         fileno = sock.fileno()
         if fileno > -1:
             self._loop.remove_reader(fileno)
-        if self._misc_task is not None and not self._misc_task.done():
-            self._loop.call_soon_threadsafe(self._misc_task.cancel)
+        if self._keepalive_timer is not None:
+            self._loop.call_soon_threadsafe(self._cancel_keepalive)
 
     def _on_socket_register_write(
         self, client: mqtt.Client, userdata: Any, sock: _PahoSocket
@@ -683,30 +2058,98 @@ class Client:
                 if not self._disconnected.done():
                     self._disconnected.set_exception(exc)
 
-        # paho-mqtt may call this function from the executor thread on which we've called
-        # `self._client.connect()` (see [3]), so we can't do most operations on
-        # self._loop directly.
-        self._loop.call_soon_threadsafe(self._loop.add_writer, sock, callback)
+        def flush() -> None:
+            # Write everything that was queued in the meantime at once. Only if the
+            # socket's buffer is full, wait until the socket is writable again.
+            callback()
+            if client.want_write() and client.socket() is sock:
+                self._loop.add_writer(sock, callback)
+
+        # paho-mqtt asks for a write when it queues a packet while none is pending.
+        # Instead of waiting for the selector to report the socket as writable, which
+        # it almost always is, we write at the next event loop iteration, so that all
+        # packets queued until then go out with a single send. With eager writes, we
+        # write right away. paho-mqtt may call this function from the executor thread
+        # on which we've called `self._client.connect()` (see [3]), so we can't
+        # always use self._loop directly.
+        if not self._in_loop_thread():
+            self._loop.call_soon_threadsafe(flush)
+        elif self._eager_writes and not client._in_callback_mutex.locked():  # noqa: SLF001
+            # Like paho-mqtt, don't write from within its callbacks, which hold the
+            # (non-reentrant) callback lock while writing
+            flush()
+        else:
+            self._loop.call_soon(flush)
+
+    def _in_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
 
     def _on_socket_unregister_write(
         self, client: mqtt.Client, userdata: Any, sock: _PahoSocket
     ) -> None:
         self._loop.remove_writer(sock)
 
-    async def _misc_loop(self) -> None:
-        while self._client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
-            await asyncio.sleep(1)
+    def _schedule_keepalive(self) -> None:
+        """Schedule the next keepalive check for when it's actually due.
 
-    async def __aenter__(self) -> Self:
-        """Connect to the broker."""
-        if self._lock.locked():
-            msg = "The client context manager is reusable, but not reentrant"
-            raise MqttReentrantError(msg)
-        await self._lock.acquire()
-        try:
+        Instead of polling paho-mqtt's ``loop_misc()`` every second, we call it only
+        when the keepalive interval since the last packet or since the last PINGREQ
+        is over. If packets were exchanged in the meantime, the check does nothing
+        and moves the timer to the new deadline.
+        """
+        self._cancel_keepalive()
+        deadline = cast("_PahoClient", self._client).keepalive_deadline()
+        if deadline is not None:
+            delay = max(deadline - time.monotonic(), 0)
+            self._keepalive_timer = self._loop.call_later(delay, self._check_keepalive)
+
+    def _cancel_keepalive(self) -> None:
+        if self._keepalive_timer is not None:
+            self._keepalive_timer.cancel()
+            self._keepalive_timer = None
+
+    def _check_keepalive(self) -> None:
+        self._keepalive_timer = None
+        if self._client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            self._schedule_keepalive()
+
+    async def _connect(self) -> None:
+        """Open the network connection and send the CONNECT packet."""
+        if isinstance(self._client, NativeClient):
+            self._reading_paused = False
+            await self._client.connect_transport(
+                self._hostname,
+                self._port,
+                self._keepalive,
+                self._bind_address,
+                self._bind_port,
+                self._clean_start,
+                self._properties,
+                self._socket_options,
+            )
+            return
+        if isinstance(self._client, _PahoClient) and self._client.connects_on_loop:
+            # Resolve, connect, and do the TLS handshake on the event loop. The
+            # connect() call below then only sends the CONNECT packet.
+            await self._client.open_socket(
+                self._hostname, self._port, self._bind_address, self._bind_port
+            )
+            self._client.connect(
+                self._hostname,
+                self._port,
+                self._keepalive,
+                self._bind_address,
+                self._bind_port,
+                self._clean_start,
+                self._properties,
+            )
+        else:
             loop = asyncio.get_running_loop()
-            # [3] Run connect() within an executor thread, since it blocks on socket
-            # connection for up to `keepalive` seconds: https://git.io/Jt5Yc
+            # [3] Run connect() within an executor thread, since it blocks on
+            # socket connection for up to `keepalive` seconds: https://git.io/Jt5Yc
             await loop.run_in_executor(
                 None,
                 self._client.connect,
@@ -718,7 +2161,20 @@ class Client:
                 self._clean_start,
                 self._properties,
             )
-            _set_client_socket_defaults(self._client.socket(), self._socket_options)
+        _set_client_socket_defaults(self._client.socket(), self._socket_options)
+
+    async def __aenter__(self) -> Self:
+        """Connect to the broker."""
+        if self._lock.locked():
+            msg = "The client context manager is reusable, but not reentrant"
+            raise MqttReentrantError(msg)
+        await self._lock.acquire()
+        # `_connected` is still done if the previous connection was lost. Reset it to
+        # wait for the CONNACK of the new connection.
+        if self._connected.done():
+            self._connected = asyncio.Future()
+        try:
+            await self._connect()
         # Convert all possible paho-mqtt Client.connect exceptions to our MqttError
         # See: https://github.com/eclipse/paho.mqtt.python/blob/v1.5.0/src/paho/mqtt/client.py#L1770
         except (OSError, mqtt.WebsocketConnectionError) as exc:
@@ -734,6 +2190,9 @@ class Client:
         # Reset `_disconnected` if it's already in completed state after connecting
         if self._disconnected.done():
             self._disconnected = asyncio.Future()
+            self._disconnected.add_done_callback(self._wakeup_message_waiters)
+        if self._outbox is not None:
+            self._flush_outbox()
         return self
 
     async def __aexit__(
@@ -743,6 +2202,9 @@ class Client:
         tb: TracebackType | None,
     ) -> None:
         """Disconnect from the broker."""
+        self._outbox_online = False
+        # Don't let coroutine callbacks outlive the connection
+        await self._cancel_callback_tasks()
         if self._disconnected.done():
             # Return early if the client is already disconnected
             if self._lock.locked():
@@ -771,6 +2233,78 @@ class Client:
             self._lock.release()
 
 
+async def _await(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+def _set_future_result(fut: asyncio.Future[T], result: T) -> None:
+    if not fut.done():
+        fut.set_result(result)
+
+
+async def _connect_tcp(
+    loop: asyncio.AbstractEventLoop,
+    host: str,
+    port: int,
+    bind_address: str,
+    bind_port: int,
+) -> socket.socket:
+    """Non-blocking equivalent of ``socket.create_connection()``.
+
+    Like ``loop.create_connection()``, this resolves hostnames with the executor, but
+    uses IP addresses directly.
+    """
+    try:
+        # IP addresses don't need to be resolved, which can't block
+        infos = socket.getaddrinfo(
+            host, port, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST
+        )
+    except socket.gaierror:
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    if not infos:
+        msg = "getaddrinfo returns an empty list"
+        raise OSError(msg)
+    errors: list[OSError] = []
+    for family, type_, proto, _, address in infos:
+        sock = socket.socket(family, type_, proto)
+        try:
+            sock.setblocking(False)
+            if bind_address or bind_port:
+                sock.bind((bind_address, bind_port))
+            await loop.sock_connect(sock, address)
+        except OSError as exc:
+            # Try the next address, like socket.create_connection()
+            sock.close()
+            errors.append(exc)
+        except BaseException:
+            sock.close()
+            raise
+        else:
+            return sock
+    raise errors[-1]
+
+
+async def _do_tls_handshake(
+    loop: asyncio.AbstractEventLoop, ssl_sock: ssl.SSLSocket
+) -> None:
+    """Do the TLS handshake of a non-blocking socket without blocking the loop."""
+    while True:
+        try:
+            ssl_sock.do_handshake()
+        except ssl.SSLWantReadError:
+            add, remove = loop.add_reader, loop.remove_reader
+        except ssl.SSLWantWriteError:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            return
+        ready: asyncio.Future[None] = loop.create_future()
+        add(ssl_sock, _set_future_result, ready, None)
+        try:
+            await ready
+        finally:
+            remove(ssl_sock)
+
+
 def _set_client_socket_defaults(
     client_socket: _PahoSocket | None, socket_options: Iterable[SocketOption]
 ) -> None:
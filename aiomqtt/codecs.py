@@ -0,0 +1,216 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import copy
+import json
+import struct
+from typing import Any, Callable, Iterable, Mapping, Protocol, Sequence
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from .router import TopicTrie
+from .topic import TopicLike, WildcardLike
+
+
+class Codec(Protocol):
+    """Converts between payloads and Python objects.
+
+    Attributes:
+        content_type (str | None):
+            (MQTT v5.0 only) The content type that's sent along with encoded payloads
+            and that identifies payloads to decode.
+    """
+
+    content_type: str | None
+
+    def encode(self, value: Any) -> bytes:
+        """Convert an object to a payload."""
+
+    def decode(self, payload: bytes) -> Any:
+        """Convert a payload to an object."""
+
+
+class JSONCodec:
+    """Codec for JSON payloads.
+
+    Encoding produces compact UTF-8 JSON. To use a faster JSON library, pass its
+    functions, e.g. ``JSONCodec(loads=orjson.loads, dumps=orjson.dumps)``.
+
+    Args:
+        loads: The function that parses JSON from ``bytes``. Defaults to the standard
+            library's decoder.
+        dumps: The function that serializes an object to JSON as ``str`` or
+            ``bytes``. Defaults to the standard library's encoder.
+        content_type: (MQTT v5.0 only) The content type of JSON payloads.
+    """
+
+    def __init__(
+        self,
+        *,
+        loads: Callable[[bytes], Any] | None = None,
+        dumps: Callable[[Any], str | bytes] | None = None,
+        content_type: str | None = "application/json",
+    ) -> None:
+        self._loads = loads
+        self._dumps = dumps
+        self.content_type = content_type
+
+    def encode(self, value: Any) -> bytes:
+        if self._dumps is None:
+            return _JSON_ENCODER.encode(value).encode()
+        result = self._dumps(value)
+        return result.encode() if isinstance(result, str) else result
+
+    def decode(self, payload: bytes) -> Any:
+        if self._loads is None:
+            # JSON is always UTF-8, so we can skip json.loads' encoding detection
+            return _JSON_DECODER.decode(payload.decode())
+        return self._loads(payload)
+
+
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+_JSON_DECODER = json.JSONDecoder()
+
+
+class StructCodec:
+    """Codec for payloads with a fixed binary layout.
+
+    Args:
+        format: The layout in the syntax of the ``struct`` module, e.g. ``"<Ifh"``.
+        fields: The names of the fields. If given, payloads are decoded to
+            dictionaries and encoded from mappings. Otherwise, they're decoded to
+            tuples and encoded from sequences.
+        content_type: (MQTT v5.0 only) The content type of the payloads.
+
+    Example:
+        .. code-block:: python
+
+            codec = aiomqtt.StructCodec("<Idf", fields=("id", "time", "value"))
+            codec.decode(payload)  # {"id": 1, "time": 1718000000.0, "value": 28.4}
+    """
+
+    def __init__(
+        self,
+        format: str,  # noqa: A002
+        fields: Sequence[str] | None = None,
+        *,
+        content_type: str | None = None,
+    ) -> None:
+        # Compile the format once instead of on every call
+        self._struct = struct.Struct(format)
+        size = len(self._struct.unpack(bytes(self._struct.size)))
+        if fields is not None and len(fields) != size:
+            msg = "The number of fields must match the format"
+            raise ValueError(msg)
+        self._fields = None if fields is None else tuple(fields)
+        self.content_type = content_type
+
+    def encode(self, value: Sequence[Any] | Mapping[str, Any]) -> bytes:
+        if self._fields is not None and isinstance(value, Mapping):
+            return self._struct.pack(*(value[field] for field in self._fields))
+        return self._struct.pack(*value)
+
+    def decode(self, payload: bytes) -> tuple[Any, ...] | dict[str, Any]:
+        values = self._struct.unpack(payload)
+        if self._fields is None:
+            return values
+        return dict(zip(self._fields, values))
+
+
+class CodecRegistry:
+    """Selects the codec for a message by its content type or topic.
+
+    A message's MQTT v5.0 content type property takes precedence. Otherwise, the
+    codec of the first added wildcard that matches the topic is used. The result of
+    matching a topic is remembered for up to ``cache_size`` topics, so that the
+    usual stream of messages to a limited set of topics skips the wildcard lookup.
+
+    Args:
+        codecs: ``(wildcard, codec)`` pairs to add.
+        cache_size: The maximum number of topics to remember the codec for.
+
+    Example:
+        .. code-block:: python
+
+            codecs = aiomqtt.CodecRegistry([("sensors/+/json", aiomqtt.JSONCodec())])
+            async with aiomqtt.Client("test.mosquitto.org", codecs=codecs) as client:
+                await client.publish("sensors/1/json", {"temperature": 28.4})
+    """
+
+    def __init__(
+        self,
+        codecs: Iterable[tuple[WildcardLike, Codec]] = (),
+        *,
+        cache_size: int = 4096,
+    ) -> None:
+        self._by_topic: TopicTrie[Codec] = TopicTrie()
+        self._by_content_type: dict[str, Codec] = {}
+        self._matches: dict[str, Codec | None] = {}
+        self._cache_size = cache_size
+        for wildcard, codec in codecs:
+            self.add(wildcard, codec)
+
+    def add(self, wildcard: WildcardLike, codec: Codec) -> None:
+        """Use a codec for the topics that match a wildcard.
+
+        The codec is also used for all messages with its content type.
+        """
+        self._by_topic.insert(wildcard, codec)
+        self._matches.clear()
+        if codec.content_type is not None:
+            self._by_content_type.setdefault(codec.content_type, codec)
+
+    def match(self, topic: TopicLike, content_type: str | None = None) -> Codec | None:
+        """Return the codec for a topic and content type, or ``None`` if none fits."""
+        if content_type is not None:
+            codec = self._by_content_type.get(content_type)
+            if codec is not None:
+                return codec
+        key = topic if isinstance(topic, str) else topic.value
+        try:
+            return self._matches[key]
+        except KeyError:
+            pass
+        if isinstance(topic, str):
+            # Don't validate the topics of incoming messages only to select the codec
+            codecs = self._by_topic.match_levels(topic.split("/"))
+        else:
+            codecs = self._by_topic.match(topic)
+        codec = codecs[0] if codecs else None
+        if len(self._matches) >= self._cache_size:
+            # Start over instead of tracking the least recently used topic
+            self._matches.clear()
+        self._matches[key] = codec
+        return codec
+
+
+def _encode_payload(
+    codecs: CodecRegistry,
+    topic: str,
+    value: Any,
+    properties: Properties | None,
+    *,
+    v5: bool,
+) -> tuple[Any, Properties | None]:
+    """Encode a value to publish with the codec that matches the topic.
+
+    Payloads that are already ``bytes`` or ``bytearray`` and empty payloads are
+    published as they are. With MQTT v5.0, the codec's content type is added to the
+    properties, unless they already contain one.
+    """
+    if value is None or isinstance(value, (bytes, bytearray)):
+        return value, properties
+    content_type = getattr(properties, "ContentType", None)
+    codec = codecs.match(topic, content_type)
+    if codec is None:
+        return value, properties
+    payload = codec.encode(value)
+    if v5 and content_type is None and codec.content_type is not None:
+        # Copy the properties instead of changing the caller's instance
+        if properties is None:
+            properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+        else:
+            properties = copy.copy(properties)
+        properties.ContentType = codec.content_type
+    return payload, properties
@@ -0,0 +1,142 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import bz2
+import copy
+import functools
+import lzma
+import zlib
+from typing import Any, Callable, Literal
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from .types import PayloadType
+
+# Name of the MQTT v5.0 user property that marks compressed payloads
+ENCODING_PROPERTY = "content-encoding"
+# MQTT packets can't be larger than this, so larger decompressed payloads are
+# treated as invalid instead of letting a small payload expand without limit
+MAX_DECOMPRESSED_SIZE = 268_435_455
+
+Algorithm = Literal["zlib", "lzma", "bz2"]
+
+
+class Compression:
+    """Compresses the payloads of published messages.
+
+    Compressed messages are marked with the MQTT v5.0 user property
+    ``("content-encoding", <algorithm>)``. Clients decompress incoming messages with
+    this property automatically, whether or not they compress their own messages.
+
+    Payloads are compressed after they're encoded with the client's codecs.
+    Payloads smaller than ``threshold`` bytes are sent as they are, because the
+    compression headers would outweigh the savings.
+
+    Args:
+        algorithm: The standard library module to compress with: ``"zlib"`` is fast,
+            ``"lzma"`` and ``"bz2"`` compress more, but take more CPU time.
+        level: The compression level (``0``-``9``), or ``None`` for the module's
+            default. For ``"bz2"``, the lowest level is ``1``.
+        threshold: The minimum size in bytes of payloads to compress.
+
+    Example:
+        .. code-block:: python
+
+            async with aiomqtt.Client(
+                "test.mosquitto.org",
+                protocol=aiomqtt.ProtocolVersion.V5,
+                compression=aiomqtt.Compression("zlib", threshold=256),
+            ) as client:
+                await client.publish("logs", verbose_json)
+    """
+
+    def __init__(
+        self,
+        algorithm: Algorithm = "zlib",
+        *,
+        level: int | None = None,
+        threshold: int = 512,
+    ) -> None:
+        compress: Callable[[bytes], bytes]
+        if algorithm == "zlib":
+            compress = functools.partial(
+                zlib.compress, level=-1 if level is None else level
+            )
+        elif algorithm == "lzma":
+            compress = functools.partial(lzma.compress, preset=level)
+        elif algorithm == "bz2":
+            compress = functools.partial(
+                bz2.compress, compresslevel=9 if level is None else level
+            )
+        else:
+            msg = f"Unknown compression algorithm: {algorithm!r}"
+            raise ValueError(msg)
+        self.algorithm = algorithm
+        self.level = level
+        self.threshold = threshold
+        self._compress: Callable[[bytes], bytes] = compress
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a payload, regardless of its size."""
+        return self._compress(data)
+
+
+def _compress_payload(
+    compression: Compression, payload: PayloadType, properties: Properties | None
+) -> tuple[PayloadType, Properties | None]:
+    """Compress a payload to publish if it reaches the threshold.
+
+    Returns:
+        The payload and the properties to publish it with, which mark the payload as
+        compressed. The caller's properties are left alone.
+    """
+    if isinstance(payload, (int, float)):
+        # Like paho-mqtt, send numbers as strings
+        payload = str(payload)
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if payload is None or len(payload) < compression.threshold:
+        return payload, properties
+    if properties is None:
+        properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    elif _encoding(properties) is not None:
+        # Already compressed by the application
+        return payload, properties
+    else:
+        properties = copy.copy(properties)
+    properties.UserProperty = (ENCODING_PROPERTY, compression.algorithm)
+    return compression.compress(bytes(payload)), properties
+
+
+def _encoding(properties: Properties | None) -> str | None:
+    """Return the compression algorithm that the properties mark, if any."""
+    for key, value in getattr(properties, "UserProperty", ()):
+        if key == ENCODING_PROPERTY:
+            return value  # type: ignore[no-any-return]
+    return None
+
+
+def _decompress_payload(payload: bytes, properties: Properties | None) -> bytes:
+    """Decompress a received payload that's marked as compressed.
+
+    Payloads that aren't marked, that use an unknown algorithm, that are corrupt, or
+    that would exceed the maximum MQTT packet size are returned as they are.
+    """
+    algorithm = _encoding(properties)
+    if algorithm not in ("zlib", "lzma", "bz2"):
+        return payload
+    decompressor: Any
+    if algorithm == "zlib":
+        decompressor = zlib.decompressobj()
+    elif algorithm == "lzma":
+        decompressor = lzma.LZMADecompressor()
+    else:
+        decompressor = bz2.BZ2Decompressor()
+    try:
+        data: bytes = decompressor.decompress(payload, MAX_DECOMPRESSED_SIZE + 1)
+    except (zlib.error, lzma.LZMAError, OSError, EOFError):
+        return payload
+    if len(data) > MAX_DECOMPRESSED_SIZE:
+        return payload
+    return data
@@ -40,6 +40,13 @@ class MqttConnectError(MqttCodeError):
 class MqttReentrantError(MqttError): ...
 
 
+class MqttBulkPublishError(MqttError):
+    def __init__(self, failed: dict[int, MqttError]) -> None:
+        super().__init__(f"Could not publish {len(failed)} messages")
+        # Maps the position of each failed message in the input to its error
+        self.failed = failed
+
+
 _CONNECT_RC_STRINGS: dict[int, str] = {
     # Reference: https://github.com/eclipse/paho.mqtt.python/blob/v1.5.0/src/paho/mqtt/client.py#L1898
     # 0: Connection successful
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import sys
+from typing import TYPE_CHECKING, Any
 
 import paho.mqtt.client as mqtt
 from paho.mqtt.properties import Properties
@@ -11,9 +12,16 @@ if sys.version_info >= (3, 11):
 else:
     from typing_extensions import Self
 
-from .topic import Topic, TopicLike
+from .compression import _decompress_payload
+from .topic import Topic, TopicCache, TopicLike
 from .types import PayloadType
 
+if TYPE_CHECKING:
+    from .codecs import CodecRegistry
+
+# Marks messages whose payload wasn't decoded yet
+_UNDECODED: Any = object()
+
 
 class Message:
     """Wraps the paho-mqtt message class to allow using our own matching logic.
@@ -44,6 +52,18 @@ class Message:
             (MQTT v5.0 only) The properties associated with the message.
     """
 
+    __slots__ = (
+        "_topic",
+        "_topic_cache",
+        "_codecs",
+        "_decoded",
+        "payload",
+        "qos",
+        "retain",
+        "mid",
+        "properties",
+    )
+
     def __init__(  # noqa: PLR0913
         self,
         topic: TopicLike,
@@ -53,22 +73,105 @@ class Message:
         mid: int,
         properties: Properties | None,
     ) -> None:
-        self.topic = Topic(topic) if not isinstance(topic, Topic) else topic
+        self._topic: Topic | str = (
+            Topic(topic) if not isinstance(topic, Topic) else topic
+        )
+        self._topic_cache: TopicCache | None = None
+        self._codecs: CodecRegistry | None = None
+        self._decoded: Any = _UNDECODED
         self.payload = payload
         self.qos = qos
         self.retain = retain
         self.mid = mid
         self.properties = properties
 
+    @property
+    def topic(self) -> Topic:
+        topic = self._topic
+        if not isinstance(topic, Topic):
+            # Validate the topic of incoming messages only when it's first accessed
+            if self._topic_cache is None:
+                topic = Topic(topic)
+            else:
+                topic = self._topic_cache.get(topic)
+                self._topic_cache = None
+            self._topic = topic
+        return topic
+
+    @topic.setter
+    def topic(self, value: TopicLike) -> None:
+        self._topic = Topic(value) if not isinstance(value, Topic) else value
+        self._topic_cache = None
+
+    def _raw_topic(self) -> str:
+        """Return the topic as a string without validating it."""
+        topic = self._topic
+        return topic if isinstance(topic, str) else topic.value
+
+    @property
+    def decoded(self) -> Any:
+        """The payload, decoded with the codec that matches the message.
+
+        The codec is chosen by the client's ``CodecRegistry``, by the message's MQTT
+        v5.0 content type or by its topic. The payload is decoded when this is first
+        accessed; Further accesses return the same object. If no codec matches, this
+        is the payload itself.
+        """
+        decoded = self._decoded
+        if decoded is _UNDECODED:
+            decoded = self.payload
+            codecs = self._codecs
+            if codecs is not None and isinstance(decoded, (bytes, bytearray)):
+                content_type = getattr(self.properties, "ContentType", None)
+                # Match the raw topic, which the registry doesn't validate
+                codec = codecs.match(self._topic, content_type)
+                if codec is not None:
+                    decoded = codec.decode(decoded)
+            self._decoded = decoded
+        return decoded
+
     @classmethod
-    def _from_paho_message(cls, message: mqtt.MQTTMessage) -> Self:
-        return cls(
-            topic=message.topic,
-            payload=message.payload,
-            qos=message.qos,
-            retain=message.retain,
-            mid=message.mid,
-            properties=message.properties if hasattr(message, "properties") else None,
+    def _from_paho_message(
+        cls,
+        message: mqtt.MQTTMessage,
+        topic_cache: TopicCache | None = None,
+        codecs: CodecRegistry | None = None,
+    ) -> Self:
+        # Skip __init__ so that the topic is converted lazily. We copy the properties
+        # reference instead of keeping the paho-mqtt message (and its MQTTMessageInfo)
+        # alive for as long as the message is queued.
+        self = cls.__new__(cls)
+        self._topic = message.topic
+        self._topic_cache = topic_cache
+        self._codecs = codecs
+        self._decoded = _UNDECODED
+        self.payload = message.payload
+        self.qos = message.qos
+        self.retain = message.retain
+        self.mid = message.mid
+        self.properties = getattr(message, "properties", None)
+        if self.properties is not None:
+            # Decompress payloads that are marked as compressed (MQTT v5.0 only)
+            self.payload = _decompress_payload(message.payload, self.properties)
+        return self
+
+    def __reduce__(
+        self,
+    ) -> tuple[type[Self], tuple[Any, ...], tuple[None, dict[str, Any]] | None]:
+        # Pickle the topic as a string and leave the topic cache behind, e.g. to pass
+        # messages to a process pool. The cache is only useful in this process.
+        topic = self._raw_topic()
+        # Keep the codecs (or the decoded payload), so that `decoded` gives the same
+        # result on the other side
+        state = None
+        if self._decoded is not _UNDECODED:
+            state = (None, {"_decoded": self._decoded})
+        elif self._codecs is not None:
+            state = (None, {"_codecs": self._codecs})
+        return (
+            self.__class__,
+            (topic, self.payload, self.qos, self.retain, self.mid, self.properties),
+            state,
         )
 
     def __lt__(self, other: Self) -> bool:
@@ -0,0 +1,928 @@
+# SPDX-License-Identifier: BSD-3-Clause
+"""MQTT engine that runs on asyncio's transports instead of paho-mqtt's network loop.
+
+``NativeClient`` is a drop-in replacement for the paho-mqtt client that ``Client``
+wraps. It keeps paho-mqtt's configuration methods and callback API, but encodes and
+decodes MQTT 3.1, 3.1.1, and 5.0 packets itself, on top of an ``asyncio.Protocol``.
+Incoming packets are parsed directly out of the buffers that the transport passes to
+``data_received`` and the outgoing packets of each event loop iteration are written
+to the transport together. This lets the client use asyncio's optimized transports,
+including its SSL transport.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import functools
+import struct
+from typing import Any, Callable, Iterable, cast
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.enums import ConnackCode, LogLevel, MQTTErrorCode
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from paho.mqtt.reasoncodes import ReasonCode
+from paho.mqtt.subscribeoptions import SubscribeOptions
+
+from .types import PayloadType, SocketOption
+
+# First byte of the fixed header of each packet type
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+PUBREC = 0x50
+PUBREL = 0x60
+PUBCOMP = 0x70
+SUBSCRIBE = 0x80
+SUBACK = 0x90
+UNSUBSCRIBE = 0xA0
+UNSUBACK = 0xB0
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+MAX_REMAINING_LENGTH = 268435455
+# Reason codes of 0x80 and above indicate failure
+REASON_CODE_FAILURE = 0x80
+
+_UINT16 = struct.Struct("!H")
+_ACK = struct.Struct("!BBH")
+_PINGREQ_PACKET = bytes((PINGREQ, 0))
+_EMPTY_PROPERTIES = b"\x00"
+
+
+class MalformedPacketError(Exception):
+    """Raised when the broker sends bytes that are not a valid MQTT packet."""
+
+
+def encode_remaining_length(length: int) -> bytes:
+    """Encode the remaining length of the fixed header as a variable byte integer."""
+    if length < 0x80:  # noqa: PLR2004
+        return _SMALL_LENGTHS[length]
+    if length > MAX_REMAINING_LENGTH:
+        msg = "Packet too large"
+        raise ValueError(msg)
+    encoded = bytearray()
+    while length:
+        length, byte = divmod(length, 0x80)
+        encoded.append(byte | 0x80 if length else byte)
+    return bytes(encoded)
+
+
+_SMALL_LENGTHS = tuple(bytes((length,)) for length in range(0x80))
+
+
+def decode_remaining_length(data: bytes, pos: int) -> tuple[int, int]:
+    """Decode a variable byte integer that starts at the given position.
+
+    Returns:
+        The value and the position of the first byte after it, or ``(-1, pos)`` if
+        the data ends before the integer does.
+
+    Raises:
+        MalformedPacketError: If the integer is longer than four bytes.
+    """
+    value = 0
+    shift = 0
+    for index in range(pos, min(pos + 4, len(data))):
+        byte = data[index]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:  # noqa: PLR2004
+            return value, index + 1
+        shift += 7
+    if len(data) - pos >= 4:  # noqa: PLR2004
+        msg = "Malformed variable byte integer"
+        raise MalformedPacketError(msg)
+    return -1, pos
+
+
+def encode_packet(header: int, *parts: bytes) -> bytes:
+    """Prefix the variable header and payload with the fixed header."""
+    length = sum(len(part) for part in parts)
+    return b"".join((bytes((header,)), encode_remaining_length(length), *parts))
+
+
+def encode_string(data: bytes) -> bytes:
+    return _UINT16.pack(len(data)) + data
+
+
+def encode_publish(  # noqa: PLR0913
+    topic: bytes,
+    payload: bytes,
+    qos: int,
+    retain: bool,
+    mid: int,
+    properties: bytes | None,
+) -> bytes:
+    """Encode a PUBLISH packet. ``properties`` must be ``None`` for MQTT < 5.0."""
+    variable_header = _UINT16.pack(len(topic)) + topic
+    if qos:
+        variable_header += _UINT16.pack(mid)
+    if properties is not None:
+        variable_header += properties
+    return encode_packet(PUBLISH | qos << 1 | retain, variable_header, payload)
+
+
+def encode_payload(payload: PayloadType) -> bytes:
+    """Convert a payload to bytes the same way as paho-mqtt."""
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode()
+    if payload is None:
+        return b""
+    if isinstance(payload, (int, float)):
+        return str(payload).encode("ascii")
+    msg = "payload must be a string, bytearray, int, float or None."
+    raise TypeError(msg)
+
+
+def _pack_properties(properties: Properties | None) -> bytes:
+    if properties is None:
+        return _EMPTY_PROPERTIES
+    return cast("bytes", properties.pack())  # type: ignore[no-untyped-call]
+
+
+def _unpack_properties(packet_type: int, data: bytes) -> Properties:
+    """Unpack properties that are prefixed with their length."""
+    properties = Properties(packet_type)  # type: ignore[no-untyped-call]
+    properties.unpack(data)  # type: ignore[no-untyped-call]
+    return properties
+
+
+@functools.lru_cache(maxsize=None)
+def _reason_code(packet_type: int, identifier: int) -> ReasonCode:
+    return ReasonCode(packet_type, identifier=identifier)
+
+
+@functools.lru_cache(maxsize=None)
+def _empty_properties(packet_type: int) -> Properties:
+    # Shared by all callbacks. paho-mqtt passes empty properties instead of `None`.
+    return Properties(packet_type)  # type: ignore[no-untyped-call]
+
+
+class _MessageInfo(mqtt.MQTTMessageInfo):
+    """Lightweight ``MQTTMessageInfo`` without the condition variable.
+
+    Only the attributes that ``Client`` uses are supported.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        mid: int,
+        rc: MQTTErrorCode = mqtt.MQTT_ERR_SUCCESS,
+        published: bool = False,
+    ) -> None:
+        self.mid = mid
+        self.rc = rc
+        self._published = published
+        self._iterpos = 0
+
+    def is_published(self) -> bool:
+        return self._published
+
+
+class _IncomingMessage(mqtt.MQTTMessage):
+    """Lightweight ``MQTTMessage`` without the ``MQTTMessageInfo``."""
+
+    __slots__ = ()
+
+    def __init__(  # noqa: PLR0913
+        self,
+        mid: int,
+        topic: bytes,
+        payload: bytes,
+        qos: int,
+        retain: bool,
+        dup: bool,
+        properties: Properties | None,
+    ) -> None:
+        self.mid = mid
+        self._topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.dup = dup
+        self.properties = properties
+
+
+class _Connection(asyncio.Protocol):
+    """A single connection to the broker with its own parser and session state.
+
+    Outgoing QoS 1 and QoS 2 messages that are not yet acknowledged are dropped with
+    the connection, like the rest of the session state.
+    """
+
+    def __init__(self, client: NativeClient, loop: asyncio.AbstractEventLoop) -> None:
+        self._client = client
+        self._loop = loop
+        self._v5 = client._protocol == mqtt.MQTTv5  # noqa: SLF001
+        self.transport: asyncio.Transport | None = None
+        # Whether the broker accepted the connection
+        self.connected = False
+        # Bytes of an incomplete packet and the size it needs to reach to be parsed
+        self._buffer = bytearray()
+        self._needed = 0
+        self._paused = False
+        # Outgoing packets that are written at the next event loop iteration
+        self._outgoing: list[bytes] = []
+        self._eager_writes = client.eager_writes
+        # Outgoing QoS > 0 messages that wait for acknowledgement, or for a free slot
+        self._inflight: set[int] = set()
+        self._queued: collections.deque[tuple[int, bytes]] = collections.deque()
+        self.max_inflight = client._max_inflight_messages  # noqa: SLF001
+        # Incoming QoS 2 messages that were delivered but not yet released
+        self._incoming_qos2: set[int] = set()
+        # Keepalive state
+        self.keepalive = client._keepalive  # noqa: SLF001
+        self._last_in = self._last_out = loop.time()
+        self._ping_outstanding = False
+        self._keepalive_timer: asyncio.TimerHandle | None = None
+        # Whether the disconnection came from the broker, and its reason
+        self._disconnect: tuple[bool, ReasonCode, Properties | None] | None = None
+
+    # asyncio.Protocol
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def data_received(self, data: bytes) -> None:
+        self._last_in = self._loop.time()
+        if self._buffer:
+            self._buffer += data
+            # Don't copy and re-parse a large packet until all of it has arrived
+            if len(self._buffer) < self._needed:
+                return
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        self._feed(data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.transport = None
+        self._outgoing.clear()
+        self.connected = False
+        if self._keepalive_timer is not None:
+            self._keepalive_timer.cancel()
+            self._keepalive_timer = None
+        if self._disconnect is None:
+            self._disconnect = (
+                False,
+                ReasonCode(PacketTypes.DISCONNECT, "Unspecified error"),
+                None,
+            )
+        self._client._connection_lost(self, *self._disconnect)  # noqa: SLF001
+
+    # Reading
+
+    def _feed(self, data: bytes) -> None:
+        try:
+            consumed = self._parse(data)
+        except (MalformedPacketError, IndexError, struct.error):
+            self._client._log(mqtt.MQTT_LOG_ERR, "Received a malformed packet")  # noqa: SLF001
+            self.close(ReasonCode(PacketTypes.DISCONNECT, "Malformed packet"))
+            return
+        if consumed < len(data):
+            self._buffer += memoryview(data)[consumed:]
+
+    def _parse(self, data: bytes) -> int:
+        """Handle all complete packets in the data and return the bytes consumed."""
+        pos = 0
+        end = len(data)
+        self._needed = 0
+        while end - pos >= 2 and not self._paused and self.transport is not None:  # noqa: PLR2004
+            header = data[pos]
+            length = data[pos + 1]
+            start = pos + 2
+            if length >= 0x80:  # noqa: PLR2004
+                length, start = decode_remaining_length(data, pos + 1)
+                if length < 0:
+                    break
+            stop = start + length
+            if stop > end:
+                self._needed = stop - pos
+                break
+            pos = stop
+            self._handle_packet(header, data, start, stop)
+        return pos
+
+    def _handle_packet(self, header: int, data: bytes, start: int, stop: int) -> None:
+        packet_type = header & 0xF0
+        if packet_type == PUBLISH:
+            self._handle_publish(header, data, start, stop)
+        elif packet_type in (PUBACK, PUBCOMP):
+            self._handle_ack(packet_type, data, start, stop)
+        elif packet_type == PUBREC:
+            self._handle_pubrec(data, start, stop)
+        elif packet_type == PUBREL:
+            mid = _UINT16.unpack_from(data, start)[0]
+            self._incoming_qos2.discard(mid)
+            self._write(_ACK.pack(PUBCOMP, 2, mid))
+        elif packet_type in (SUBACK, UNSUBACK):
+            self._handle_suback(packet_type, data, start, stop)
+        elif packet_type == PINGRESP:
+            self._ping_outstanding = False
+        elif packet_type == CONNACK:
+            self._handle_connack(data, start, stop)
+        elif packet_type == DISCONNECT:
+            reason = data[start] if stop > start else 0
+            properties, _ = self._unpack_properties(
+                PacketTypes.DISCONNECT, data, start + 1, stop
+            )
+            self._disconnect = (
+                True,
+                ReasonCode(PacketTypes.DISCONNECT, identifier=reason),
+                properties,
+            )
+            self.close()
+        else:
+            msg = f"Unexpected packet type {packet_type:#x}"
+            raise MalformedPacketError(msg)
+
+    def _unpack_properties(
+        self, packet_type: int, data: bytes, start: int, stop: int
+    ) -> tuple[Properties | None, int]:
+        """Unpack the (optional) properties at the start of the given range.
+
+        Returns:
+            The properties, or ``None`` for MQTT < 5.0, and their end position.
+        """
+        if not self._v5:
+            return None, start
+        if start >= stop:
+            return _empty_properties(packet_type), start
+        length, pos = decode_remaining_length(data, start)
+        if length < 0 or pos + length > stop:
+            msg = "Malformed properties"
+            raise MalformedPacketError(msg)
+        if length == 0:
+            return _empty_properties(packet_type), pos
+        return _unpack_properties(packet_type, data[start : pos + length]), pos + length
+
+    def _handle_publish(self, header: int, data: bytes, start: int, stop: int) -> None:
+        qos = (header >> 1) & 0x03
+        topic_end = start + 2 + _UINT16.unpack_from(data, start)[0]
+        topic = data[start + 2 : topic_end]
+        pos = topic_end
+        mid = 0
+        if qos:
+            mid = _UINT16.unpack_from(data, pos)[0]
+            pos += 2
+        properties = None
+        if self._v5:
+            # Unlike other packets, every message gets its own properties instance
+            length, props_start = decode_remaining_length(data, pos)
+            properties = _unpack_properties(
+                PacketTypes.PUBLISH, data[pos : props_start + length]
+            )
+            pos = props_start + length
+        if pos > stop or qos == 3:  # noqa: PLR2004
+            msg = "Malformed PUBLISH packet"
+            raise MalformedPacketError(msg)
+        message = _IncomingMessage(
+            mid,
+            topic,
+            data[pos:stop],
+            qos,
+            bool(header & 0x01),
+            bool(header & 0x08),
+            properties,
+        )
+        if qos == 0:
+            self._client._deliver(message)  # noqa: SLF001
+        elif qos == 1:
+            self._client._deliver(message)  # noqa: SLF001
+            self._write(_ACK.pack(PUBACK, 2, mid))
+        else:
+            # Deliver on PUBLISH instead of on PUBREL, but only once per message ID
+            # until the broker releases it
+            if mid not in self._incoming_qos2:
+                self._incoming_qos2.add(mid)
+                self._client._deliver(message)  # noqa: SLF001
+            self._write(_ACK.pack(PUBREC, 2, mid))
+
+    def _handle_ack(self, packet_type: int, data: bytes, start: int, stop: int) -> None:
+        mid = _UINT16.unpack_from(data, start)[0]
+        reason = data[start + 2] if self._v5 and stop > start + 2 else 0
+        properties, _ = self._unpack_properties(packet_type >> 4, data, start + 3, stop)
+        self._release(mid, packet_type, reason, properties)
+
+    def _handle_pubrec(self, data: bytes, start: int, stop: int) -> None:
+        mid = _UINT16.unpack_from(data, start)[0]
+        reason = data[start + 2] if self._v5 and stop > start + 2 else 0
+        if reason >= REASON_CODE_FAILURE:
+            # The broker refused the message, so the flow ends here
+            properties, _ = self._unpack_properties(
+                PacketTypes.PUBREC, data, start + 3, stop
+            )
+            self._release(mid, PUBREC, reason, properties)
+            return
+        self._write(_ACK.pack(PUBREL | 0x02, 2, mid))
+
+    def _release(
+        self, mid: int, packet_type: int, reason: int, properties: Properties | None
+    ) -> None:
+        """End the flow of an outgoing message and send the next queued message."""
+        try:
+            self._inflight.remove(mid)
+        except KeyError:
+            return
+        while self._queued and (
+            self.max_inflight == 0 or len(self._inflight) < self.max_inflight
+        ):
+            queued_mid, packet = self._queued.popleft()
+            self._inflight.add(queued_mid)
+            self._write(packet)
+        self._client._call(  # noqa: SLF001
+            "on_publish",
+            mid,
+            _reason_code(packet_type >> 4, reason),
+            properties or _empty_properties(packet_type >> 4),
+        )
+
+    def _handle_suback(
+        self, packet_type: int, data: bytes, start: int, stop: int
+    ) -> None:
+        mid = _UINT16.unpack_from(data, start)[0]
+        properties, pos = self._unpack_properties(
+            packet_type >> 4, data, start + 2, stop
+        )
+        reason_codes = [
+            _reason_code(packet_type >> 4, identifier) for identifier in data[pos:stop]
+        ]
+        callback = "on_subscribe" if packet_type == SUBACK else "on_unsubscribe"
+        self._client._call(  # noqa: SLF001
+            callback,
+            mid,
+            reason_codes,
+            properties or _empty_properties(packet_type >> 4),
+        )
+
+    def _handle_connack(self, data: bytes, start: int, stop: int) -> None:
+        flags = mqtt.ConnectFlags(session_present=bool(data[start] & 0x01))
+        reason = data[start + 1]
+        properties, _ = self._unpack_properties(
+            PacketTypes.CONNACK, data, start + 2, stop
+        )
+        if self._v5:
+            reason_code = ReasonCode(PacketTypes.CONNACK, identifier=reason)
+        else:
+            reason_code = mqtt.convert_connack_rc_to_reason_code(
+                cast("ConnackCode", reason)
+            )
+        if reason == 0:
+            self.connected = True
+            self._client._connection_accepted(self, properties)  # noqa: SLF001
+            self._schedule_keepalive(self._loop.time() + self.keepalive)
+        self._client._call("on_connect", flags, reason_code, properties)  # noqa: SLF001
+
+    # Writing
+
+    def _write(self, packet: bytes) -> None:
+        if self.transport is None:
+            return
+        if self._eager_writes:
+            # The transport tries to send right away and buffers what doesn't fit
+            self.transport.write(packet)
+            self._last_out = self._loop.time()
+            return
+        # Collect the packets of this iteration, e.g. many publications or the
+        # acknowledgements of a burst of messages, and send them with a single call
+        if not self._outgoing:
+            self._loop.call_soon(self._flush)
+        self._outgoing.append(packet)
+        self._last_out = self._loop.time()
+
+    def _flush(self) -> None:
+        if self.transport is None or not self._outgoing:
+            return
+        outgoing = self._outgoing
+        self.transport.write(outgoing[0] if len(outgoing) == 1 else b"".join(outgoing))
+        outgoing.clear()
+
+    def send(self, packet: bytes) -> None:
+        self._write(packet)
+
+    def publish(self, mid: int, qos: int, packet: bytes) -> mqtt.MQTTMessageInfo:
+        if qos == 0:
+            self._write(packet)
+            return _MessageInfo(mid, published=True)
+        max_queued = self._client._max_queued_messages  # noqa: SLF001
+        if max_queued > 0 and len(self._inflight) + len(self._queued) >= max_queued:
+            return _MessageInfo(mid, mqtt.MQTT_ERR_QUEUE_SIZE)
+        if self.max_inflight == 0 or len(self._inflight) < self.max_inflight:
+            self._inflight.add(mid)
+            self._write(packet)
+        else:
+            self._queued.append((mid, packet))
+        return _MessageInfo(mid)
+
+    def close(self, reason_code: ReasonCode | None = None) -> None:
+        """Close the connection, e.g., after sending DISCONNECT."""
+        if self._disconnect is None and reason_code is not None:
+            self._disconnect = (False, reason_code, None)
+        if self.transport is not None:
+            self._flush()
+            self.transport.close()
+
+    # Flow control
+
+    def pause_reading(self) -> bool:
+        if self._paused or self.transport is None:
+            return False
+        self._paused = True
+        self.transport.pause_reading()
+        return True
+
+    def resume_reading(self) -> bool:
+        if not self._paused or self.transport is None:
+            return False
+        self._paused = False
+        self.transport.resume_reading()
+        # Parse packets that we received before we paused
+        self._loop.call_soon(self._parse_buffer)
+        return True
+
+    def _parse_buffer(self) -> None:
+        if self._buffer and not self._paused:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._feed(data)
+
+    # Keepalive
+
+    def _schedule_keepalive(self, when: float) -> None:
+        if self.keepalive > 0:
+            self._keepalive_timer = self._loop.call_at(when, self._check_keepalive)
+
+    def _check_keepalive(self) -> None:
+        self._keepalive_timer = None
+        if self.transport is None:
+            return
+        now = self._loop.time()
+        deadline = min(self._last_in, self._last_out) + self.keepalive
+        if now < deadline:
+            self._schedule_keepalive(deadline)
+        elif not self._ping_outstanding:
+            self._write(_PINGREQ_PACKET)
+            self._ping_outstanding = True
+            # Give the broker a full keepalive period to respond
+            self._last_in = now
+            self._schedule_keepalive(now + self.keepalive)
+        else:
+            self.close(ReasonCode(PacketTypes.DISCONNECT, "Keep alive timeout"))
+
+
+class NativeClient(mqtt.Client):
+    """paho-mqtt client whose network layer runs on asyncio's transports.
+
+    All configuration methods (e.g., ``tls_set()``, ``will_set()``, or
+    ``username_pw_set()``) and callbacks work as with paho-mqtt's client. Instead of
+    ``connect()`` and the ``loop_*()`` methods, call ``await connect_transport()``
+    from the event loop. WebSockets and proxies are not supported.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if self._transport == "websockets":
+            msg = "The native engine does not support websockets"
+            raise ValueError(msg)
+        self._connection: _Connection | None = None
+        # Whether to write each packet right away instead of once per iteration
+        self.eager_writes = False
+
+    def proxy_set(self, **proxy_args: Any) -> None:
+        msg = "The native engine does not support proxies"
+        raise ValueError(msg)
+
+    async def connect_transport(  # noqa: PLR0913
+        self,
+        host: str,
+        port: int = 1883,
+        keepalive: int = 60,
+        bind_address: str = "",
+        bind_port: int = 0,
+        clean_start: mqtt.CleanStartOption = mqtt.MQTT_CLEAN_START_FIRST_ONLY,
+        properties: Properties | None = None,
+        socket_options: Iterable[SocketOption] = (),
+    ) -> None:
+        """Open a connection to the broker and send the CONNECT packet.
+
+        This resolves the hostname, connects, and does the TLS handshake on the event
+        loop. Arguments are the same as for paho-mqtt's ``connect()``.
+        """
+        if self._protocol == mqtt.MQTTv5:
+            self._mqttv5_first_connect = True
+        else:
+            if clean_start != mqtt.MQTT_CLEAN_START_FIRST_ONLY:
+                msg = "Clean start only applies to MQTT V5"
+                raise ValueError(msg)
+            if properties:
+                msg = "Properties only apply to MQTT V5"
+                raise ValueError(msg)
+        self.connect_async(
+            host, port, keepalive, bind_address, bind_port, clean_start, properties
+        )
+        if self._connection is not None:
+            self._connection.close()
+        loop = asyncio.get_running_loop()
+        connection = _Connection(self, loop)
+        server_hostname = host if self._ssl_context is not None else None
+        if self._transport == "unix":
+            coroutine = loop.create_unix_connection(
+                lambda: connection,
+                host,
+                ssl=self._ssl_context,
+                server_hostname=server_hostname,
+            )
+        else:
+            local_addr = (
+                (bind_address, bind_port) if bind_address or bind_port else None
+            )
+            coroutine = loop.create_connection(
+                lambda: connection,
+                host,
+                port,
+                ssl=self._ssl_context,
+                server_hostname=server_hostname,
+                local_addr=local_addr,
+            )
+        try:
+            await asyncio.wait_for(coroutine, self._connect_timeout)
+        except asyncio.TimeoutError:
+            msg = "Timed out while connecting to the broker"
+            raise TimeoutError(msg) from None
+        sock = connection.transport.get_extra_info("socket")  # type: ignore[union-attr]
+        for socket_option in socket_options:
+            sock.setsockopt(*socket_option)
+        self._connection = connection
+        connection.send(self._encode_connect(keepalive))
+
+    def _encode_connect(self, keepalive: int) -> bytes:
+        v5 = self._protocol == mqtt.MQTTv5
+        flags = 0
+        if v5:
+            if self._clean_start is True or (
+                self._clean_start == mqtt.MQTT_CLEAN_START_FIRST_ONLY
+                and self._mqttv5_first_connect
+            ):
+                flags |= 0x02
+        elif self._clean_session:
+            flags |= 0x02
+        protocol_name = b"MQTT" if self._protocol != mqtt.MQTTv31 else b"MQIsdp"
+        parts = [encode_string(protocol_name)]
+        payload = [encode_string(self._client_id)]
+        if self._will:
+            flags |= (
+                0x04 | (self._will_qos & 0x03) << 3 | (self._will_retain & 0x01) << 5
+            )
+            if v5:
+                payload.append(_pack_properties(self._will_properties))
+            payload.append(encode_string(self._will_topic))
+            payload.append(encode_string(self._will_payload))
+        if self._username is not None:
+            flags |= 0x80
+            payload.append(encode_string(self._username))
+            if self._password is not None:
+                flags |= 0x40
+                payload.append(encode_string(self._password))
+        parts.append(struct.pack("!BBH", self._protocol, flags, keepalive))
+        if v5:
+            parts.append(_pack_properties(self._connect_properties))
+        self._keepalive = keepalive
+        self._log(mqtt.MQTT_LOG_DEBUG, "Sending CONNECT")
+        return encode_packet(CONNECT, *parts, *payload)
+
+    def _next_mid(self) -> int:
+        self._last_mid = self._last_mid % 65535 + 1
+        return self._last_mid
+
+    def publish(  # noqa: PLR0913
+        self,
+        topic: str,
+        payload: PayloadType = None,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+    ) -> mqtt.MQTTMessageInfo:
+        if not topic and self._protocol != mqtt.MQTTv5:
+            msg = "Invalid topic."
+            raise ValueError(msg)
+        topic_bytes = topic.encode()
+        self._raise_for_invalid_topic(topic_bytes)
+        if not 0 <= qos <= 2:  # noqa: PLR2004
+            msg = "Invalid QoS level."
+            raise ValueError(msg)
+        payload_bytes = encode_payload(payload)
+        mid = self._next_mid()
+        connection = self._connection
+        if connection is None or not connection.connected:
+            return _MessageInfo(mid, mqtt.MQTT_ERR_NO_CONN)
+        packed_properties = (
+            _pack_properties(properties) if self._protocol == mqtt.MQTTv5 else None
+        )
+        packet = encode_publish(
+            topic_bytes, payload_bytes, qos, retain, mid, packed_properties
+        )
+        return connection.publish(mid, qos, packet)
+
+    def subscribe(
+        self,
+        topic: str
+        | tuple[str, int]
+        | tuple[str, SubscribeOptions]
+        | list[tuple[str, int]]
+        | list[tuple[str, SubscribeOptions]],
+        qos: int = 0,
+        options: SubscribeOptions | None = None,
+        properties: Properties | None = None,
+    ) -> tuple[MQTTErrorCode, int | None]:
+        filters = self._subscribe_filters(topic, qos, options)
+        if any(
+            self._filter_wildcard_len_check(topic_filter) != mqtt.MQTT_ERR_SUCCESS
+            for topic_filter, _ in filters
+        ):
+            msg = "Invalid subscription filter."
+            raise ValueError(msg)
+        connection = self._connection
+        if connection is None:
+            return mqtt.MQTT_ERR_NO_CONN, None
+        mid = self._next_mid()
+        parts = [_UINT16.pack(mid)]
+        if self._protocol == mqtt.MQTTv5:
+            parts.append(_pack_properties(properties))
+        for topic_filter, subscribe_options in filters:
+            parts.append(encode_string(topic_filter))
+            if isinstance(subscribe_options, SubscribeOptions):
+                parts.append(subscribe_options.pack())  # type: ignore[no-untyped-call]
+            else:
+                parts.append(bytes((subscribe_options,)))
+        connection.send(encode_packet(SUBSCRIBE | 0x02, *parts))
+        return mqtt.MQTT_ERR_SUCCESS, mid
+
+    def _subscribe_filters(  # noqa: C901, PLR0912
+        self,
+        topic: Any,
+        qos: int,
+        options: SubscribeOptions | None,
+    ) -> list[tuple[bytes, SubscribeOptions | int]]:
+        """Normalize the arguments of ``subscribe()`` the same way as paho-mqtt."""
+        v5 = self._protocol == mqtt.MQTTv5
+        if isinstance(topic, tuple):
+            if v5:
+                topic, options = topic
+                if not isinstance(options, SubscribeOptions):
+                    msg = (
+                        "Subscribe options must be instance of SubscribeOptions class."
+                    )
+                    raise ValueError(msg)
+            else:
+                topic, qos = topic
+        if isinstance(topic, str):
+            if not 0 <= qos <= 2:  # noqa: PLR2004
+                msg = "Invalid QoS level."
+                raise ValueError(msg)
+            if not v5:
+                if not topic:
+                    msg = "Invalid topic."
+                    raise ValueError(msg)
+                return [(topic.encode(), qos)]
+            if options is None:
+                options = SubscribeOptions(qos=qos)
+            elif qos != 0:
+                msg = "Subscribe options and qos parameters cannot be combined."
+                raise ValueError(msg)
+            return [(topic.encode(), options)]
+        if isinstance(topic, list) and topic:
+            filters: list[tuple[bytes, SubscribeOptions | int]] = []
+            for topic_filter, topic_options in topic:
+                if not isinstance(topic_options, SubscribeOptions):
+                    if not 0 <= topic_options <= 2:  # noqa: PLR2004
+                        msg = "Invalid QoS level."
+                        raise ValueError(msg)
+                    if v5:
+                        topic_options = SubscribeOptions(qos=topic_options)  # noqa: PLW2901
+                elif not v5:
+                    msg = "Invalid QoS level."
+                    raise ValueError(msg)
+                filters.append((topic_filter.encode(), topic_options))
+            return filters
+        msg = "No topic specified, or incorrect topic type."
+        raise ValueError(msg)
+
+    def unsubscribe(
+        self, topic: str | list[str], properties: Properties | None = None
+    ) -> tuple[MQTTErrorCode, int | None]:
+        topics = [topic] if isinstance(topic, str) else topic
+        if not isinstance(topics, list) or not all(topics):
+            msg = "Invalid topic."
+            raise ValueError(msg)
+        connection = self._connection
+        if connection is None:
+            return mqtt.MQTT_ERR_NO_CONN, None
+        mid = self._next_mid()
+        parts = [_UINT16.pack(mid)]
+        if self._protocol == mqtt.MQTTv5:
+            parts.append(_pack_properties(properties))
+        parts.extend(encode_string(topic_filter.encode()) for topic_filter in topics)
+        connection.send(encode_packet(UNSUBSCRIBE | 0x02, *parts))
+        return mqtt.MQTT_ERR_SUCCESS, mid
+
+    def disconnect(
+        self,
+        reasoncode: ReasonCode | None = None,
+        properties: Properties | None = None,
+    ) -> MQTTErrorCode:
+        connection = self._connection
+        if connection is None:
+            return mqtt.MQTT_ERR_NO_CONN
+        if self._protocol == mqtt.MQTTv5:
+            reason = 0 if reasoncode is None else reasoncode.value
+            connection.send(
+                encode_packet(
+                    DISCONNECT, bytes((reason,)), _pack_properties(properties)
+                )
+            )
+        else:
+            connection.send(bytes((DISCONNECT, 0)))
+        connection.close(ReasonCode(PacketTypes.DISCONNECT, "Success"))
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def socket(self) -> Any:
+        """Return the socket of the transport, if connected."""
+        if self._connection is None or self._connection.transport is None:
+            return None
+        return self._connection.transport.get_extra_info("socket")
+
+    def is_connected(self) -> bool:
+        return self._connection is not None and self._connection.connected
+
+    def pause_reading(self) -> bool:
+        """Stop reading from the connection. Return whether reading was paused."""
+        return self._connection is not None and self._connection.pause_reading()
+
+    def resume_reading(self) -> bool:
+        """Resume reading from the connection. Return whether reading was resumed."""
+        return self._connection is not None and self._connection.resume_reading()
+
+    def _log(self, level: LogLevel, msg: str) -> None:
+        self._easy_log(level, msg)
+
+    def _call(self, name: str, *args: Any) -> None:
+        callback = getattr(self, name)
+        if callback is not None:
+            self._run_callback(name, callback, *args)
+
+    def _deliver(self, message: mqtt.MQTTMessage) -> None:
+        on_message = self._on_message
+        if on_message is not None:
+            self._run_callback("on_message", on_message, message)
+
+    def _run_callback(
+        self, name: str, callback: Callable[..., Any], *args: Any
+    ) -> None:
+        # Callbacks run while we parse the received data. An exception must neither
+        # pass for a malformed packet nor skip the acknowledgement of the message, so
+        # we log it like paho-mqtt does with `suppress_exceptions`.
+        try:
+            callback(self, self._userdata, *args)
+        except Exception as err:
+            self._easy_log(mqtt.MQTT_LOG_ERR, "Caught exception in %s: %s", name, err)
+
+    def _connection_accepted(
+        self, connection: _Connection, properties: Properties | None
+    ) -> None:
+        self._mqttv5_first_connect = False
+        if properties is None:
+            return
+        # Adapt to the limits that the broker announced in its CONNACK
+        receive_maximum = getattr(properties, "ReceiveMaximum", 0)
+        if receive_maximum and (
+            connection.max_inflight == 0 or receive_maximum < connection.max_inflight
+        ):
+            connection.max_inflight = receive_maximum
+        if hasattr(properties, "ServerKeepAlive"):
+            connection.keepalive = properties.ServerKeepAlive
+        if hasattr(properties, "AssignedClientIdentifier"):
+            self._client_id = properties.AssignedClientIdentifier.encode()
+
+    def _connection_lost(
+        self,
+        connection: _Connection,
+        from_server: bool,
+        reason_code: ReasonCode,
+        properties: Properties | None,
+    ) -> None:
+        # Ignore connections that we already replaced
+        if self._connection is not connection:
+            return
+        self._connection = None
+        self._call(
+            "on_disconnect",
+            mqtt.DisconnectFlags(is_disconnect_packet_from_server=from_server),
+            reason_code,
+            properties or _empty_properties(PacketTypes.DISCONNECT),
+        )
@@ -0,0 +1,202 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import inspect
+import logging
+import sys
+from types import TracebackType
+from typing import Any, AsyncIterable, Callable, Hashable
+
+from .message import Message
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+
+def _topic_key(message: Message) -> Hashable:
+    return message.topic.value
+
+
+class ExecutorDispatcher:
+    """Run message handlers on a thread or process pool without blocking the loop.
+
+    Handlers that do CPU-heavy work, such as decompressing or parsing payloads,
+    block the event loop that also services the connection to the broker. The
+    dispatcher passes each message to a handler on a ``concurrent.futures`` executor
+    instead.
+
+    Messages with the same key are handled one after the other, in the order in
+    which they were submitted. Messages with different keys are handled
+    concurrently. At most ``max_pending`` messages are submitted to the executor or
+    wait for a message with the same key at a time. Beyond that, ``submit()`` waits
+    until there is room, which holds back the message iterator that feeds it.
+
+    Args:
+        executor: The executor to run the handler on. For a
+            ``concurrent.futures.ProcessPoolExecutor``, the handler must be picklable,
+            e.g. a function defined at the top level of a module.
+        handler: The function to call with each message. Must not be a coroutine
+            function.
+        key: The function that returns the ordering key of a message. Defaults to
+            the message's topic.
+        max_pending: The maximum number of messages that are submitted but not yet
+            handled.
+        logger: Custom logger instance.
+
+    Attributes:
+        handled (int):
+            The number of messages that the handler finished, including messages that
+            it raised an exception for.
+        failed (int):
+            The number of messages that the handler raised an exception for, or that
+            never reached it because the key function or the executor raised an
+            exception. The exceptions are logged.
+
+    Example:
+        .. code-block:: python
+
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                async with aiomqtt.ExecutorDispatcher(executor, handle) as dispatcher:
+                    await dispatcher.run(client.messages)
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        executor: concurrent.futures.Executor,
+        handler: Callable[[Message], Any],
+        *,
+        key: Callable[[Message], Hashable] = _topic_key,
+        max_pending: int = 100,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if inspect.iscoroutinefunction(handler):
+            msg = "The handler must not be a coroutine function"
+            raise TypeError(msg)
+        if max_pending < 1:
+            msg = "max_pending must be at least 1"
+            raise ValueError(msg)
+        if logger is None:
+            logger = logging.getLogger("mqtt")
+        self._executor = executor
+        self._handler = handler
+        self._key = key
+        self._logger = logger
+        self._slots = asyncio.Semaphore(max_pending)
+        # Messages that wait for the message with the same key, by key. A key is
+        # present as long as one of its messages is submitted to the executor.
+        self._waiting: dict[Hashable, collections.deque[Message]] = {}
+        self._idle: asyncio.Event = asyncio.Event()
+        self._idle.set()
+        self._pending = 0
+        self.handled = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        """The number of messages that are submitted but not yet handled."""
+        return self._pending
+
+    async def submit(self, message: Message) -> None:
+        """Schedule a message to be handled; Wait first if too many are pending.
+
+        Args:
+            message: The message to handle.
+        """
+        await self._slots.acquire()
+        self._pending += 1
+        self._idle.clear()
+        try:
+            key = self._key(message)
+            waiting = self._waiting.get(key)
+        except Exception:
+            self.failed += 1
+            self._logger.exception("Could not compute the key of a message")
+            self._finish()
+            return
+        if waiting is None:
+            self._waiting[key] = collections.deque()
+            self._start(key, message)
+        else:
+            waiting.append(message)
+
+    async def run(self, messages: AsyncIterable[Message]) -> None:
+        """Submit all messages from an iterator such as ``Client.messages``.
+
+        This runs until the iterator is exhausted or raises, e.g. on disconnection.
+
+        Args:
+            messages: The messages to handle.
+        """
+        async for message in messages:
+            await self.submit(message)
+
+    async def join(self) -> None:
+        """Wait until all submitted messages are handled."""
+        await self._idle.wait()
+
+    def _start(self, key: Hashable, message: Message) -> None:
+        """Submit a message to the executor, or the next one if that fails."""
+        loop = asyncio.get_running_loop()
+        next_message: Message | None = message
+        while next_message is not None:
+            try:
+                future = loop.run_in_executor(
+                    self._executor, self._handler, next_message
+                )
+            except Exception:
+                # E.g. the executor was shut down
+                self.failed += 1
+                self._logger.exception("Could not submit message with key %r", key)
+                self._finish()
+                next_message = self._next(key)
+            else:
+                future.add_done_callback(functools.partial(self._done, key))
+                return
+
+    def _done(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        self.handled += 1
+        if not future.cancelled() and future.exception() is not None:
+            self.failed += 1
+            self._logger.error(
+                "Could not handle message with key %r",
+                key,
+                exc_info=future.exception(),
+            )
+        self._finish()
+        # Start the next message with the same key, if there is one
+        message = self._next(key)
+        if message is not None:
+            self._start(key, message)
+
+    def _next(self, key: Hashable) -> Message | None:
+        """Return the next waiting message with the key, or forget the key."""
+        waiting = self._waiting[key]
+        if waiting:
+            return waiting.popleft()
+        del self._waiting[key]
+        return None
+
+    def _finish(self) -> None:
+        """Release the slot of a message that was handled or failed."""
+        self._pending -= 1
+        if not self._pending:
+            self._idle.set()
+        self._slots.release()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Wait until all submitted messages are handled."""
+        await self.join()
@@ -0,0 +1,283 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import os
+import sqlite3
+import sys
+from types import TracebackType
+from typing import Iterator, cast
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from .client import OverflowPolicy
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    qos INTEGER NOT NULL,
+    retain INTEGER NOT NULL,
+    properties BLOB,
+    size INTEGER NOT NULL
+)
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class _Entry:
+    """Message that is stored in the outbox."""
+
+    id: int
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+    properties: Properties | None
+
+
+class Outbox:
+    """Durable queue of outgoing messages, stored in an SQLite database.
+
+    Pass the outbox to a ``Client`` to make ``Client.publish()`` store each message
+    before sending it. Messages are deleted once they are published: QoS 0 messages
+    when they are written to the socket, QoS 1 messages on PUBACK, and QoS 2 messages
+    on PUBCOMP. While the client is disconnected, ``publish()`` only stores the
+    message. When the client connects again, or when a new client is created with
+    the same outbox, e.g. after the process restarted, the stored messages are
+    published first, in the order in which they were stored.
+
+    Messages whose acknowledgement was lost are published again, so delivery is at
+    least once, also for QoS 2. The outbox must only be used by one client at a time.
+
+    Args:
+        path: The path of the database file. It's created if it doesn't exist.
+        max_messages: The maximum number of stored messages. Unlimited by default.
+        max_bytes: The maximum total size in bytes of the stored topics, payloads, and
+            properties. Unlimited by default.
+        overflow_policy: What to do with a new message when the outbox is full. With
+            ``OverflowPolicy.CONFLATE``, the message replaces a stored message of the
+            same topic that wasn't sent yet.
+        logger: Custom logger instance.
+
+    Attributes:
+        dropped (int):
+            The number of messages that were discarded because the outbox was full.
+
+    Example:
+        .. code-block:: python
+
+            with aiomqtt.Outbox("outbox.db", max_bytes=10_000_000) as outbox:
+                async with aiomqtt.Client("test.mosquitto.org", outbox=outbox) as client:
+                    await client.publish("temperature/outside", payload=28.4)
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_messages: int | None = None,
+        max_bytes: int | None = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if max_messages is not None and max_messages < 1:
+            msg = "max_messages must be at least 1"
+            raise ValueError(msg)
+        if max_bytes is not None and max_bytes < 1:
+            msg = "max_bytes must be at least 1"
+            raise ValueError(msg)
+        if logger is None:
+            logger = logging.getLogger("mqtt")
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        self._overflow_policy = overflow_policy
+        self._logger = logger
+        self._db = sqlite3.connect(path)
+        # Return freed pages to the file system, so that the file shrinks again when
+        # the outbox is drained. This only works when set before the table exists.
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # The write-ahead log survives crashes of the process without syncing to disk
+        # on every commit
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        with self._db:
+            self._db.execute(_SCHEMA)
+        count, size = self._db.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM messages"
+        ).fetchone()
+        self._count: int = count
+        self._size: int = size
+        # Deletions of published messages are committed once per event loop
+        # iteration instead of one by one
+        self._commit_handle: asyncio.Handle | None = None
+        # Whether we warned that the outbox is full since it last had room
+        self._full = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored messages."""
+        return self._count
+
+    @property
+    def size(self) -> int:
+        """The total size in bytes of the stored topics, payloads, and properties."""
+        return self._size
+
+    def close(self) -> None:
+        """Commit pending deletions and close the database."""
+        self._commit()
+        self._db.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _append(  # noqa: PLR0913
+        self,
+        topic: str,
+        payload: bytes,
+        qos: int,
+        retain: bool,
+        properties: Properties | None,
+        *,
+        sent_up_to: int,
+    ) -> int | None:
+        """Store a message, making room according to the overflow policy.
+
+        Args:
+            topic: The topic of the message.
+            payload: The encoded payload.
+            qos: The QoS level of the message.
+            retain: Whether the broker should retain the message.
+            properties: (MQTT v5.0 only) The properties of the message.
+            sent_up_to: The ID of the last message that was handed to the network
+                engine. ``CONFLATE`` only replaces later messages.
+
+        Returns:
+            The ID of the stored message, or ``None`` if it was discarded.
+        """
+        packed = None
+        if properties is not None:
+            packed = properties.pack()  # type: ignore[no-untyped-call]
+        size = len(topic.encode()) + len(payload) + len(packed or b"")
+        if self._max_bytes is not None and size > self._max_bytes:
+            self.dropped += 1
+            return None
+        with self._db:
+            if not self._exceeds(self._count + 1, self._size + size):
+                self._full = False
+            else:
+                if not self._full:
+                    self._full = True
+                    self._logger.warning("The outbox is full, discarding messages")
+                if self._overflow_policy is OverflowPolicy.CONFLATE:
+                    row = self._db.execute(
+                        "SELECT id, size FROM messages WHERE topic = ? AND id > ? "
+                        "ORDER BY id DESC LIMIT 1",
+                        (topic, sent_up_to),
+                    ).fetchone()
+                    if row is not None:
+                        row_id, replaced_size = row
+                        self._make_room(0, size - replaced_size, keep=row_id)
+                        self._db.execute(
+                            "UPDATE messages SET payload = ?, qos = ?, retain = ?, "
+                            "properties = ?, size = ? WHERE id = ?",
+                            (payload, qos, retain, packed, size, row_id),
+                        )
+                        self._size += size - replaced_size
+                        self.dropped += 1
+                        return cast("int", row_id)
+                if self._overflow_policy is OverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return None
+                self._make_room(1, size)
+            cursor = self._db.execute(
+                "INSERT INTO messages (topic, payload, qos, retain, properties, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (topic, payload, qos, retain, packed, size),
+            )
+        self._count += 1
+        self._size += size
+        return cast("int", cursor.lastrowid)
+
+    def _exceeds(self, count: int, size: int) -> bool:
+        return (self._max_messages is not None and count > self._max_messages) or (
+            self._max_bytes is not None and size > self._max_bytes
+        )
+
+    def _make_room(self, count: int, size: int, keep: int = 0) -> None:
+        """Discard the oldest messages until ``count`` more messages fit.
+
+        Args:
+            count: The number of messages to make room for.
+            size: The number of bytes to make room for.
+            keep: The ID of a message that must not be discarded.
+        """
+        discarded = []
+        rows = self._db.execute(
+            "SELECT id, size FROM messages WHERE id != ? ORDER BY id", (keep,)
+        )
+        for row_id, row_size in rows:
+            if not self._exceeds(self._count + count, self._size + size):
+                break
+            discarded.append((row_id,))
+            self._count -= 1
+            self._size -= row_size
+            self.dropped += 1
+        self._db.executemany("DELETE FROM messages WHERE id = ?", discarded)
+
+    def _entries(self) -> Iterator[_Entry]:
+        """Return the stored messages, oldest first."""
+        rows = self._db.execute(
+            "SELECT id, topic, payload, qos, retain, properties FROM messages "
+            "ORDER BY id"
+        ).fetchall()
+        for row_id, topic, payload, qos, retain, packed in rows:
+            properties = None
+            if packed is not None:
+                properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+                properties.unpack(packed)  # type: ignore[no-untyped-call]
+            yield _Entry(row_id, topic, payload, qos, bool(retain), properties)
+
+    def _remove(self, row_id: int) -> None:
+        """Delete a published message."""
+        row = self._db.execute(
+            "SELECT size FROM messages WHERE id = ?", (row_id,)
+        ).fetchone()
+        if row is None:
+            # The message was discarded to make room in the meantime
+            return
+        self._db.execute("DELETE FROM messages WHERE id = ?", (row_id,))
+        self._count -= 1
+        self._size -= row[0]
+        if self._commit_handle is None:
+            loop = asyncio.get_running_loop()
+            self._commit_handle = loop.call_soon(self._commit)
+
+    def _commit(self) -> None:
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+            self._commit_handle = None
+        self._db.commit()
+        if self._count == 0:
+            # Shrink the file once the outbox is drained. The pragma frees one page
+            # per step, so we step through all of them.
+            self._db.execute("PRAGMA incremental_vacuum").fetchall()
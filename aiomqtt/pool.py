@@ -0,0 +1,352 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+import logging
+import sys
+import zlib
+from types import TracebackType
+from typing import Any, AsyncIterator, Iterable
+
+from paho.mqtt.properties import Properties
+from paho.mqtt.reasoncodes import ReasonCode
+from paho.mqtt.subscribeoptions import SubscribeOptions
+
+from .client import (
+    Client,
+    _add_disconnect_callback,
+    _subscribed_wildcards,
+    _wait_for_any_message,
+)
+from .exceptions import MqttBulkPublishError, MqttError
+from .message import Message
+from .types import PayloadType, SubscribeTopic
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+
+@dataclasses.dataclass(frozen=True)
+class _Subscription:
+    """Subscription of one wildcard, kept to move it to another member."""
+
+    member: int
+    qos: int | SubscribeOptions
+    properties: Properties | None
+
+
+class ClientPool:
+    """Pool of clients that spreads the traffic over multiple broker connections.
+
+    A single connection is limited by one TCP stream and by the broker's window of
+    in-flight messages per connection. The pool opens ``size`` connections and offers
+    the same ``publish()``, ``subscribe()`` and ``unsubscribe()`` API as ``Client``.
+
+    Each topic is routed to a member by a stable hash, so that messages to the same
+    topic keep their order. Each wildcard is subscribed to on one member, so that
+    every message is received once. When a member disconnects, its topics are routed
+    to the next connected member and its subscriptions are moved there.
+
+    Args:
+        hostname: The hostname or IP address of the remote broker.
+        port: The network port of the remote broker.
+        size: The number of clients.
+        identifier: The base of the client identifiers. Client ``i`` of the pool uses
+            ``f"{identifier}-{i}"``. Generated automatically if ``None``.
+        logger: Custom logger instance.
+        **kwargs: Further arguments to pass to each ``Client``.
+
+    Example:
+        .. code-block:: python
+
+            async with aiomqtt.ClientPool("test.mosquitto.org", size=4) as pool:
+                await pool.subscribe("temperature/#")
+                await pool.publish("temperature/outside", payload=28.4)
+                async for message in pool.messages:
+                    print(message.payload)
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        hostname: str,
+        port: int = 1883,
+        *,
+        size: int = 4,
+        identifier: str | None = None,
+        logger: logging.Logger | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if size < 1:
+            msg = "size must be at least 1"
+            raise ValueError(msg)
+        if logger is None:
+            logger = logging.getLogger("mqtt")
+        self._logger = logger
+        self._members = tuple(
+            Client(
+                hostname,
+                port,
+                identifier=None if identifier is None else f"{identifier}-{index}",
+                logger=logger,
+                **kwargs,
+            )
+            for index in range(size)
+        )
+        self._subscriptions: dict[str, _Subscription] = {}
+        self._lost: set[int] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._closing = False
+        self._next_member = 0
+
+    @property
+    def members(self) -> tuple[Client, ...]:
+        """The clients of the pool."""
+        return self._members
+
+    @property
+    def messages(self) -> AsyncIterator[Message]:
+        """Dynamic view of the message queues of all clients of the pool."""
+        return self._iterate_messages()
+
+    def route(self, topic: str) -> Client:
+        """Return the connected client that handles the given topic.
+
+        Raises:
+            MqttError: If all clients of the pool are disconnected.
+        """
+        return self._members[self._route(topic)]
+
+    def _route(self, topic: str) -> int:
+        size = len(self._members)
+        # Unlike hash(), crc32 is the same across processes and runs
+        start = zlib.crc32(topic.encode()) % size
+        for offset in range(size):
+            index = (start + offset) % size
+            if self._members[index].is_connected:
+                return index
+        msg = "All clients of the pool are disconnected"
+        raise MqttError(msg)
+
+    async def publish(  # noqa: PLR0913
+        self,
+        /,
+        topic: str,
+        payload: PayloadType | Any = None,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Publish a message through the client that handles its topic.
+
+        Arguments are the same as for ``Client.publish()``.
+        """
+        await self.route(topic).publish(
+            topic, payload, qos, retain, properties, *args, timeout=timeout, **kwargs
+        )
+
+    async def publish_many(  # noqa: PLR0913
+        self,
+        /,
+        messages: Iterable[tuple[str, PayloadType | Any]],
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+        *,
+        timeout: float | None = None,
+    ) -> None:
+        """Publish many messages at once across all clients of the pool.
+
+        Arguments and exceptions are the same as for ``Client.publish_many()``.
+        """
+        # Positions of the messages of each member in the input
+        positions: dict[int, list[int]] = {}
+        shards: dict[int, list[tuple[str, PayloadType | Any]]] = {}
+        for position, message in enumerate(messages):
+            index = self._route(message[0])
+            positions.setdefault(index, []).append(position)
+            shards.setdefault(index, []).append(message)
+        results = await asyncio.gather(
+            *(
+                self._members[index].publish_many(
+                    shard, qos, retain, properties, timeout=timeout
+                )
+                for index, shard in shards.items()
+            ),
+            return_exceptions=True,
+        )
+        failed: dict[int, MqttError] = {}
+        for index, result in zip(shards, results):
+            if isinstance(result, MqttBulkPublishError):
+                for position, error in result.failed.items():
+                    failed[positions[index][position]] = error
+            elif isinstance(result, BaseException):
+                raise result
+        if failed:
+            raise MqttBulkPublishError(dict(sorted(failed.items())))
+
+    async def subscribe(  # noqa: PLR0913
+        self,
+        /,
+        topic: SubscribeTopic,
+        qos: int = 0,
+        options: SubscribeOptions | None = None,
+        properties: Properties | None = None,
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> tuple[int, ...] | list[ReasonCode]:
+        """Subscribe through one client of the pool.
+
+        Arguments are the same as for ``Client.subscribe()``. When subscribing to
+        multiple wildcards at once, the first one determines the client.
+        """
+        wildcards = _subscribed_wildcards(topic, qos, options)
+        index = self._route(wildcards[0][0])
+        result = await self._members[index].subscribe(
+            topic, qos, options, properties, *args, timeout=timeout, **kwargs
+        )
+        for wildcard, wildcard_qos in wildcards:
+            self._subscriptions[wildcard] = _Subscription(
+                index, wildcard_qos, properties
+            )
+        return result
+
+    async def unsubscribe(
+        self,
+        /,
+        topic: str | list[str],
+        properties: Properties | None = None,
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Unsubscribe from wildcards on the clients that subscribed to them.
+
+        Arguments are the same as for ``Client.unsubscribe()``.
+        """
+        wildcards = [topic] if isinstance(topic, str) else topic
+        groups: dict[int, list[str]] = {}
+        for wildcard in wildcards:
+            subscription = self._subscriptions.get(wildcard)
+            index = (
+                self._route(wildcard) if subscription is None else subscription.member
+            )
+            groups.setdefault(index, []).append(wildcard)
+        await asyncio.gather(
+            *(
+                self._members[index].unsubscribe(
+                    group, properties, *args, timeout=timeout, **kwargs
+                )
+                for index, group in groups.items()
+            )
+        )
+        for wildcard in wildcards:
+            self._subscriptions.pop(wildcard, None)
+
+    def _on_member_disconnected(self, index: int) -> None:
+        if self._closing or index in self._lost:
+            return
+        self._lost.add(index)
+        self._logger.warning(
+            "Client %d of the pool disconnected; Routing its traffic to the others",
+            index,
+        )
+        task = asyncio.get_running_loop().create_task(self._move_subscriptions(index))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _move_subscriptions(self, index: int) -> None:
+        """Subscribe to the wildcards of a disconnected member on the others."""
+        moved = [
+            (wildcard, subscription)
+            for wildcard, subscription in self._subscriptions.items()
+            if subscription.member == index
+        ]
+        for wildcard, subscription in moved:
+            try:
+                target = self._route(wildcard)
+                if isinstance(subscription.qos, SubscribeOptions):
+                    await self._members[target].subscribe(
+                        wildcard,
+                        options=subscription.qos,
+                        properties=subscription.properties,
+                    )
+                else:
+                    await self._members[target].subscribe(
+                        wildcard, subscription.qos, properties=subscription.properties
+                    )
+            except MqttError as exc:
+                self._logger.warning(
+                    'Could not move subscription "%s": %s', wildcard, exc
+                )
+                continue
+            self._subscriptions[wildcard] = dataclasses.replace(
+                subscription, member=target
+            )
+
+    async def _iterate_messages(self) -> AsyncIterator[Message]:
+        size = len(self._members)
+        while True:
+            # Take turns between members that have queued messages
+            for offset in range(size):
+                index = (self._next_member + offset) % size
+                iterator = self._members[index].messages
+                if len(iterator):
+                    self._next_member = (index + 1) % size
+                    yield await iterator.__anext__()
+                    break
+            else:
+                await _wait_for_any_message(member.messages for member in self._members)
+
+    async def __aenter__(self) -> Self:
+        """Connect all clients of the pool to the broker."""
+        self._closing = False
+        self._lost.clear()
+        self._subscriptions.clear()
+        results = await asyncio.gather(
+            *(member.__aenter__() for member in self._members), return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # Disconnect the clients that did connect
+            self._closing = True
+            await asyncio.gather(
+                *(
+                    member.__aexit__(None, None, None)
+                    for member, result in zip(self._members, results)
+                    if not isinstance(result, BaseException)
+                ),
+                return_exceptions=True,
+            )
+            raise errors[0]
+        for index, member in enumerate(self._members):
+            _add_disconnect_callback(
+                member, functools.partial(self._on_member_disconnected, index)
+            )
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Disconnect all clients of the pool from the broker."""
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        results = await asyncio.gather(
+            *(member.__aexit__(exc_type, exc, tb) for member in self._members),
+            return_exceptions=True,
+        )
+        for index, result in enumerate(results):
+            # Errors of clients that disconnected unexpectedly were handled already
+            if isinstance(result, BaseException) and index not in self._lost:
+                raise result
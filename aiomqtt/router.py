@@ -0,0 +1,297 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import inspect
+import sys
+from typing import (
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterator,
+    Sequence,
+    TypeVar,
+)
+
+from .message import Message
+from .topic import Topic, TopicLike, Wildcard, WildcardLike, _compile_wildcard
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+
+H = TypeVar("H")
+
+MessageHandler: TypeAlias = "Callable[[Message], Awaitable[None] | None]"
+
+
+class _Node(Generic[H]):
+    """Level of the topic trie."""
+
+    __slots__ = ("children", "plus", "hash", "entries")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node[H]] = {}
+        self.plus: _Node[H] | None = None
+        self.hash: list[tuple[int, H]] = []
+        self.entries: list[tuple[int, H]] = []
+
+    def is_empty(self) -> bool:
+        return not (self.children or self.plus or self.hash or self.entries)
+
+
+def _wildcard_levels(wildcard: WildcardLike) -> tuple[str, ...]:
+    """Split a wildcard into the levels that are matched against topics."""
+    if not isinstance(wildcard, Wildcard):
+        wildcard = _compile_wildcard(wildcard)
+    return wildcard._levels  # noqa: SLF001
+
+
+class TopicTrie(Generic[H]):
+    """Index of wildcards that finds all wildcards matching a topic.
+
+    Wildcards are stored level by level, so that looking up a topic takes time
+    proportional to the topic's depth instead of to the number of wildcards. Matching
+    follows the same rules as ``Topic.matches()``.
+    """
+
+    def __init__(self) -> None:
+        self._root: _Node[H] = _Node()
+        self._counter = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of (wildcard, value) pairs in the trie."""
+        return self._size
+
+    def insert(self, wildcard: WildcardLike, value: H) -> None:
+        """Add a value under the given wildcard.
+
+        Args:
+            wildcard: The wildcard to index the value under.
+            value: The value to return for matching topics.
+        """
+        node = self._root
+        entry = (self._counter, value)
+        self._counter += 1
+        for level in _wildcard_levels(wildcard):
+            if level == "#":
+                node.hash.append(entry)
+                break
+            if level == "+":
+                if node.plus is None:
+                    node.plus = _Node()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _Node())
+        else:
+            node.entries.append(entry)
+        self._size += 1
+
+    def remove(self, wildcard: WildcardLike, value: H) -> None:
+        """Remove a value that was previously added under the given wildcard.
+
+        Args:
+            wildcard: The wildcard the value was added under.
+            value: The value to remove.
+
+        Raises:
+            KeyError: If the value is not indexed under the wildcard.
+        """
+        levels = _wildcard_levels(wildcard)
+        path: list[tuple[_Node[H], str]] = []
+        node = self._root
+        for level in levels:
+            if level == "#":
+                entries = node.hash
+                break
+            path.append((node, level))
+            child = node.plus if level == "+" else node.children.get(level)
+            if child is None:
+                raise KeyError(str(wildcard))
+            node = child
+        else:
+            entries = node.entries
+        for index, (_, candidate) in enumerate(entries):
+            if candidate == value:
+                del entries[index]
+                break
+        else:
+            raise KeyError(str(wildcard))
+        self._size -= 1
+        # Prune levels that no longer lead to any value
+        for parent, level in reversed(path):
+            if not node.is_empty():
+                break
+            if level == "+":
+                parent.plus = None
+            else:
+                del parent.children[level]
+            node = parent
+
+    def match(self, topic: TopicLike) -> list[H]:
+        """Return all values whose wildcard matches the given topic.
+
+        Values are returned in the order in which they were inserted.
+
+        Args:
+            topic: The topic to match.
+
+        Returns:
+            The list of matching values.
+        """
+        if not isinstance(topic, Topic):
+            topic = Topic(topic)
+        return self.match_levels(topic._topic_levels)  # noqa: SLF001
+
+    def match_levels(self, levels: Sequence[str]) -> list[H]:
+        """Like ``match()``, but for a topic that's already split into its levels.
+
+        The levels are not validated, e.g. to match the topics of incoming messages
+        without converting them to ``Topic`` first.
+
+        Args:
+            levels: The levels of the topic to match.
+
+        Returns:
+            The list of matching values.
+        """
+        matches: list[tuple[int, H]] = []
+        nodes = [self._root]
+        for level in levels:
+            next_nodes = []
+            for node in nodes:
+                # "#" also matches the parent level, e.g. "a/#" matches "a"
+                matches.extend(node.hash)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                if node.plus is not None:
+                    next_nodes.append(node.plus)
+            if not next_nodes:
+                break
+            nodes = next_nodes
+        else:
+            for node in nodes:
+                matches.extend(node.hash)
+                matches.extend(node.entries)
+        if len(matches) > 1:
+            matches.sort(key=lambda entry: entry[0])
+        return [value for _, value in matches]
+
+    def __iter__(self) -> Iterator[H]:
+        """Iterate over all values in the trie."""
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for _, value in node.hash:
+                yield value
+            for _, value in node.entries:
+                yield value
+            stack.extend(node.children.values())
+            if node.plus is not None:
+                stack.append(node.plus)
+
+
+class Router:
+    """Dispatch incoming messages to the handlers of matching wildcards.
+
+    Handlers can be synchronous functions or coroutine functions that take the message
+    as their only argument. A message is passed to every handler whose wildcard
+    matches its topic, in the order in which the handlers were added.
+
+    Example:
+        .. code-block:: python
+
+            router = aiomqtt.Router()
+
+            @router.route("temperature/+")
+            async def handle_temperature(message):
+                print(message.payload)
+
+            async with aiomqtt.Client("test.mosquitto.org") as client:
+                await client.subscribe("temperature/#")
+                await router.run(client.messages)
+    """
+
+    def __init__(self) -> None:
+        self._trie: TopicTrie[MessageHandler] = TopicTrie()
+
+    def __len__(self) -> int:
+        """Return the number of registered handlers."""
+        return len(self._trie)
+
+    def add(self, wildcard: WildcardLike, handler: MessageHandler) -> None:
+        """Register a handler for messages that match the given wildcard.
+
+        Args:
+            wildcard: The wildcard to match incoming messages against.
+            handler: The function to call with matching messages.
+        """
+        self._trie.insert(wildcard, handler)
+
+    def remove(self, wildcard: WildcardLike, handler: MessageHandler) -> None:
+        """Unregister a handler that was previously added for the given wildcard.
+
+        Args:
+            wildcard: The wildcard the handler was added for.
+            handler: The handler to remove.
+
+        Raises:
+            KeyError: If the handler is not registered for the wildcard.
+        """
+        self._trie.remove(wildcard, handler)
+
+    def route(
+        self, wildcard: WildcardLike
+    ) -> Callable[[MessageHandler], MessageHandler]:
+        """Decorator that registers the decorated function as a handler.
+
+        Args:
+            wildcard: The wildcard to match incoming messages against.
+        """
+
+        def decorator(handler: MessageHandler) -> MessageHandler:
+            self.add(wildcard, handler)
+            return handler
+
+        return decorator
+
+    def match(self, topic: TopicLike) -> list[MessageHandler]:
+        """Return the handlers that match the given topic.
+
+        Args:
+            topic: The topic to match.
+        """
+        return self._trie.match(topic)
+
+    async def dispatch(self, message: Message) -> int:
+        """Pass a message to all matching handlers.
+
+        Coroutine handlers are awaited one after the other.
+
+        Args:
+            message: The message to dispatch.
+
+        Returns:
+            The number of handlers the message was passed to.
+        """
+        handlers = self._trie.match(message.topic)
+        for handler in handlers:
+            result = handler(message)
+            if inspect.isawaitable(result):
+                await result
+        return len(handlers)
+
+    async def run(self, messages: AsyncIterable[Message]) -> None:
+        """Dispatch all messages from an iterator such as ``Client.messages``.
+
+        This runs until the iterator is exhausted or raises, e.g. on disconnection.
+
+        Args:
+            messages: The messages to dispatch.
+        """
+        async for message in messages:
+            await self.dispatch(message)
@@ -1,7 +1,9 @@
 # SPDX-License-Identifier: BSD-3-Clause
 from __future__ import annotations
 
+import collections
 import dataclasses
+import functools
 import sys
 
 if sys.version_info >= (3, 10):
@@ -11,6 +13,8 @@ else:
 
 
 MAX_TOPIC_LENGTH = 65535
+# Maximum number of wildcard strings that `Topic.matches` keeps compiled
+WILDCARD_CACHE_SIZE = 1024
 
 
 @dataclasses.dataclass(frozen=True)
@@ -51,6 +55,37 @@ class Wildcard:
             msg = f"Invalid wildcard: {self.value}"
             raise ValueError(msg)
 
+    @functools.cached_property
+    def _levels(self) -> tuple[str, ...]:
+        """The levels that are compared against the levels of a topic."""
+        levels = self.value.split("/")
+        if levels[0] == "$share":
+            # Shared subscriptions use the topic structure: $share/<group_id>/<topic>
+            levels = levels[2:]
+        return tuple(levels)
+
+
+@functools.lru_cache(maxsize=WILDCARD_CACHE_SIZE)
+def _compile_wildcard(value: str) -> Wildcard:
+    """Validate a wildcard string once and reuse the result for repeated matches."""
+    return Wildcard(value)
+
+
+def _match_levels(
+    topic_levels: tuple[str, ...], wildcard_levels: tuple[str, ...]
+) -> bool:
+    """Check level by level if a topic matches a wildcard."""
+    topic_depth = len(topic_levels)
+    for index, wildcard_level in enumerate(wildcard_levels):
+        if wildcard_level == "#":
+            # "#" also matches the parent level, e.g. "a/#" matches "a"
+            return True
+        if index >= topic_depth:
+            return False
+        if wildcard_level not in ("+", topic_levels[index]):
+            return False
+    return len(wildcard_levels) == topic_depth
+
 
 WildcardLike: TypeAlias = "str | Wildcard"
 
@@ -80,6 +115,11 @@ class Topic(Wildcard):
             msg = f"Invalid topic: {self.value}"
             raise ValueError(msg)
 
+    @functools.cached_property
+    def _topic_levels(self) -> tuple[str, ...]:
+        """The levels of the topic."""
+        return tuple(self.value.split("/"))
+
     def matches(self, wildcard: WildcardLike) -> bool:
         """Check if the topic matches a given wildcard.
 
@@ -90,29 +130,66 @@ class Topic(Wildcard):
             True if the topic matches the wildcard, False otherwise.
         """
         if not isinstance(wildcard, Wildcard):
-            wildcard = Wildcard(wildcard)
-        # Split topics into levels to compare them one by one
-        topic_levels = self.value.split("/")
-        wildcard_levels = str(wildcard).split("/")
-        if wildcard_levels[0] == "$share":
-            # Shared subscriptions use the topic structure: $share/<group_id>/<topic>
-            wildcard_levels = wildcard_levels[2:]
-
-        def recurse(tl: list[str], wl: list[str]) -> bool:
-            """Recursively match topic levels with wildcard levels."""
-            if not tl:
-                if not wl or wl[0] == "#":
-                    return True
-                return False
-            if not wl:
-                return False
-            if wl[0] == "#":
-                return True
-            if tl[0] == wl[0] or wl[0] == "+":
-                return recurse(tl[1:], wl[1:])
-            return False
-
-        return recurse(topic_levels, wildcard_levels)
+            wildcard = _compile_wildcard(wildcard)
+        return _match_levels(self._topic_levels, wildcard._levels)  # noqa: SLF001
 
 
 TopicLike: TypeAlias = "str | Topic"
+
+
+class TopicCache:
+    """Bounded cache that reuses validated ``Topic`` instances for topic strings.
+
+    Incoming messages usually repeat a limited set of topics. A client with a topic
+    cache looks up the topic of each incoming message here instead of creating and
+    validating a new ``Topic`` every time. When the cache is full, the least recently
+    used topic is evicted.
+
+    Args:
+        maxsize: The maximum number of topics to keep.
+
+    Attributes:
+        maxsize (int): The maximum number of topics to keep.
+        hits (int): The number of lookups that returned a cached topic.
+        misses (int): The number of lookups that created a new topic.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        if maxsize < 1:
+            msg = "maxsize must be at least 1"
+            raise ValueError(msg)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._topics: collections.OrderedDict[str, Topic] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached topics."""
+        return len(self._topics)
+
+    def get(self, value: str) -> Topic:
+        """Return the cached topic for the given string or create and cache it.
+
+        Args:
+            value: The topic string.
+        """
+        try:
+            topic = self._topics[value]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self._topics.move_to_end(value)
+            return topic
+        topic = Topic(value)
+        self.misses += 1
+        self._topics[value] = topic
+        if len(self._topics) > self.maxsize:
+            self._topics.popitem(last=False)
+        return topic
+
+    def clear(self) -> None:
+        """Remove all cached topics and reset the counters."""
+        self._topics.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,386 @@
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import inspect
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import Connection
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+from .client import Client
+from .exceptions import MqttError
+from .message import Message
+from .router import MessageHandler
+
+if TYPE_CHECKING:
+    from multiprocessing.context import SpawnProcess
+    from multiprocessing.synchronize import Event
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+# Interval in seconds at which worker processes check whether the group stops
+STOP_POLL_INTERVAL = 0.1
+
+
+@dataclasses.dataclass(frozen=True)
+class WorkerStats:
+    """Snapshot of the throughput of one worker process of a ``WorkerGroup``.
+
+    Attributes:
+        worker: The position of the worker in the group.
+        pid: The process ID of the current process of the worker, or ``None`` if it's
+            not running.
+        handled: The number of messages that the handler finished, including
+            messages that it raised an exception for, over all restarts.
+        failed: The number of messages that the handler raised an exception for.
+        restarts: The number of times the worker was restarted after it exited
+            unexpectedly.
+        rate: The number of messages handled per second since the previous report.
+    """
+
+    worker: int
+    pid: int | None
+    handled: int
+    failed: int
+    restarts: int
+    rate: float
+
+
+@dataclasses.dataclass(frozen=True)
+class _WorkerConfig:
+    """Everything a worker process needs to know. Must be picklable."""
+
+    hostname: str
+    port: int
+    wildcard: str
+    qos: int
+    handler: MessageHandler
+    client_kwargs: dict[str, Any]
+    report_interval: float
+
+
+class _Worker:
+    """Bookkeeping of the parent process for one worker."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: SpawnProcess | None = None
+        self.connection: Connection | None = None
+        # Totals of processes that already exited
+        self.handled_before = 0
+        self.failed_before = 0
+        self.handled = 0
+        self.failed = 0
+        self.restarts = 0
+        self.rate = 0.0
+        self.reported = time.monotonic()
+
+    def receive_reports(self) -> None:
+        """Read the reports that the worker process sent since the last call."""
+        if self.connection is None:
+            return
+        try:
+            while self.connection.poll():
+                handled, failed = self.connection.recv()
+                now = time.monotonic()
+                handled += self.handled_before
+                if now > self.reported:
+                    self.rate = (handled - self.handled) / (now - self.reported)
+                self.handled, self.failed = handled, failed + self.failed_before
+                self.reported = now
+        except (EOFError, OSError):
+            # The process exited; We already got all reports that it sent
+            pass
+
+    def stats(self) -> WorkerStats:
+        pid = self.process.pid if self.process and self.process.is_alive() else None
+        return WorkerStats(
+            self.index, pid, self.handled, self.failed, self.restarts, self.rate
+        )
+
+
+class WorkerGroup:
+    """Handle messages in multiple processes with an MQTT shared subscription.
+
+    Each worker process connects its own ``Client`` and subscribes to
+    ``$share/<group>/<wildcard>``. The broker then distributes the messages between
+    the workers, so that CPU-bound handlers can use multiple cores.
+
+    Workers that exit unexpectedly are restarted. When the group is stopped, the
+    workers unsubscribe, so that the broker sends new messages to the other
+    subscribers of the group, finish the messages they already received, and
+    disconnect.
+
+    The handler and all client arguments are passed to the worker processes, which
+    are started with the ``spawn`` method. They must therefore be picklable, e.g.
+    the handler must be a function defined at the top level of a module.
+
+    Args:
+        hostname: The hostname or IP address of the remote broker.
+        port: The network port of the remote broker.
+        group: The name of the shared subscription group.
+        wildcard: The topic or wildcard to subscribe to.
+        handler: The function or coroutine function that's called with each
+            message in the worker processes.
+        workers: The number of worker processes. Defaults to the number of CPUs.
+        qos: The QoS level of the subscription.
+        restart_delay: The time in seconds to wait before restarting a worker that
+            exited unexpectedly.
+        drain_timeout: The maximum time in seconds to wait for the workers to finish
+            their messages when stopping. Workers that take longer are terminated.
+        report_interval: The interval in seconds at which workers report their
+            throughput to the parent process.
+        logger: Custom logger instance.
+        **kwargs: Further arguments to pass to the ``Client`` of each worker. If
+            ``identifier`` is set, worker ``i`` uses ``f"{identifier}-{i}"``.
+
+    Example:
+        .. code-block:: python
+
+            def handle(message):
+                ...
+
+
+            async with aiomqtt.WorkerGroup(
+                "test.mosquitto.org", group="ingest", wildcard="sensors/#", handler=handle
+            ) as group:
+                while True:
+                    await asyncio.sleep(10)
+                    print(group.stats)
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        hostname: str,
+        port: int = 1883,
+        *,
+        group: str,
+        wildcard: str,
+        handler: MessageHandler,
+        workers: int | None = None,
+        qos: int = 0,
+        restart_delay: float = 1.0,
+        drain_timeout: float = 10.0,
+        report_interval: float = 1.0,
+        logger: logging.Logger | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            msg = "workers must be at least 1"
+            raise ValueError(msg)
+        if logger is None:
+            logger = logging.getLogger("mqtt")
+        self._logger = logger
+        self._config = _WorkerConfig(
+            hostname,
+            port,
+            f"$share/{group}/{wildcard}",
+            qos,
+            handler,
+            kwargs,
+            report_interval,
+        )
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event: Event = self._context.Event()
+        self._workers = [_Worker(index) for index in range(workers)]
+        self._supervisor: asyncio.Task[None] | None = None
+        self.restart_delay = restart_delay
+        self.drain_timeout = drain_timeout
+
+    @property
+    def stats(self) -> list[WorkerStats]:
+        """The throughput of each worker."""
+        for worker in self._workers:
+            worker.receive_reports()
+        return [worker.stats() for worker in self._workers]
+
+    def _start(self, worker: _Worker) -> None:
+        receiver, sender = self._context.Pipe(duplex=False)
+        worker.process = self._context.Process(
+            target=_run_worker,
+            args=(worker.index, self._config, self._stop_event, sender),
+            name=f"aiomqtt-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        # Only the child writes to the pipe
+        sender.close()
+        worker.connection = receiver
+
+    def _reap(self, worker: _Worker) -> None:
+        """Collect the last reports of an exited worker process."""
+        worker.receive_reports()
+        worker.handled_before = worker.handled
+        worker.failed_before = worker.failed
+        worker.rate = 0.0
+        if worker.connection is not None:
+            worker.connection.close()
+            worker.connection = None
+
+    async def _supervise(self) -> None:
+        """Collect reports and restart workers that exited unexpectedly."""
+        restart_at: dict[int, float] = {}
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._config.report_interval)
+            for worker in self._workers:
+                worker.receive_reports()
+                if worker.process is None or worker.process.is_alive():
+                    continue
+                if worker.index not in restart_at:
+                    self._logger.warning(
+                        "Worker %d exited with code %s; Restarting it in %.1f seconds",
+                        worker.index,
+                        worker.process.exitcode,
+                        self.restart_delay,
+                    )
+                    self._reap(worker)
+                    restart_at[worker.index] = loop.time() + self.restart_delay
+                elif loop.time() >= restart_at[worker.index]:
+                    del restart_at[worker.index]
+                    worker.restarts += 1
+                    self._start(worker)
+
+    async def __aenter__(self) -> Self:
+        """Start the worker processes."""
+        self._stop_event.clear()
+        for worker in self._workers:
+            self._start(worker)
+        self._supervisor = asyncio.get_running_loop().create_task(self._supervise())
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Let the workers finish their messages and stop them."""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        self._stop_event.set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.drain_timeout
+        for worker in self._workers:
+            process = worker.process
+            if process is None:
+                continue
+            while process.is_alive() and loop.time() < deadline:
+                await asyncio.sleep(0.05)
+            if process.is_alive():
+                self._logger.warning(
+                    "Worker %d did not finish in time; Terminating it", worker.index
+                )
+                process.terminate()
+                # Wait for the process to exit without blocking the event loop
+                while process.is_alive():
+                    await asyncio.sleep(0.05)
+            process.join()
+            self._reap(worker)
+
+
+def _run_worker(
+    index: int, config: _WorkerConfig, stop_event: Event, connection: Connection
+) -> None:
+    """Entry point of the worker processes."""
+    try:
+        asyncio.run(_WorkerProcess(index, config, stop_event, connection).run())
+    finally:
+        connection.close()
+
+
+class _WorkerProcess:
+    """Consumes the messages of the shared subscription inside a worker process."""
+
+    def __init__(
+        self,
+        index: int,
+        config: _WorkerConfig,
+        stop_event: Event,
+        connection: Connection,
+    ) -> None:
+        self._index = index
+        self._config = config
+        self._stop_event = stop_event
+        self._connection = connection
+        self._logger = logging.getLogger("mqtt")
+        self._handled = 0
+        self._failed = 0
+        self._handling = False
+
+    async def run(self) -> None:
+        kwargs = dict(self._config.client_kwargs)
+        if kwargs.get("identifier") is not None:
+            kwargs["identifier"] = f"{kwargs['identifier']}-{self._index}"
+        loop = asyncio.get_running_loop()
+        async with Client(self._config.hostname, self._config.port, **kwargs) as client:
+            await client.subscribe(self._config.wildcard, self._config.qos)
+            consumer = loop.create_task(self._consume(client))
+            supervisor = loop.create_task(self._supervise(consumer))
+            try:
+                await consumer
+            except asyncio.CancelledError:
+                if not self._stop_event.is_set():
+                    raise
+            finally:
+                supervisor.cancel()
+            # Drain: Let the broker send new messages to the other workers, then
+            # finish the messages that we already received
+            try:
+                await client.unsubscribe(self._config.wildcard)
+            except MqttError:
+                pass
+            iterator = client.messages
+            while len(iterator):
+                await self._handle(await iterator.__anext__())
+        self._report()
+
+    async def _consume(self, client: Client) -> None:
+        async for message in client.messages:
+            self._handling = True
+            await self._handle(message)
+            self._handling = False
+            if self._stop_event.is_set():
+                return
+
+    async def _handle(self, message: Message) -> None:
+        try:
+            result = self._config.handler(message)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            self._failed += 1
+            self._logger.exception("Worker %d could not handle a message", self._index)
+        self._handled += 1
+
+    async def _supervise(self, consumer: asyncio.Task[None]) -> None:
+        """Report the throughput and stop consuming when the group stops."""
+        loop = asyncio.get_running_loop()
+        reported = loop.time()
+        while not self._stop_event.is_set():
+            if loop.time() - reported >= self._config.report_interval:
+                self._report()
+                reported = loop.time()
+            await asyncio.sleep(STOP_POLL_INTERVAL)
+        # Don't interrupt the handler; _consume() returns after the current message
+        if not self._handling:
+            consumer.cancel()
+
+    def _report(self) -> None:
+        self._connection.send((self._handled, self._failed))
@@ -0,0 +1,129 @@
+"""Compare burst reads with the previous one-packet-per-wakeup reader.
+
+The broker sends a burst of small QoS 0 messages to a client of the ``"paho"``
+engine. For several read budgets, the benchmark reports the number of ``recv()``
+calls, the throughput in messages per second, and the longest time that a
+concurrent task had to wait for its turn on the event loop.
+
+Run with ``python -m benchmarks.burst_reads``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import types
+from typing import Any, Iterator
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import Client
+from aiomqtt.client import _PahoClient
+from tests.broker import Broker
+
+MESSAGES = 50_000
+PAYLOAD = b"x" * 16
+BUDGETS: tuple[tuple[int, int | None], ...] = (
+    (1, None),
+    (16, None),
+    (256, None),
+    (MESSAGES, 16_384),
+    (MESSAGES, None),
+)
+
+
+def _unbuffered_recv(self: mqtt.Client, bufsize: int) -> bytes:
+    return mqtt.Client._sock_recv(self, bufsize)  # noqa: SLF001
+
+
+class PreviousClient(Client):
+    """Reference copy of the previous reader, which reads one packet per wakeup."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Restore paho-mqtt's own unbuffered reads
+        paho = self._client
+        paho._sock_recv = types.MethodType(_unbuffered_recv, paho)  # type: ignore[method-assign]  # noqa: SLF001
+
+    def _read_burst(self, client: _PahoClient) -> None:
+        client.loop_read()
+
+
+@contextlib.contextmanager
+def count_recv() -> Iterator[list[int]]:
+    """Count the calls of paho-mqtt's ``_sock_recv()``, which wraps ``recv()``."""
+    calls = [0]
+    sock_recv = mqtt.Client._sock_recv  # noqa: SLF001
+
+    def counting(self: mqtt.Client, bufsize: int) -> bytes:
+        calls[0] += 1
+        return sock_recv(self, bufsize)
+
+    mqtt.Client._sock_recv = counting  # type: ignore[method-assign]  # noqa: SLF001
+    try:
+        yield calls
+    finally:
+        mqtt.Client._sock_recv = sock_recv  # type: ignore[method-assign]  # noqa: SLF001
+
+
+async def ticker(stalls: list[float]) -> None:
+    """Record the longest time between two turns of a task on the event loop."""
+    last = time.perf_counter()
+    while True:
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        stalls[0] = max(stalls[0], now - last)
+        last = now
+
+
+async def burst(
+    broker: Broker,
+    client_type: type[Client],
+    max_packets_per_read: int,
+    max_bytes_per_read: int | None,
+) -> tuple[int, float, float]:
+    async with client_type(
+        "127.0.0.1",
+        broker.port,
+        max_packets_per_read=max_packets_per_read,
+        max_bytes_per_read=max_bytes_per_read,
+    ) as client:
+        await client.subscribe("bench/burst")
+        stalls = [0.0]
+        task = asyncio.get_running_loop().create_task(ticker(stalls))
+        with count_recv() as calls:
+            start = time.perf_counter()
+            for _ in range(MESSAGES):
+                broker.route("bench/burst", PAYLOAD, 0)
+            # Don't count the time that the broker took to queue the burst
+            await asyncio.sleep(0)
+            stalls[0] = 0.0
+            iterator = client.messages
+            for _ in range(MESSAGES):
+                await iterator.__anext__()
+            elapsed = time.perf_counter() - start
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    return calls[0], MESSAGES / elapsed, stalls[0]
+
+
+async def main() -> None:
+    variants: list[tuple[str, type[Client], int, int | None]] = [
+        ("previous", PreviousClient, 1, None)
+    ]
+    for packets, max_bytes in BUDGETS:
+        budget = f"{packets} packets"
+        if max_bytes is not None:
+            budget = f"{max_bytes // 1024} KiB"
+        variants.append((budget, Client, packets, max_bytes))
+    async with Broker() as broker:
+        print(f"{'budget':>14} {'recv() calls':>13} {'msg/s':>9} {'longest stall':>14}")
+        for name, client_type, packets, max_bytes in variants:
+            calls, rate, stall = await burst(broker, client_type, packets, max_bytes)
+            print(f"{name:>14} {calls:>13} {rate:>9.0f} {stall * 1e3:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
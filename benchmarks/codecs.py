@@ -0,0 +1,74 @@
+"""Measure the cost of decoding the payload of incoming messages.
+
+Each message is passed to several handlers that all need the decoded payload. The
+previous approach decodes it in every handler with ``json.loads()``; With codecs,
+``Message.decoded`` decodes it once and the other handlers get the cached object.
+The benchmark also compares a JSON payload with the same record in a fixed binary
+layout.
+
+Run with ``python -m benchmarks.codecs``.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Callable
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import CodecRegistry, JSONCodec, Message, StructCodec
+
+MESSAGES = 100_000
+HANDLERS = (1, 3)
+RECORD = {"id": 42, "time": 1718000000.25, "temperature": 28.4, "humidity": 61.0}
+BINARY = StructCodec("<Qddd", fields=tuple(RECORD))
+CODECS = CodecRegistry([("sensors/+/json", JSONCodec()), ("sensors/+/binary", BINARY)])
+
+
+def incoming(topic: str, payload: bytes) -> list[Message]:
+    paho_message = mqtt.MQTTMessage(topic=topic.encode())
+    paho_message.payload = payload
+    return [
+        Message._from_paho_message(paho_message, None, CODECS)  # noqa: SLF001
+        for _ in range(MESSAGES)
+    ]
+
+
+def manual(message: Message) -> Any:
+    return json.loads(message.payload)  # type: ignore[arg-type]
+
+
+def cached(message: Message) -> Any:
+    return message.decoded
+
+
+def measure(
+    messages: list[Message], decode: Callable[[Message], Any], handlers: int
+) -> float:
+    """Return the time in microseconds per message."""
+    start = time.perf_counter()
+    for message in messages:
+        for _ in range(handlers):
+            decode(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def main() -> None:
+    json_payload = json.dumps(RECORD).encode()
+    binary_payload = BINARY.encode(RECORD)
+    variants = (
+        ("json.loads() per handler", "json", json_payload, manual),
+        ("JSONCodec, cached", "json", json_payload, cached),
+        ("StructCodec, cached", "binary", binary_payload, cached),
+    )
+    print(f"{'handlers':>8} {'variant':>25} {'payload':>8} {'per message':>12}")
+    for handlers in HANDLERS:
+        for name, kind, payload, decode in variants:
+            messages = incoming(f"sensors/1/{kind}", payload)
+            micros = measure(messages, decode, handlers)
+            print(f"{handlers:>8} {name:>25} {len(payload):>6} B {micros:>9.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the compression ratio and CPU cost of the payload compression algorithms.
+
+The payloads are verbose JSON telemetry of different sizes. For each algorithm and
+level, the benchmark reports the compressed size relative to the original and the
+CPU time to compress and to decompress one payload.
+
+Run with ``python -m benchmarks.compression``.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from aiomqtt import Compression
+from aiomqtt.compression import _compress_payload, _decompress_payload
+
+READINGS = (10, 100, 1_000)
+VARIANTS: tuple[tuple[str, int | None], ...] = (
+    ("zlib", 1),
+    ("zlib", None),
+    ("zlib", 9),
+    ("lzma", 0),
+    ("lzma", None),
+    ("bz2", 1),
+    ("bz2", None),
+)
+ROUNDS = 20
+
+
+def telemetry(readings: int) -> bytes:
+    return json.dumps(
+        {
+            "device": "edge-gateway-0042",
+            "firmware": "4.12.7",
+            "readings": [
+                {
+                    "sensor": f"temperature-{n % 16}",
+                    "timestamp": f"2024-06-10T12:{n // 60 % 60:02d}:{n % 60:02d}Z",
+                    "value": round(20 + (n * 7 % 13) / 10, 1),
+                    "unit": "celsius",
+                    "status": "ok",
+                }
+                for n in range(readings)
+            ],
+        },
+        indent=2,
+    ).encode()
+
+
+def measure(compression: Compression, payload: bytes) -> tuple[float, float, float]:
+    """Return the ratio and the time in microseconds to compress and decompress."""
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        compressed, properties = _compress_payload(compression, payload, None)
+    compress = (time.process_time() - start) / ROUNDS * 1e6
+    assert isinstance(compressed, bytes)
+    assert isinstance(properties, Properties)
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        _decompress_payload(compressed, properties)
+    decompress = (time.process_time() - start) / ROUNDS * 1e6
+    return len(compressed) / len(payload), compress, decompress
+
+
+def main() -> None:
+    # Warm up Properties, which paho-mqtt builds on first use
+    Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    print(
+        f"{'payload':>9} {'algorithm':>10} {'level':>7} {'ratio':>7} "
+        f"{'compress':>12} {'decompress':>12}"
+    )
+    for readings in READINGS:
+        payload = telemetry(readings)
+        for algorithm, level in VARIANTS:
+            compression = Compression(algorithm, level=level, threshold=0)  # type: ignore[arg-type]
+            ratio, compress, decompress = measure(compression, payload)
+            label = "default" if level is None else str(level)
+            print(
+                f"{len(payload):>7} B {algorithm:>10} {label:>7} "
+                f"{ratio:>6.1%} {compress:>9.0f} µs {decompress:>9.0f} µs"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare connecting on the event loop with the previous executor-based connect.
+
+Many clients connect to a local broker at the same time. The benchmark reports how
+long it takes until all of them are connected, the slowest individual connect, and
+how long an unrelated ``run_in_executor`` job has to wait in the meantime.
+
+Run with ``python -m benchmarks.connect``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+
+from aiomqtt import Client
+from tests.broker import Broker
+
+COUNTS = (10, 100, 1_000)
+
+
+class ExecutorClient(Client):
+    """Reference copy of the previous connect, which runs in an executor thread."""
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None,
+            self._client.connect,
+            self._hostname,
+            self._port,
+            self._keepalive,
+            self._bind_address,
+            self._bind_port,
+            self._clean_start,
+            self._properties,
+        )
+
+
+async def connect(client: Client) -> float:
+    start = time.perf_counter()
+    await client.__aenter__()
+    return time.perf_counter() - start
+
+
+async def storm(port: int, client_type: type[Client], count: int) -> tuple[float, ...]:
+    loop = asyncio.get_running_loop()
+    clients = [client_type("127.0.0.1", port, keepalive=600) for _ in range(count)]
+    start = time.perf_counter()
+    connects = asyncio.gather(*(connect(client) for client in clients))
+    # Submit an unrelated job while the clients connect
+    await asyncio.sleep(0)
+    probe_start = time.perf_counter()
+    await loop.run_in_executor(None, time.sleep, 0)
+    probe = time.perf_counter() - probe_start
+    latencies = await connects
+    total = time.perf_counter() - start
+    async with contextlib.AsyncExitStack() as stack:
+        for client in clients:
+            stack.push_async_exit(client)
+    return total, max(latencies), probe
+
+
+async def main() -> None:
+    async with Broker() as broker:
+        print(
+            f"{'clients':>8} {'variant':>9} {'all connected':>14}"
+            f" {'slowest':>10} {'executor job':>13}"
+        )
+        for count in COUNTS:
+            for name, client_type in (
+                ("previous", ExecutorClient),
+                ("current", Client),
+            ):
+                total, slowest, probe = await storm(broker.port, client_type, count)
+                print(
+                    f"{count:>8} {name:>9} {total * 1e3:>11.1f} ms"
+                    f" {slowest * 1e3:>7.1f} ms {probe * 1e3:>10.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Compare the client's deadline heap with the previous ``asyncio.wait_for`` timeouts.
+
+Both variants wait for many pending calls at once, each with a timeout, and then
+acknowledge all of them, like a burst of QoS 1 publishes.
+
+Run with ``python -m benchmarks.deadlines``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Any, TypeVar
+
+from aiomqtt import Client, MqttError
+
+T = TypeVar("T")
+
+COUNTS = (1_000, 10_000, 50_000)
+
+
+class WaitForClient(Client):
+    """Reference copy of the previous ``asyncio.wait_for``-based ``_wait_for``."""
+
+    async def _wait_for(self, fut: asyncio.Future[T], timeout: float | None) -> T:
+        if timeout is None:
+            timeout = self.timeout
+        timeout_for_asyncio = None if timeout == math.inf else timeout
+        try:
+            return await asyncio.wait_for(fut, timeout=timeout_for_asyncio)
+        except asyncio.TimeoutError:
+            msg = "Operation timed out"
+            raise MqttError(msg) from None
+
+
+async def in_flight(client_type: type[Client], count: int) -> float:
+    client = client_type("localhost")
+    loop = asyncio.get_running_loop()
+    futures: list[asyncio.Future[Any]] = [loop.create_future() for _ in range(count)]
+    start = time.perf_counter()
+    tasks = [
+        loop.create_task(client._wait_for(fut, timeout=10))  # noqa: SLF001
+        for fut in futures
+    ]
+    # Let all calls start waiting before acknowledging them
+    await asyncio.sleep(0)
+    for fut in futures:
+        fut.set_result(None)
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    print(f"{'in flight':>10} {'previous':>12} {'current':>12} {'speedup':>8}")
+    for count in COUNTS:
+        previous = await in_flight(WaitForClient, count)
+        current = await in_flight(Client, count)
+        print(
+            f"{count:>10} {previous * 1e6 / count:>9.2f} µs {current * 1e6 / count:>9.2f} µs"
+            f" {previous / current:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
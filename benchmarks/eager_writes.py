@@ -0,0 +1,68 @@
+"""Compare the publish latency of eager writes with the default write paths.
+
+A client publishes a message to a local broker, waits until the broker sends it
+back, and repeats. The benchmark reports the median and 99th percentile of the round
+trip time for the writer registration that paho-mqtt used before, the default write
+at the next event loop iteration, and eager writes.
+
+Run with ``python -m benchmarks.eager_writes``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import Literal
+
+from aiomqtt import Client
+from tests.broker import Broker
+
+from .write_coalescing import PreviousPahoClient
+
+ROUND_TRIPS = 5_000
+VARIANTS: tuple[tuple[str, type[Client], Literal["paho", "native"], bool], ...] = (
+    ("writer registration", PreviousPahoClient, "paho", False),
+    ("next iteration", Client, "paho", False),
+    ("eager", Client, "paho", True),
+    ("next iteration", Client, "native", False),
+    ("eager", Client, "native", True),
+)
+
+
+async def round_trips(
+    port: int,
+    client_type: type[Client],
+    engine: Literal["paho", "native"],
+    eager_writes: bool,
+) -> list[float]:
+    latencies = []
+    async with client_type(
+        "127.0.0.1", port, engine=engine, eager_writes=eager_writes
+    ) as client:
+        await client.subscribe("bench/echo")
+        iterator = client.messages
+        for _ in range(ROUND_TRIPS):
+            start = time.perf_counter()
+            await client.publish("bench/echo", b"ping")
+            await iterator.__anext__()
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main() -> None:
+    async with Broker() as broker:
+        print(f"{'engine':>7} {'variant':>20} {'median':>10} {'p99':>10}")
+        for name, client_type, engine, eager_writes in VARIANTS:
+            latencies = await round_trips(
+                broker.port, client_type, engine, eager_writes
+            )
+            median = statistics.median(latencies)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            print(
+                f"{engine:>7} {name:>20} {median * 1e6:>7.1f} µs {p99 * 1e6:>7.1f} µs"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Compare the keepalive timer with the previous one-second ``loop_misc()`` poll.
+
+Many idle clients stay connected to a local broker for a few seconds. The benchmark
+reports how often paho-mqtt's ``loop_misc()`` was called and how much CPU time the
+process used in the meantime.
+
+Run with ``python -m benchmarks.keepalive``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from typing import Any
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import Client
+from tests.broker import Broker
+
+COUNTS = (100, 1_000)
+IDLE = 3
+
+
+class PollingClient(Client):
+    """Reference copy of the previous keepalive handling, which polls every second."""
+
+    def _schedule_keepalive(self) -> None:
+        self._misc_task = self._loop.create_task(self._misc_loop())
+
+    def _cancel_keepalive(self) -> None:
+        self._misc_task.cancel()
+
+    async def _misc_loop(self) -> None:
+        while self._client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+
+async def idle(port: int, client_type: type[Client], count: int) -> tuple[int, float]:
+    calls = 0
+
+    def counting(loop_misc: Any) -> Any:
+        def wrapper() -> Any:
+            nonlocal calls
+            calls += 1
+            return loop_misc()
+
+        return wrapper
+
+    clients = [client_type("127.0.0.1", port, keepalive=60) for _ in range(count)]
+    for client in clients:
+        client._client.loop_misc = counting(client._client.loop_misc)  # type: ignore[method-assign]  # noqa: SLF001
+    async with contextlib.AsyncExitStack() as stack:
+        for client in clients:
+            await stack.enter_async_context(client)
+        calls = 0
+        start = time.process_time()
+        await asyncio.sleep(IDLE)
+        cpu = time.process_time() - start
+    return calls, cpu
+
+
+async def main() -> None:
+    async with Broker() as broker:
+        print(
+            f"{'clients':>8} {'variant':>9} {'loop_misc() calls':>18} {'CPU time':>10}"
+        )
+        for count in COUNTS:
+            for name, client_type in (("previous", PollingClient), ("current", Client)):
+                calls, cpu = await idle(broker.port, client_type, count)
+                print(f"{count:>8} {name:>9} {calls:>18} {cpu * 1e3:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
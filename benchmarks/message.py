@@ -0,0 +1,77 @@
+"""Measure memory per queued message and construction time of ``Message``.
+
+The slotted, lazily converted ``Message`` is compared with a copy of the previous
+implementation that uses a per-instance ``__dict__`` and converts all fields eagerly.
+
+Run with ``python -m benchmarks.message``.
+"""
+
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import Message, Topic
+
+COUNT = 100_000
+
+
+class EagerMessage:
+    """Reference copy of the previous ``Message`` implementation."""
+
+    def __init__(self, message: mqtt.MQTTMessage) -> None:
+        self.topic = Topic(message.topic)
+        self.payload = message.payload
+        self.qos = message.qos
+        self.retain = message.retain
+        self.mid = message.mid
+        self.properties = message.properties if hasattr(message, "properties") else None
+
+
+def create_paho_messages() -> list[mqtt.MQTTMessage]:
+    messages = []
+    for index in range(COUNT):
+        message = mqtt.MQTTMessage(
+            mid=index, topic=f"sensors/{index % 1000}/temp".encode()
+        )
+        message.payload = b"21.5"
+        messages.append(message)
+    return messages
+
+
+def convert_and_access_topic(message: mqtt.MQTTMessage) -> Message:
+    """Convert a message and materialize its topic, e.g. when routing every message."""
+    converted = Message._from_paho_message(message)  # noqa: SLF001
+    _ = converted.topic
+    return converted
+
+
+def measure(
+    name: str, convert: Callable[[mqtt.MQTTMessage], Any], paho: list[mqtt.MQTTMessage]
+) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    queued = [convert(message) for message in paho]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<24} {size / len(queued):>8.0f} B/message"
+        f" {elapsed / len(queued) * 1e9:>8.0f} ns/message"
+    )
+
+
+def main() -> None:
+    paho = create_paho_messages()
+    measure("eager (previous)", EagerMessage, paho)
+    measure("lazy", Message._from_paho_message, paho)  # noqa: SLF001
+    measure("lazy + topic access", convert_and_access_topic, paho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compare the latency of message callbacks with the client's message queue.
+
+A client publishes a message to a local broker and waits until the broker sends it
+back, either to a task that reads ``Client.messages`` or to a synchronous or
+coroutine callback. The benchmark reports the median and 99th
+percentile of the round trip time, and the time that the client spends on
+delivering a message locally, from ``_on_message()`` until the handler has it.
+
+Run with ``python -m benchmarks.message_callbacks``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import Callable, Literal
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import Client, Message
+from tests.broker import Broker
+
+ROUND_TRIPS = 5_000
+DELIVERIES = 50_000
+VARIANTS: tuple[Literal["queue", "callback", "coroutine"], ...] = (
+    "queue",
+    "callback",
+    "coroutine",
+)
+
+
+def handler(
+    client: Client,
+    variant: Literal["queue", "callback", "coroutine"],
+    handle: Callable[[Message], None],
+) -> asyncio.Task[None] | None:
+    """Pass the client's messages to ``handle``, either from a task or directly."""
+    if variant == "queue":
+
+        async def consume() -> None:
+            async for message in client.messages:
+                handle(message)
+
+        return asyncio.get_running_loop().create_task(consume())
+
+    async def handle_async(message: Message) -> None:
+        handle(message)
+
+    client.add_message_callback(
+        "bench/#", handle if variant == "callback" else handle_async
+    )
+    return None
+
+
+class Waiter:
+    """Future that is replaced by a new one after each message."""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.future: asyncio.Future[Message] = self._loop.create_future()
+
+    def resolve(self, message: Message) -> None:
+        self.future.set_result(message)
+
+    async def wait(self) -> Message:
+        message = await self.future
+        self.future = self._loop.create_future()
+        return message
+
+
+async def round_trips(
+    port: int, variant: Literal["queue", "callback", "coroutine"]
+) -> list[float]:
+    latencies = []
+    waiter = Waiter()
+    async with Client("127.0.0.1", port) as client:
+        await client.subscribe("bench/echo")
+        task = handler(client, variant, waiter.resolve)
+        for _ in range(ROUND_TRIPS):
+            start = time.perf_counter()
+            await client.publish("bench/echo", b"ping")
+            await waiter.wait()
+            latencies.append(time.perf_counter() - start)
+    if task is not None:
+        await asyncio.gather(task, return_exceptions=True)
+    return latencies
+
+
+async def deliveries(variant: Literal["queue", "callback", "coroutine"]) -> float:
+    """Return the mean time in seconds until a message reaches its handler."""
+    waiter = Waiter()
+    client = Client("127.0.0.1")
+    task = handler(client, variant, waiter.resolve)
+    paho = client._client  # noqa: SLF001
+    message = mqtt.MQTTMessage(0, b"bench/local")
+    start = time.perf_counter()
+    for _ in range(DELIVERIES):
+        client._on_message(paho, None, message)  # noqa: SLF001
+        await waiter.wait()
+    elapsed = time.perf_counter() - start
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return elapsed / DELIVERIES
+
+
+async def main() -> None:
+    async with Broker() as broker:
+        print(f"{'variant':>10} {'median':>10} {'p99':>10} {'local':>10}")
+        for variant in VARIANTS:
+            latencies = await round_trips(broker.port, variant)
+            median = statistics.median(latencies)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            local = await deliveries(variant)
+            print(
+                f"{variant:>10} {median * 1e6:>7.1f} µs {p99 * 1e6:>7.1f} µs "
+                f"{local * 1e6:>7.2f} µs"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Compare the throughput of ``Client.messages`` with the previous task-based version.
+
+The previous implementation created a task and an ``asyncio.wait`` set for every
+message. Two workloads are measured: draining a backlog of queued messages, and
+receiving messages one by one while the consumer is already waiting.
+
+Run with ``python -m benchmarks.messages_iterator``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import Client, Message, MessagesIterator, MqttError
+
+COUNT = 100_000
+
+
+class TaskMessagesIterator(MessagesIterator):
+    """Reference copy of the previous task-based ``__anext__``."""
+
+    async def __anext__(self) -> Message:
+        client = self._client
+        task = client._loop.create_task(client._stream.queue.get())  # noqa: SLF001
+        try:
+            done, _ = await asyncio.wait(
+                (task, client._disconnected),  # noqa: SLF001
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if task in done:
+            return task.result()
+        task.cancel()
+        msg = "Disconnected during message iteration"
+        raise MqttError(msg)
+
+
+def create_client() -> Client:
+    return Client("localhost")
+
+
+def enqueue(client: Client, mid: int) -> None:
+    client._on_message(client._client, None, mqtt.MQTTMessage(mid, b"a/b"))  # noqa: SLF001
+
+
+async def backlog(iterator_type: Callable[[Client], MessagesIterator]) -> float:
+    client = create_client()
+    for mid in range(COUNT):
+        enqueue(client, mid)
+    iterator = iterator_type(client)
+    start = time.perf_counter()
+    for _ in range(COUNT):
+        await iterator.__anext__()
+    return time.perf_counter() - start
+
+
+async def ping_pong(iterator_type: Callable[[Client], MessagesIterator]) -> float:
+    client = create_client()
+    loop = asyncio.get_running_loop()
+    iterator = iterator_type(client)
+    start = time.perf_counter()
+    for mid in range(COUNT):
+        # Deliver the message from the event loop while the consumer waits
+        loop.call_soon(enqueue, client, mid)
+        await iterator.__anext__()
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    print(f"{'workload':<12} {'previous':>12} {'current':>12} {'speedup':>8}")
+    for name, workload in (("backlog", backlog), ("ping-pong", ping_pong)):
+        previous = await workload(TaskMessagesIterator)
+        current = await workload(MessagesIterator)
+        print(
+            f"{name:<12} {COUNT / previous:>8.0f} m/s {COUNT / current:>8.0f} m/s"
+            f" {previous / current:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Compare the paho engine with the native asyncio engine against a local broker.
+
+Each run publishes messages to a topic the client is subscribed to and waits for
+them to come back, once pipelined with ``publish_many()`` (throughput) and once
+one at a time (round-trip latency).
+
+Run with ``python -m benchmarks.native_engine``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Literal
+
+from aiomqtt import Client
+from tests.broker import Broker
+
+COUNT = 5_000
+ROUND_TRIPS = 500
+PAYLOAD = b"x" * 64
+
+Engine = Literal["paho", "native"]
+ENGINES: tuple[Engine, ...] = ("paho", "native")
+
+
+async def throughput(port: int, engine: Engine, qos: int) -> float:
+    async with Client("127.0.0.1", port, engine=engine) as client:
+        await client.subscribe("benchmark/#", qos=qos)
+        start = time.perf_counter()
+        await client.publish_many(
+            [("benchmark/throughput", PAYLOAD)] * COUNT, qos=qos, timeout=60
+        )
+        received = 0
+        async for _ in client.messages:
+            received += 1
+            if received == COUNT:
+                break
+        return COUNT / (time.perf_counter() - start)
+
+
+async def latency(port: int, engine: Engine, qos: int) -> float:
+    async with Client("127.0.0.1", port, engine=engine) as client:
+        await client.subscribe("benchmark/#", qos=qos)
+        start = time.perf_counter()
+        for _ in range(ROUND_TRIPS):
+            await client.publish("benchmark/latency", PAYLOAD, qos=qos)
+            await anext_message(client)
+        return (time.perf_counter() - start) / ROUND_TRIPS
+
+
+async def anext_message(client: Client) -> None:
+    async for _ in client.messages:
+        return
+
+
+async def main() -> None:
+    async with Broker() as broker:
+        print(f"{'qos':>4} {'engine':>7} {'messages/s':>12} {'round trip':>12}")
+        for qos in (0, 1, 2):
+            for engine in ENGINES:
+                rate = await throughput(broker.port, engine, qos)
+                round_trip = await latency(broker.port, engine, qos)
+                print(
+                    f"{qos:>4} {engine:>7} {rate:>12,.0f} {round_trip * 1e6:>9.0f} µs"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Measure the cost of publishing through a durable outbox.
+
+Two workloads run against a local broker:
+
+- ``publish``: A connected client publishes QoS 1 messages one after the other,
+  without and with an outbox.
+- ``flush``: A client stores messages in the outbox while it's disconnected, then
+  connects and publishes them.
+
+The benchmark reports the throughput in messages per second and the size of the
+database file when it's full and once it's drained and closed.
+
+Run with ``python -m benchmarks.outbox``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import tempfile
+import time
+
+from aiomqtt import Client, Outbox
+from tests.broker import Broker
+
+MESSAGES = 10_000
+PAYLOAD = b"x" * 64
+
+
+def file_size(path: pathlib.Path) -> int:
+    """Return the size of the database including its write-ahead log."""
+    wal = path.with_name(path.name + "-wal")
+    return path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+async def publish(broker: Broker, outbox: Outbox | None) -> float:
+    async with Client("127.0.0.1", broker.port, outbox=outbox) as client:
+        start = time.perf_counter()
+        for _ in range(MESSAGES):
+            await client.publish("bench/outbox", PAYLOAD, qos=1)
+        return MESSAGES / (time.perf_counter() - start)
+
+
+async def flush(
+    broker: Broker, outbox: Outbox, path: pathlib.Path
+) -> tuple[float, float, int]:
+    client = Client("127.0.0.1", broker.port, outbox=outbox)
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        await client.publish("bench/outbox", PAYLOAD, qos=1)
+    store = MESSAGES / (time.perf_counter() - start)
+    full = file_size(path)
+    async with client:
+        start = time.perf_counter()
+        while len(outbox) > 0:
+            await asyncio.sleep(0.001)
+        drain = MESSAGES / (time.perf_counter() - start)
+    return store, drain, full
+
+
+async def main() -> None:
+    async with Broker() as broker:
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "outbox.db"
+            without = await publish(broker, None)
+            with Outbox(path) as outbox:
+                durable = await publish(broker, outbox)
+            print(f"publish without outbox: {without:>9.0f} msg/s")
+            print(f"publish with outbox:    {durable:>9.0f} msg/s")
+            with Outbox(path) as outbox:
+                store, drain, full = await flush(broker, outbox, path)
+            print(f"store while offline:    {store:>9.0f} msg/s")
+            print(f"flush after connecting: {drain:>9.0f} msg/s")
+            print(f"database size:          {full / 1024:>9.0f} KiB when full")
+            print(f"{'':>24}{file_size(path) / 1024:>9.0f} KiB when drained and closed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
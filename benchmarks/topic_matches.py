@@ -0,0 +1,65 @@
+"""Compare the compiled wildcard matcher with the previous recursive implementation.
+
+Run with ``python -m benchmarks.topic_matches``.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from aiomqtt import Topic, Wildcard
+
+
+def recursive_matches(topic: Topic, wildcard: str) -> bool:
+    """Reference copy of the recursive ``Topic.matches`` that re-parses every call."""
+    wildcard = str(Wildcard(wildcard))
+    topic_levels = topic.value.split("/")
+    wildcard_levels = wildcard.split("/")
+    if wildcard_levels[0] == "$share":
+        wildcard_levels = wildcard_levels[2:]
+
+    def recurse(tl: list[str], wl: list[str]) -> bool:
+        if not tl:
+            return not wl or wl[0] == "#"
+        if not wl:
+            return False
+        if wl[0] == "#":
+            return True
+        if tl[0] == wl[0] or wl[0] == "+":
+            return recurse(tl[1:], wl[1:])
+        return False
+
+    return recurse(topic_levels, wildcard_levels)
+
+
+def main() -> None:
+    number = 20_000
+    print(f"{'depth':>5} {'recursive':>12} {'compiled':>12} {'speedup':>8}")
+    for depth in (2, 4, 8, 16, 32):
+        levels = [f"level{index}" for index in range(depth)]
+        topic = Topic("/".join(levels))
+        wildcards = [
+            "/".join(levels),
+            "/".join(["+"] * depth),
+            "/".join([*levels[:-1], "#"]),
+            "/".join([*levels[:-1], "nomatch"]),
+        ]
+        for wildcard in wildcards:
+            assert topic.matches(wildcard) == recursive_matches(topic, wildcard)
+        recursive = timeit.timeit(
+            lambda: [recursive_matches(topic, w) for w in wildcards],  # noqa: B023
+            number=number,
+        )
+        compiled = timeit.timeit(
+            lambda: [topic.matches(w) for w in wildcards],  # noqa: B023
+            number=number,
+        )
+        per_call = 1e9 / (number * len(wildcards))
+        print(
+            f"{depth:>5} {recursive * per_call:>10.0f}ns {compiled * per_call:>10.0f}ns"
+            f" {recursive / compiled:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
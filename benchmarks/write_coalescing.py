@@ -0,0 +1,157 @@
+"""Compare coalesced writes with the previous one-send-per-packet write path.
+
+Two workloads run against a local broker:
+
+- ``publish``: A client publishes many small QoS 0 messages with ``publish_many()``.
+- ``ack``: The broker sends a burst of QoS 1 messages, which the client acknowledges
+  with a PUBACK each.
+
+For both network engines, the benchmark reports how many send calls the client made
+(``socket.send()`` for paho-mqtt, ``transport.write()`` for the native engine) and
+the throughput in messages per second.
+
+Run with ``python -m benchmarks.write_coalescing``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import types
+from typing import Any, Callable, Iterator, Literal
+
+import paho.mqtt.client as mqtt
+
+from aiomqtt import Client
+from aiomqtt.native import _Connection
+from tests.broker import Broker
+
+MESSAGES = 20_000
+PAYLOAD = b"x" * 32
+ENGINES: tuple[Literal["paho", "native"], ...] = ("paho", "native")
+
+
+class PreviousPahoClient(Client):
+    """Reference copy of the previous paho-mqtt write path.
+
+    It waits for the selector to report the socket as writable and then sends each
+    packet with a separate call.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Restore paho-mqtt's own implementation, which sends packet by packet
+        paho = self._client
+        paho._packet_write = types.MethodType(mqtt.Client._packet_write, paho)  # type: ignore[method-assign]  # noqa: SLF001
+
+    def _on_socket_register_write(
+        self, client: mqtt.Client, userdata: Any, sock: Any
+    ) -> None:
+        def callback() -> None:
+            try:
+                client.loop_write()
+            except Exception as exc:
+                if not self._disconnected.done():
+                    self._disconnected.set_exception(exc)
+
+        self._loop.call_soon_threadsafe(self._loop.add_writer, sock, callback)
+
+
+def _write_directly(self: _Connection, packet: bytes) -> None:
+    """Reference copy of the previous native write path."""
+    if self.transport is None:
+        return
+    self.transport.write(packet)
+    self._last_out = self._loop.time()
+
+
+@contextlib.contextmanager
+def previous_native_writes() -> Iterator[None]:
+    coalescing = _Connection._write  # noqa: SLF001
+    _Connection._write = _write_directly  # type: ignore[method-assign]  # noqa: SLF001
+    try:
+        yield
+    finally:
+        _Connection._write = coalescing  # type: ignore[method-assign]  # noqa: SLF001
+
+
+def count_sends(client: Client) -> Callable[[], int]:
+    """Count the send calls of a connected client."""
+    calls = 0
+
+    def counting(send: Any) -> Any:
+        def wrapper(*args: Any) -> Any:
+            nonlocal calls
+            calls += 1
+            return send(*args)
+
+        return wrapper
+
+    paho = client._client  # noqa: SLF001
+    connection = getattr(paho, "_connection", None)
+    if connection is not None:
+        connection.transport.write = counting(connection.transport.write)
+    else:
+        paho._sock_send = counting(paho._sock_send)  # type: ignore[method-assign]  # noqa: SLF001
+    return lambda: calls
+
+
+async def publish(client: Client, broker: Broker) -> None:
+    expected = broker.published + MESSAGES
+    await client.publish_many(("bench/publish", PAYLOAD) for _ in range(MESSAGES))
+    # Wait until the broker received everything
+    while broker.published < expected:
+        await asyncio.sleep(0.001)
+
+
+async def acknowledge(client: Client, broker: Broker) -> None:
+    await client.subscribe("bench/ack", qos=1)
+    for _ in range(MESSAGES):
+        broker.route("bench/ack", PAYLOAD, 1)
+    iterator = client.messages
+    for _ in range(MESSAGES):
+        await iterator.__anext__()
+
+
+async def run(
+    broker: Broker,
+    client_type: type[Client],
+    engine: Literal["paho", "native"],
+    workload: Callable[[Client, Broker], Any],
+) -> tuple[int, float]:
+    async with client_type(
+        "127.0.0.1", broker.port, engine=engine, max_queued_incoming_messages=0
+    ) as client:
+        client.pending_calls_threshold = MESSAGES
+        sends = count_sends(client)
+        start = time.perf_counter()
+        await workload(client, broker)
+        elapsed = time.perf_counter() - start
+        # Let the last acknowledgements go out before we count
+        await asyncio.sleep(0.1)
+        return sends(), MESSAGES / elapsed
+
+
+async def main() -> None:
+    workloads = (("publish", publish), ("ack", acknowledge))
+    async with Broker() as broker:
+        print(f"{'workload':>8} {'engine':>7} {'variant':>9} {'sends':>7} {'msg/s':>9}")
+        for workload_name, workload in workloads:
+            for engine in ENGINES:
+                for variant in ("previous", "current"):
+                    with contextlib.ExitStack() as stack:
+                        client_type = Client
+                        if variant == "previous" and engine == "paho":
+                            client_type = PreviousPahoClient
+                        elif variant == "previous":
+                            stack.enter_context(previous_native_writes())
+                        sends, rate = await run(broker, client_type, engine, workload)
+                    print(
+                        f"{workload_name:>8} {engine:>7} {variant:>9} "
+                        f"{sends:>7} {rate:>9.0f}"
+                    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,211 @@
+"""Minimal in-process MQTT broker to test the client without network access.
+
+It implements just enough of MQTT 3.1.1 and 5.0 for the tests and the benchmarks:
+connecting, subscribing, publishing with all QoS levels, and pinging. Messages are
+delivered with the lower of the publication's and the subscription's QoS level.
+Messages for shared subscriptions (``$share/<group>/<filter>``) go to the
+subscribers of each group in turn.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+
+from aiomqtt import Topic
+from aiomqtt.native import (
+    CONNACK,
+    CONNECT,
+    DISCONNECT,
+    PINGREQ,
+    PINGRESP,
+    PUBACK,
+    PUBCOMP,
+    PUBLISH,
+    PUBREC,
+    PUBREL,
+    SUBACK,
+    SUBSCRIBE,
+    UNSUBACK,
+    UNSUBSCRIBE,
+    decode_remaining_length,
+    encode_packet,
+    encode_publish,
+)
+
+_UINT16 = struct.Struct("!H")
+_ACK = struct.Struct("!BBH")
+MQTT_V5 = 5
+
+
+class _Session(asyncio.Protocol):
+    def __init__(self, broker: Broker) -> None:
+        self.broker = broker
+        self.transport: asyncio.Transport | None = None
+        self.buffer = b""
+        self.v5 = False
+        self.subscriptions: dict[str, int] = {}
+        self.last_mid = 0
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+        self.broker.sessions.append(self)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.broker.sessions.remove(self)
+
+    def data_received(self, data: bytes) -> None:
+        data = self.buffer + data
+        pos = 0
+        while len(data) - pos >= 2:  # noqa: PLR2004
+            length, start = decode_remaining_length(data, pos + 1)
+            if length < 0 or start + length > len(data):
+                break
+            self.handle(data[pos], data[start : start + length])
+            pos = start + length
+        self.buffer = data[pos:]
+
+    def write(self, packet: bytes) -> None:
+        if self.transport is not None:
+            self.transport.write(packet)
+
+    def handle(self, header: int, body: bytes) -> None:  # noqa: C901
+        packet_type = header & 0xF0
+        if packet_type == PUBLISH:
+            self.handle_publish(header, body)
+        elif packet_type == CONNECT:
+            protocol_name_length = _UINT16.unpack_from(body)[0]
+            self.v5 = body[2 + protocol_name_length] == MQTT_V5
+            self.write(encode_packet(CONNACK, b"\x00\x00", b"\x00" if self.v5 else b""))
+        elif packet_type == SUBSCRIBE:
+            mid = _UINT16.unpack_from(body)[0]
+            pos = 2
+            if self.v5:
+                length, pos = decode_remaining_length(body, pos)
+                pos += length
+            codes = bytearray()
+            while pos < len(body):
+                topic_end = pos + 2 + _UINT16.unpack_from(body, pos)[0]
+                qos = body[topic_end] & 0x03
+                self.subscriptions[body[pos + 2 : topic_end].decode()] = qos
+                codes.append(qos)
+                pos = topic_end + 1
+            props = b"\x00" if self.v5 else b""
+            self.write(encode_packet(SUBACK, _UINT16.pack(mid), props, bytes(codes)))
+        elif packet_type == UNSUBSCRIBE:
+            mid = _UINT16.unpack_from(body)[0]
+            pos = 2
+            if self.v5:
+                length, pos = decode_remaining_length(body, pos)
+                pos += length
+            count = 0
+            while pos < len(body):
+                topic_end = pos + 2 + _UINT16.unpack_from(body, pos)[0]
+                self.subscriptions.pop(body[pos + 2 : topic_end].decode(), None)
+                count += 1
+                pos = topic_end
+            tail = b"\x00" + bytes(count) if self.v5 else b""
+            self.write(encode_packet(UNSUBACK, _UINT16.pack(mid), tail))
+        elif packet_type == PUBREC:
+            self.write(_ACK.pack(PUBREL | 0x02, 2, _UINT16.unpack_from(body)[0]))
+        elif packet_type == PUBREL:
+            self.write(_ACK.pack(PUBCOMP, 2, _UINT16.unpack_from(body)[0]))
+        elif packet_type == PINGREQ:
+            self.write(bytes((PINGRESP, 0)))
+        elif packet_type == DISCONNECT and self.transport is not None:
+            self.transport.close()
+
+    def handle_publish(self, header: int, body: bytes) -> None:
+        if self.broker.close_on_publish:
+            if self.transport is not None:
+                self.transport.close()
+            return
+        qos = (header >> 1) & 0x03
+        topic_end = 2 + _UINT16.unpack_from(body)[0]
+        topic = body[2:topic_end].decode()
+        pos = topic_end
+        if qos:
+            mid = _UINT16.unpack_from(body, pos)[0]
+            pos += 2
+            self.write(_ACK.pack(PUBACK if qos == 1 else PUBREC, 2, mid))
+        properties = b"\x00"
+        if self.v5:
+            start = pos
+            length, pos = decode_remaining_length(body, pos)
+            pos += length
+            properties = body[start:pos]
+        self.broker.published += 1
+        self.broker.route(topic, body[pos:], qos, properties)
+
+    def deliver(
+        self, topic: str, payload: bytes, qos: int, properties: bytes = b"\x00"
+    ) -> None:
+        """Send a message; ``properties`` are forwarded to MQTT v5.0 clients."""
+        self.last_mid = self.last_mid % 65535 + 1
+        self.write(
+            encode_publish(
+                topic.encode(),
+                payload,
+                qos,
+                False,
+                self.last_mid,
+                properties if self.v5 else None,
+            )
+        )
+
+
+class Broker:
+    """Broker that listens on a random local port.
+
+    Example:
+        .. code-block:: python
+
+            async with Broker() as broker:
+                async with aiomqtt.Client("127.0.0.1", broker.port) as client:
+                    ...
+    """
+
+    def __init__(self) -> None:
+        self.sessions: list[_Session] = []
+        # Number of PUBLISH packets received from clients
+        self.published = 0
+        # Close the connection instead of handling PUBLISH packets, e.g. to lose the
+        # connection before the acknowledgement
+        self.close_on_publish = False
+        # Number of messages delivered per shared subscription
+        self._shared: dict[str, int] = {}
+        self.port = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def __aenter__(self) -> Broker:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _Session(self), "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        if self._server is not None:
+            self._server.close()
+            for session in list(self.sessions):
+                if session.transport is not None:
+                    session.transport.close()
+            await self._server.wait_closed()
+
+    def route(
+        self, topic: str, payload: bytes, qos: int, properties: bytes = b"\x00"
+    ) -> None:
+        shared: dict[str, list[tuple[_Session, int]]] = {}
+        for session in self.sessions:
+            for wildcard, granted_qos in session.subscriptions.items():
+                if not Topic(topic).matches(wildcard):
+                    continue
+                if wildcard.startswith("$share/"):
+                    shared.setdefault(wildcard, []).append((session, granted_qos))
+                else:
+                    session.deliver(topic, payload, min(qos, granted_qos), properties)
+                    break
+        for wildcard, subscribers in shared.items():
+            count = self._shared.get(wildcard, 0)
+            session, granted_qos = subscribers[count % len(subscribers)]
+            self._shared[wildcard] = count + 1
+            session.deliver(topic, payload, min(qos, granted_qos), properties)
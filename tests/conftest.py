@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import sys
-from typing import Any
+from typing import Any, AsyncIterator
 
 import pytest
 
+from .broker import Broker
+
 
 @pytest.fixture
 def anyio_backend() -> tuple[str, dict[str, Any]]:
@@ -13,3 +15,10 @@ def anyio_backend() -> tuple[str, dict[str, Any]]:
 
         return ("asyncio", {"policy": WindowsSelectorEventLoopPolicy()})
     return ("asyncio", {})
+
+
+@pytest.fixture
+async def broker() -> AsyncIterator[Broker]:
+    """Minimal MQTT broker on a random local port."""
+    async with Broker() as broker:
+        yield broker
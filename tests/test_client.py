@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import pathlib
+import socket
 import ssl
 import sys
-from typing import Any
+from typing import Any, Literal, cast
 
 import anyio
 import anyio.abc
@@ -13,20 +15,30 @@ import paho.mqtt.client as mqtt
 import pytest
 from anyio import TASK_STATUS_IGNORED
 from anyio.abc import TaskStatus
-from paho.mqtt.enums import MQTTErrorCode
+from paho.mqtt.enums import CallbackAPIVersion, MQTTErrorCode
 from paho.mqtt.properties import Properties
+from paho.mqtt.reasoncodes import ReasonCode
 from paho.mqtt.subscribeoptions import SubscribeOptions
 
 from aiomqtt import (
     Client,
+    Message,
+    MqttBulkPublishError,
+    MqttCodeError,
     MqttError,
     MqttReentrantError,
+    OverflowPolicy,
     ProtocolVersion,
     TLSParameters,
+    TopicCache,
     Will,
 )
+from aiomqtt.client import _CallKind, _PahoClient
+from aiomqtt.native import NativeClient
 from aiomqtt.types import PayloadType
 
+from .broker import Broker
+
 # This is the same as marking all tests in this file with @pytest.mark.anyio
 pytestmark = pytest.mark.anyio
 
@@ -166,7 +178,7 @@ async def test_client_max_concurrent_outgoing_calls(
 ) -> None:
     topic = TOPIC_PREFIX + "max_concurrent_outgoing_calls"
 
-    class MockPahoClient(mqtt.Client):
+    class MockPahoClient(_PahoClient):
         def subscribe(
             self,
             topic: str
@@ -201,7 +213,7 @@ async def test_client_max_concurrent_outgoing_calls(
             assert client._outgoing_calls_sem.locked()
             return super().publish(topic, payload, qos, retain, properties)
 
-    monkeypatch.setattr(mqtt, "Client", MockPahoClient)
+    monkeypatch.setattr("aiomqtt.client._PahoClient", MockPahoClient)
 
     async with Client(HOSTNAME, max_concurrent_outgoing_calls=1) as client:
         await client.subscribe(topic)
@@ -251,7 +263,7 @@ async def test_client_pending_calls_threshold(
             (
                 "mqtt",
                 logging.WARNING,
-                f"There are {nb_publish} pending publish calls.",
+                f"There are {nb_publish} pending calls.",
             )
         ]
 
@@ -458,3 +470,588 @@ async def test_messages_view_len() -> None:
         for _ in range(count):
             await client.messages.__anext__()
         assert len(client.messages) == 0
+
+
+async def test_client_topic_cache() -> None:
+    """Test that incoming messages share topics through the client's topic cache."""
+    cache = TopicCache()
+    client = Client(HOSTNAME, topic_cache=cache)
+    assert client.topic_cache is cache
+    for topic in (b"a/b", b"a/b", b"c"):
+        client._on_message(client._client, None, mqtt.MQTTMessage(topic=topic))
+    messages = [client._stream.queue.get_nowait() for _ in range(3)]
+    assert messages[0].topic is messages[1].topic
+    assert messages[2].topic.value == "c"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+@pytest.mark.network
+async def test_client_subscription() -> None:
+    """Test that a subscription's messages bypass the client's message queue."""
+    topic = TOPIC_PREFIX + "test_client_subscription"
+    async with Client(HOSTNAME) as client:
+        async with client.subscription(topic) as messages:
+            await client.publish(topic, "foo")
+            message = await messages.__anext__()
+            assert message.payload == b"foo"
+            assert len(client.messages) == 0
+        assert len(client._subscription_streams) == 0
+
+
+async def test_messages_view_batches() -> None:
+    """Test that ``.messages.batches()`` drains queued messages and stops on error."""
+    client = Client(HOSTNAME)
+    for mid in range(5):
+        client._on_message(client._client, None, mqtt.MQTTMessage(mid, b"a"))
+    batches = client.messages.batches(max_size=2, max_wait=0.01)
+    sizes = [len(await batches.__anext__()) for _ in range(3)]
+    assert sizes == [2, 2, 1]
+    client._on_message(client._client, None, mqtt.MQTTMessage(5, b"a"))
+    client._disconnected.set_result(None)
+    # Messages that are already queued are still returned after disconnection
+    assert [message.mid for message in await batches.__anext__()] == [5]
+    with pytest.raises(MqttError):
+        await batches.__anext__()
+
+
+async def test_messages_view_waits_for_message_or_disconnection() -> None:
+    """Test that waiting consumers are woken up by messages and disconnection."""
+    client = Client(HOSTNAME)
+    task = asyncio.ensure_future(client.messages.__anext__())
+    await asyncio.sleep(0)
+    client._on_message(client._client, None, mqtt.MQTTMessage(1, b"a"))
+    assert (await task).mid == 1
+    # Cancelled consumers don't leave waiters behind
+    task = asyncio.ensure_future(client.messages.__anext__())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not client._stream.waiters
+    task = asyncio.ensure_future(client.messages.__anext__())
+    await asyncio.sleep(0)
+    client._disconnected.set_result(None)
+    with pytest.raises(MqttError):
+        await task
+
+
+async def test_client_subscription_demultiplexes_messages(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that subscriptions receive matching messages through their own queue."""
+    client = Client(HOSTNAME)
+    subscribe_calls: list[str] = []
+
+    async def subscribe(topic: str, *args: Any, **kwargs: Any) -> list[ReasonCode]:
+        subscribe_calls.append(topic)
+        return []
+
+    monkeypatch.setattr(client, "_subscribe", subscribe)
+    async with client.subscription("logs/#", max_queued_messages=1) as logs:
+        async with client.subscription("+/error") as errors:
+            for mid, topic in enumerate((b"logs/info", b"logs/error", b"control/x")):
+                client._on_message(client._client, None, mqtt.MQTTMessage(mid, topic))
+            # The queue of "logs/#" is full, so its copy of "logs/error" is discarded
+            assert (await logs.__anext__()).mid == 0
+            assert (await errors.__anext__()).mid == 1
+            assert (await client.messages.__anext__()).mid == 2  # noqa: PLR2004
+            assert len(logs) == len(errors) == len(client.messages) == 0
+        assert len(client._subscription_streams) == 1
+    assert subscribe_calls == ["logs/#", "+/error"]
+    assert len(client._subscription_streams) == 0
+
+
+async def test_client_subscription_shares_wildcard(broker: Broker) -> None:
+    """Test that a wildcard is unsubscribed from only when no one needs it anymore."""
+    async with Client("127.0.0.1", broker.port) as client:
+        subscriptions = broker.sessions[0].subscriptions
+        async with client.subscription("a/#") as messages:
+            async with client.subscription("a/#"):
+                pass
+            broker.route("a/b", b"x", 0)
+            message = await asyncio.wait_for(messages.__anext__(), 5)
+            assert message.payload == b"x"
+        assert "a/#" not in subscriptions
+        await client.subscribe("b")
+        async with client.subscription("b"):
+            pass
+        assert "b" in subscriptions
+        assert not client._subscription_counts
+
+
+async def test_client_subscription_after_new_session(broker: Broker) -> None:
+    """Test that subscribe() calls of a forgotten session don't keep wildcards."""
+    client = Client("127.0.0.1", broker.port)
+
+    async def lose_connection() -> None:
+        async with client:
+            await client.subscribe("a/#")
+            transport = broker.sessions[-1].transport
+            assert transport is not None
+            transport.close()
+            await client._disconnected
+
+    with pytest.raises(MqttError):
+        await lose_connection()
+    # The broker doesn't resume the session, so "a/#" is no longer subscribed to
+    async with client:
+        subscriptions = broker.sessions[-1].subscriptions
+        async with client.subscription("a/#"):
+            assert "a/#" in subscriptions
+        assert "a/#" not in subscriptions
+
+
+async def test_client_message_callbacks(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that callbacks receive their messages directly and survive errors."""
+    client = Client(HOSTNAME)
+    received: list[tuple[str, int]] = []
+
+    def handle(message: Message) -> None:
+        received.append(("sync", message.mid))
+        if message.mid == 1:
+            msg = "sync failure"
+            raise RuntimeError(msg)
+
+    async def handle_async(message: Message) -> None:
+        received.append(("async", message.mid))
+        await asyncio.sleep(0)
+        if message.mid == 1:
+            msg = "async failure"
+            raise RuntimeError(msg)
+
+    client.add_message_callback("control/#", handle)
+    client.add_message_callback("control/+", handle_async)
+    for mid, topic in enumerate((b"control/a", b"control/b", b"data/c")):
+        client._on_message(client._client, None, mqtt.MQTTMessage(mid, topic))
+    # Synchronous callbacks run right away, exceptions don't stop delivery
+    assert received[:2] == [("sync", 0), ("sync", 1)]
+    assert len(client.messages) == 1
+    await asyncio.sleep(0.01)
+    assert sorted(received) == [("async", 0), ("async", 1), ("sync", 0), ("sync", 1)]
+    assert not client._callback_tasks
+    errors = [record.getMessage() for record in caplog.records]
+    assert len(errors) == 2  # noqa: PLR2004
+    client.remove_message_callback("control/#", handle)
+    client.remove_message_callback("control/+", handle_async)
+    with pytest.raises(KeyError):
+        client.remove_message_callback("control/+", handle_async)
+    client._on_message(client._client, None, mqtt.MQTTMessage(3, b"control/a"))
+    assert [(await client.messages.__anext__()).mid for _ in range(2)] == [2, 3]
+
+
+@pytest.mark.parametrize("engine", ["paho", "native"])
+async def test_client_message_callbacks_publish(
+    broker: Broker, engine: Literal["paho", "native"]
+) -> None:
+    """Test that coroutine callbacks can publish the answer right away."""
+    async with Client("127.0.0.1", broker.port, engine=engine) as client:
+
+        async def echo(message: Message) -> None:
+            await client.publish("reply", message.payload)
+
+        client.add_message_callback("request", echo)
+        await client.subscribe("request")
+        await client.subscribe("reply")
+        await client.publish("request", b"ping")
+        message = await asyncio.wait_for(client.messages.__anext__(), 5)
+        assert (str(message.topic), message.payload) == ("reply", b"ping")
+
+
+async def test_client_message_callbacks_cancelled_on_exit(broker: Broker) -> None:
+    """Test that coroutine callbacks don't outlive the client's context manager."""
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def handle(message: Message) -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async with Client("127.0.0.1", broker.port) as client:
+        client.add_message_callback("a", handle)
+        await client.subscribe("a")
+        broker.route("a", b"x", 0)
+        await asyncio.wait_for(started.wait(), 5)
+    assert cancelled.is_set()
+    assert not client._callback_tasks
+
+
+@pytest.mark.parametrize(
+    "policy, mids",
+    [
+        (OverflowPolicy.DROP_NEWEST, [0, 1]),
+        (OverflowPolicy.DROP_OLDEST, [1, 2]),
+        (OverflowPolicy.CONFLATE, [2, 1]),
+    ],
+)
+async def test_client_overflow_policy(
+    policy: OverflowPolicy,
+    mids: list[int],
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that overflow policies pick the right messages and summarize drops."""
+    monkeypatch.setattr("aiomqtt.client.DROPPED_MESSAGES_REPORT_INTERVAL", 0)
+    client = Client(HOSTNAME, max_queued_incoming_messages=2, overflow_policy=policy)
+    for mid, topic in enumerate((b"a", b"b", b"a")):
+        client._on_message(client._client, None, mqtt.MQTTMessage(mid, topic))
+    assert [client._stream.get().mid for _ in mids] == mids
+    assert client.dropped_messages == 1
+    await asyncio.sleep(0.01)
+    assert caplog.record_tuples == [
+        (
+            "mqtt",
+            logging.WARNING,
+            "Message queue is full. Discarded 1 messages in the last 0 seconds.",
+        )
+    ]
+
+
+async def test_client_conflate_below_capacity() -> None:
+    """Test that conflation keeps one message per topic also when there is room."""
+    client = Client(HOSTNAME, overflow_policy=OverflowPolicy.CONFLATE)
+    # The topic is not validated to conflate messages
+    for mid, topic in enumerate((b"a", b"b", b"a", b"a/#")):
+        client._on_message(client._client, None, mqtt.MQTTMessage(mid, topic))
+    assert len(client.messages) == 3  # noqa: PLR2004
+    assert [client._stream.get().mid for _ in range(3)] == [2, 1, 3]
+    assert not client._stream.latest
+    assert client.dropped_messages == 0
+
+
+async def test_client_incoming_backpressure() -> None:
+    """Test that reading pauses at the high-water mark and resumes at the low one."""
+    client = Client(HOSTNAME, incoming_high_water=3, incoming_low_water=1)
+    reader, writer = socket.socketpair()
+    client._reader = (reader.fileno(), lambda: None)
+    client._loop.add_reader(*client._reader)
+    try:
+        for mid in range(3):
+            assert not client._reading_paused
+            client._on_message(client._client, None, mqtt.MQTTMessage(mid, b"a"))
+        assert client._reading_paused
+        # The reader is no longer registered
+        assert not client._loop.remove_reader(reader.fileno())
+        await client.messages.__anext__()
+        assert client._reading_paused
+        await client.messages.__anext__()
+        assert not client._reading_paused
+        assert client._loop.remove_reader(reader.fileno())
+    finally:
+        reader.close()
+        writer.close()
+    with pytest.raises(ValueError, match="incoming_low_water"):
+        Client(HOSTNAME, incoming_high_water=1, incoming_low_water=1)
+    with pytest.raises(ValueError, match="incoming_high_water"):
+        Client(HOSTNAME, max_queued_incoming_messages=2, incoming_high_water=3)
+    client = Client(HOSTNAME, max_queued_incoming_messages=2, incoming_high_water=2)
+    # The same applies to the queues of subscriptions
+    with pytest.raises(ValueError, match="incoming_high_water"):
+        async with client.subscription("a/#", max_queued_messages=1):
+            pass
+    assert len(client._subscription_streams) == 0
+
+
+async def test_client_publish_many(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that bulk publishing waits for all acks and reports the failures."""
+    client = Client(HOSTNAME)
+    infos: list[mqtt.MQTTMessageInfo] = []
+
+    def publish(*args: Any) -> mqtt.MQTTMessageInfo:
+        info = mqtt.MQTTMessageInfo(len(infos) + 1)
+        # Reject the second message right away
+        if len(infos) == 1:
+            info.rc = MQTTErrorCode.MQTT_ERR_NO_CONN
+        infos.append(info)
+        return info
+
+    def acknowledge(mid: int) -> None:
+        properties: Any = None
+        client._on_publish(client._client, None, mid, ReasonCode(4), properties)
+
+    monkeypatch.setattr(client._client, "publish", publish)
+    messages = [("a", "foo"), ("b", "bar"), ("c", "baz")]
+    task = asyncio.create_task(client.publish_many(messages[:1], qos=1))
+    await anyio.wait_all_tasks_blocked()
+    acknowledge(1)
+    await task
+    infos.clear()
+    task = asyncio.create_task(client.publish_many(messages, qos=1, timeout=0.1))
+    await anyio.wait_all_tasks_blocked()
+    acknowledge(1)
+    with pytest.raises(MqttBulkPublishError) as exc_info:
+        await task
+    assert list(exc_info.value.failed) == [1, 2]
+    assert str(exc_info.value.failed[2]) == "Operation timed out"
+    assert client.in_flight.total == 0
+
+
+@pytest.mark.network
+async def test_client_publish_many_network() -> None:
+    topic = TOPIC_PREFIX + "publish_many"
+    async with Client(HOSTNAME) as client:
+        await client.subscribe(topic, qos=1)
+        await client.publish_many([(topic, n) for n in range(10)], qos=1)
+        payloads = [(await client.messages.__anext__()).payload for _ in range(10)]
+        assert payloads == [str(n).encode() for n in range(10)]
+
+
+async def test_client_deadlines() -> None:
+    """Test that one deadline heap times out pending calls in order."""
+    client = Client(HOSTNAME)
+    futures: list[asyncio.Future[int]] = [
+        client._loop.create_future() for _ in range(3)
+    ]
+    tasks = [
+        asyncio.create_task(client._wait_for(fut, timeout=timeout))
+        for fut, timeout in zip(futures, (0.05, 0.01, 10))
+    ]
+    await asyncio.sleep(0)
+    assert len(client._deadlines) == len(futures)
+    futures[2].set_result(2)
+    assert await tasks[2] == 2  # noqa: PLR2004
+    with pytest.raises(MqttError, match="Operation timed out"):
+        await tasks[1]
+    assert not tasks[0].done()
+    with pytest.raises(MqttError, match="Operation timed out"):
+        await tasks[0]
+    assert len(client._deadlines) == 0
+    assert client._deadlines._timer is None
+
+
+async def test_client_in_flight(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the metrics of pending calls and the threshold warning."""
+    client = Client(HOSTNAME)
+    client.pending_calls_threshold = 2
+    futures: list[asyncio.Future[None]] = [
+        client._loop.create_future() for _ in range(4)
+    ]
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(client._pending_call(1, _CallKind.SUBSCRIBE, futures[0]))
+        for mid, fut in enumerate(futures[1:], start=2):
+            stack.enter_context(client._pending_call(mid, _CallKind.PUBLISH, fut))
+        with pytest.raises(RuntimeError):
+            stack.enter_context(client._pending_call(1, _CallKind.PUBLISH, futures[0]))
+        stats = client.in_flight
+        assert (stats.subscribes, stats.publishes, stats.total) == (1, 3, 4)
+        assert stats.oldest_age is not None
+        # Acknowledge one call and abandon the others
+        client._on_publish(client._client, None, 2, ReasonCode(4), cast("Any", None))
+        assert futures[1].done()
+    stats = client.in_flight
+    assert stats.total == 0
+    assert stats.oldest_age is None
+    assert sum(stats.latency_histogram.values()) == 1
+    # Warn once per threshold crossing instead of for every call above it
+    assert caplog.messages == ["There are 3 pending calls."]
+
+
+async def test_client_connect_on_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that connecting doesn't block an executor thread."""
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await reader.read(1024)
+        # CONNACK with return code 0
+        writer.write(b"\x20\x02\x00\x00")
+        await reader.read(1024)
+        writer.close()
+
+    def run_in_executor(*args: Any) -> None:
+        pytest.fail("connect() must not run in an executor")
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(asyncio.get_running_loop(), "run_in_executor", run_in_executor)
+    async with server, Client("127.0.0.1", port) as client:
+        assert client._client.is_connected()
+    with pytest.raises(MqttError):
+        async with Client("127.0.0.1", port):
+            pass
+
+
+async def test_client_keepalive_timer() -> None:
+    """Test that keepalive checks are scheduled at the deadline instead of polled."""
+    packets: asyncio.Queue[bytes] = asyncio.Queue()
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await reader.read(1024)
+        # CONNACK with return code 0
+        writer.write(b"\x20\x02\x00\x00")
+        while data := await reader.read(1024):
+            await packets.put(data)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        client = Client("127.0.0.1", port, keepalive=1)
+        await client.__aenter__()
+        timer = client._keepalive_timer
+        assert timer is not None
+        assert timer.when() - client._loop.time() > 0.9  # noqa: PLR2004
+        # The broker doesn't answer the PINGREQ, so the connection times out
+        assert await asyncio.wait_for(packets.get(), 2) == b"\xc0\x00"
+        with pytest.raises(MqttCodeError):
+            await asyncio.wait_for(client._disconnected, 2)
+        assert client._keepalive_timer is None
+
+
+async def test_client_coalesces_writes(broker: Broker) -> None:
+    """Test that the packets of one event loop iteration are sent together."""
+    sends = 0
+    async with Client("127.0.0.1", broker.port) as client:
+        paho = client._client
+        send = paho._sock_send
+
+        def counting(buf: bytes) -> int:
+            nonlocal sends
+            sends += 1
+            return send(buf)
+
+        paho._sock_send = counting  # type: ignore[method-assign]
+        await client.publish_many([("a", n) for n in range(100)])
+        assert sends == 1
+        while broker.published < 100:  # noqa: PLR2004
+            await asyncio.sleep(0.01)
+
+
+def test_paho_io_internals_match() -> None:
+    """Test that paho-mqtt's private read and write path is the one we override."""
+    paho = _PahoClient(CallbackAPIVersion.VERSION2)
+    assert paho.replaces_io, "paho-mqtt's internals changed, update _PahoClient"
+
+
+async def test_client_paho_io_fallback(
+    broker: Broker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the client falls back to paho-mqtt's own reads and writes."""
+    monkeypatch.setattr("aiomqtt.client._paho_io_internals_match", lambda client: False)
+    async with Client("127.0.0.1", broker.port, max_packets_per_read=16) as client:
+        assert not cast("_PahoClient", client._client).replaces_io
+        await client.subscribe("a", qos=1)
+        await client.publish_many([("a", n) for n in range(10)], qos=1)
+        payloads = [
+            (await asyncio.wait_for(client.messages.__anext__(), 5)).payload
+            for _ in range(10)
+        ]
+        assert payloads == [str(n).encode() for n in range(10)]
+
+
+def test_paho_client_partial_writes() -> None:
+    """Test that partially written batches of packets are resumed."""
+    paho = _PahoClient(CallbackAPIVersion.VERSION2)
+    published: list[int] = []
+    paho.on_publish = lambda client, userdata, mid, rc, properties: published.append(
+        mid
+    )
+    sent: list[bytes] = []
+    results: list[int | Exception] = [3, BlockingIOError(), 2]
+
+    def send(buf: bytes) -> int:
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        sent.append(buf[:result])
+        return result
+
+    paho._sock = socket.socket()
+    paho._sock_send = send  # type: ignore[method-assign]
+    for mid, packet in ((1, b"ab"), (2, b"cde")):
+        paho._out_packet.append(
+            {
+                "command": mqtt.PUBLISH,
+                "mid": mid,
+                "qos": 0,
+                "pos": 0,
+                "to_process": len(packet),
+                "packet": packet,
+                "info": mqtt.MQTTMessageInfo(mid),
+            }
+        )
+    paho._last_msg_out = 0
+    assert paho._packet_write() == MQTTErrorCode.MQTT_ERR_AGAIN
+    assert published == [1]
+    # The partial write counts as outgoing traffic for the keepalive
+    last_msg_out = paho._last_msg_out
+    assert last_msg_out > 0
+    assert paho._packet_write() == MQTTErrorCode.MQTT_ERR_SUCCESS
+    assert paho._last_msg_out >= last_msg_out
+    assert published == [1, 2]
+    assert sent == [b"abc", b"de"]
+    assert not paho._out_packet
+    paho._sock_close()
+
+
+@pytest.mark.parametrize("engine", ["paho", "native"])
+async def test_client_eager_writes(
+    broker: Broker, engine: Literal["paho", "native"]
+) -> None:
+    """Test that eager writes go out right away instead of at the next iteration."""
+    for eager_writes in (False, True):
+        async with Client(
+            "127.0.0.1", broker.port, engine=engine, eager_writes=eager_writes
+        ) as client:
+            await client.subscribe("a")
+            published = broker.published
+            info = client._client.publish("a", b"x")
+            if engine == "paho":
+                assert info.is_published() is eager_writes
+            else:
+                connection = cast("NativeClient", client._client)._connection
+                assert connection is not None
+                assert bool(connection._outgoing) is not eager_writes
+            message = await asyncio.wait_for(client.messages.__anext__(), 5)
+            assert message.payload == b"x"
+            assert broker.published == published + 1
+
+
+@pytest.mark.parametrize(
+    "max_packets_per_read, max_bytes_per_read", [(1, None), (10, None), (100, 50)]
+)
+async def test_client_burst_reads(
+    broker: Broker, max_packets_per_read: int, max_bytes_per_read: int | None
+) -> None:
+    """Test that bursts of messages are read in batches within the budget."""
+    async with Client(
+        "127.0.0.1",
+        broker.port,
+        max_packets_per_read=max_packets_per_read,
+        max_bytes_per_read=max_bytes_per_read,
+    ) as client:
+        await client.subscribe("burst")
+        paho = client._client
+        assert isinstance(paho, _PahoClient)
+        # Number of read_packet() calls per readiness event
+        bursts: list[int] = []
+        read_burst = client._read_burst
+        read_packet = paho.read_packet
+
+        def counting_read_burst(client: _PahoClient) -> None:
+            bursts.append(0)
+            read_burst(client)
+
+        def counting_read_packet() -> bool:
+            bursts[-1] += 1
+            return read_packet()
+
+        client._read_burst = counting_read_burst  # type: ignore[method-assign]
+        paho.read_packet = counting_read_packet  # type: ignore[method-assign]
+        for n in range(100):
+            broker.route("burst", str(n).encode(), 0)
+        payloads = [
+            (await asyncio.wait_for(client.messages.__anext__(), 5)).payload
+            for _ in range(100)
+        ]
+        assert payloads == [str(n).encode() for n in range(100)]
+        # Each message is 10-11 bytes long. The last call of a burst may find no data.
+        budget = max_packets_per_read if max_bytes_per_read is None else 5
+        assert max(bursts) <= budget + 1
+        if max_packets_per_read > 1:
+            assert len(bursts) < 100  # noqa: PLR2004
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import pickle
+
+import paho.mqtt.client as mqtt
+import pytest
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from aiomqtt import Client, CodecRegistry, JSONCodec, Message, StructCodec
+from aiomqtt.codecs import _encode_payload
+
+from .broker import Broker
+
+pytestmark = pytest.mark.anyio
+
+
+def test_codecs() -> None:
+    codec = JSONCodec()
+    assert codec.encode({"a": [1, "ü"]}) == '{"a":[1,"ü"]}'.encode()
+    assert codec.decode(b'{"a": [1, "\\u00fc"]}') == {"a": [1, "ü"]}
+    binary = StructCodec("<Hf", fields=("id", "value"))
+    assert binary.decode(binary.encode({"id": 7, "value": 0.5})) == {
+        "id": 7,
+        "value": 0.5,
+    }
+    assert StructCodec("<Hf").decode(binary.encode((7, 0.5))) == (7, 0.5)
+    with pytest.raises(ValueError, match="number of fields"):
+        StructCodec("<Hf", fields=("id",))
+
+
+def test_codec_registry_match() -> None:
+    json_codec = JSONCodec()
+    binary = StructCodec("<I", content_type="application/x-counter")
+    codecs = CodecRegistry([("sensors/+/json", json_codec), ("sensors/#", binary)])
+    assert codecs.match("sensors/1/json") is json_codec
+    assert codecs.match("sensors/1/raw") is binary
+    assert codecs.match("other") is None
+    # Topics that are strings are not validated
+    assert codecs.match("sensors/+/json") is json_codec
+    # The content type takes precedence over the topic
+    assert codecs.match("sensors/1/json", "application/x-counter") is binary
+    assert codecs.match("other", "application/json") is json_codec
+    assert codecs.match("other", "text/plain") is None
+    # Adding a codec invalidates the remembered matches
+    other = JSONCodec(content_type=None)
+    codecs.add("other", other)
+    assert codecs.match("other") is other
+
+
+def test_encode_payload_content_type() -> None:
+    codecs = CodecRegistry([("json/#", JSONCodec())])
+    properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    properties.UserProperty = ("key", "value")
+    payload, encoded = _encode_payload(codecs, "json/a", [1], properties, v5=True)
+    assert payload == b"[1]"
+    assert getattr(encoded, "ContentType", None) == "application/json"
+    assert getattr(encoded, "UserProperty", None) == [("key", "value")]
+    # The caller's properties are left alone
+    assert not hasattr(properties, "ContentType")
+    _, encoded = _encode_payload(codecs, "json/a", [1], None, v5=True)
+    assert getattr(encoded, "ContentType", None) == "application/json"
+    assert _encode_payload(codecs, "json/a", [1], None, v5=False) == (b"[1]", None)
+    # Ready-made payloads are published as they are
+    assert _encode_payload(codecs, "json/a", b"[", None, v5=True) == (b"[", None)
+
+
+def test_message_decoded() -> None:
+    codecs = CodecRegistry([("json/#", JSONCodec())])
+    paho_message = mqtt.MQTTMessage(topic=b"other")
+    paho_message.payload = b'{"a": 1}'
+    properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    properties.ContentType = "application/json"
+    paho_message.properties = properties
+    message = Message._from_paho_message(paho_message, None, codecs)  # noqa: SLF001
+    # The payload is decoded once and then cached
+    assert message.decoded == {"a": 1}
+    assert message.decoded is message.decoded
+    assert pickle.loads(pickle.dumps(message)).decoded == {"a": 1}  # noqa: S301
+    paho_message.properties = None
+    message = Message._from_paho_message(paho_message, None, codecs)  # noqa: SLF001
+    assert message.decoded == b'{"a": 1}'
+    paho_message = mqtt.MQTTMessage(topic=b"json/a")
+    paho_message.payload = b'{"a": 1}'
+    message = Message._from_paho_message(paho_message, None, codecs)  # noqa: SLF001
+    assert pickle.loads(pickle.dumps(message)).decoded == {"a": 1}  # noqa: S301
+    assert Message("json/a", b"[1]", 0, False, 0, None).decoded == b"[1]"
+
+
+async def test_client_codecs(broker: Broker) -> None:
+    codecs = CodecRegistry(
+        [
+            ("sensors/+/json", JSONCodec()),
+            ("sensors/+/binary", StructCodec("<Hd", fields=("id", "value"))),
+        ]
+    )
+    async with Client("127.0.0.1", broker.port, codecs=codecs) as client:
+        assert client.codecs is codecs
+        await client.subscribe("sensors/#")
+        await client.publish("sensors/1/json", {"value": 28.4})
+        await client.publish_many(
+            [
+                ("sensors/1/binary", {"id": 1, "value": 28.4}),
+                ("sensors/1/json", b"[1, 2]"),
+                ("sensors/1/text", "28.4"),
+            ]
+        )
+        iterator = client.messages
+        received = [
+            (await asyncio.wait_for(iterator.__anext__(), 5)).decoded for _ in range(4)
+        ]
+    assert received == [
+        {"value": 28.4},
+        {"id": 1, "value": 28.4},
+        [1, 2],
+        b"28.4",
+    ]
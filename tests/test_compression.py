@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Literal
+
+import pytest
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from aiomqtt import (
+    Client,
+    CodecRegistry,
+    Compression,
+    JSONCodec,
+    ProtocolVersion,
+)
+from aiomqtt.compression import _compress_payload, _decompress_payload
+
+from .broker import Broker
+
+pytestmark = pytest.mark.anyio
+
+PAYLOAD = json.dumps([{"sensor": n, "status": "ok"} for n in range(50)]).encode()
+
+
+@pytest.mark.parametrize("algorithm", ["zlib", "lzma", "bz2"])
+def test_compression_round_trip(algorithm: str) -> None:
+    compression = Compression(algorithm, threshold=100)  # type: ignore[arg-type]
+    properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    properties.ContentType = "application/json"
+    payload, marked = _compress_payload(compression, PAYLOAD, properties)
+    assert isinstance(payload, bytes)
+    assert len(payload) < len(PAYLOAD)
+    assert getattr(marked, "UserProperty", None) == [("content-encoding", algorithm)]
+    assert getattr(marked, "ContentType", None) == "application/json"
+    # The caller's properties are left alone
+    assert not hasattr(properties, "UserProperty")
+    assert _decompress_payload(payload, marked) == PAYLOAD
+
+
+async def test_compression_threshold_and_invalid_payloads() -> None:
+    compression = Compression(threshold=100)
+    assert _compress_payload(compression, "short", None) == (b"short", None)
+    assert _compress_payload(compression, None, None) == (None, None)
+    _, marked = _compress_payload(compression, PAYLOAD, None)
+    # Corrupt payloads and unknown algorithms are left as they are
+    assert _decompress_payload(b"corrupt", marked) == b"corrupt"
+    unknown = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    unknown.UserProperty = ("content-encoding", "br")
+    assert _decompress_payload(b"data", unknown) == b"data"
+    with pytest.raises(ValueError, match="Unknown compression algorithm"):
+        Compression("gzip")  # type: ignore[arg-type]
+    with pytest.raises(ValueError, match="requires MQTT v5.0"):
+        Client("127.0.0.1", compression=compression)
+
+
+@pytest.mark.parametrize("engine", ["paho", "native"])
+async def test_client_compression(
+    broker: Broker, engine: Literal["paho", "native"]
+) -> None:
+    async with Client(
+        "127.0.0.1",
+        broker.port,
+        protocol=ProtocolVersion.V5,
+        engine=engine,
+        codecs=CodecRegistry([("json/#", JSONCodec())]),
+        compression=Compression(threshold=100),
+    ) as client:
+        await client.subscribe("#")
+        value = json.loads(PAYLOAD)
+        await client.publish("json/a", value)
+        await client.publish_many([("raw", PAYLOAD), ("raw", b"short")])
+        iterator = client.messages
+        messages = [await asyncio.wait_for(iterator.__anext__(), 5) for _ in range(3)]
+    assert messages[0].decoded == value
+    assert [message.payload for message in messages[1:]] == [PAYLOAD, b"short"]
+    assert getattr(messages[1].properties, "UserProperty", None) == [
+        ("content-encoding", "zlib")
+    ]
+    assert not hasattr(messages[2].properties, "UserProperty")
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from aiomqtt import Message, Topic, TopicCache
+
+
+def test_message_has_no_instance_dict() -> None:
+    """Test that messages are slotted to save memory when many are queued."""
+    message = Message("a/b", b"payload", qos=1, retain=False, mid=1, properties=None)
+    assert not hasattr(message, "__dict__")
+    assert message.topic == Topic("a/b")
+
+
+def test_message_from_paho_message_converts_topic_lazily() -> None:
+    """Test that the topic of an incoming message is validated on first access."""
+    cache = TopicCache()
+    paho_message = mqtt.MQTTMessage(mid=2, topic=b"a/b")
+    paho_message.payload = b"payload"
+    message = Message._from_paho_message(paho_message, cache)  # noqa: SLF001
+    assert message.payload == b"payload"
+    assert message.properties is None
+    assert cache.misses == 0
+    assert message.topic is cache.get("a/b")
+    assert message.topic is message.topic
+    message.topic = "c"  # type: ignore[assignment]
+    assert message.topic == Topic("c")
+
+
+def test_message_from_paho_message_invalid_topic() -> None:
+    """Test that an invalid topic raises when it's accessed."""
+    message = Message._from_paho_message(mqtt.MQTTMessage(topic=b"a/+"))  # noqa: SLF001
+    with pytest.raises(ValueError, match="Invalid topic: "):
+        _ = message.topic
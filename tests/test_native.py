@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+
+import pytest
+
+from aiomqtt import Client, MqttCodeError, MqttError, ProtocolVersion
+from aiomqtt.native import (
+    CONNACK,
+    CONNECT,
+    DISCONNECT,
+    PUBACK,
+    PUBLISH,
+    SUBACK,
+    SUBSCRIBE,
+    MalformedPacketError,
+    decode_remaining_length,
+    encode_packet,
+    encode_publish,
+    encode_remaining_length,
+)
+
+pytestmark = pytest.mark.anyio
+
+_UINT16 = struct.Struct("!H")
+
+
+@pytest.mark.parametrize(
+    "length, encoded",
+    [
+        (0, b"\x00"),
+        (127, b"\x7f"),
+        (128, b"\x80\x01"),
+        (16383, b"\xff\x7f"),
+        (16384, b"\x80\x80\x01"),
+        (268435455, b"\xff\xff\xff\x7f"),
+    ],
+)
+def test_remaining_length(length: int, encoded: bytes) -> None:
+    assert encode_remaining_length(length) == encoded
+    assert decode_remaining_length(b"\x30" + encoded, 1) == (length, 1 + len(encoded))
+
+
+def test_remaining_length_incomplete_and_malformed() -> None:
+    assert decode_remaining_length(b"\x30\x80", 1)[0] == -1
+    with pytest.raises(MalformedPacketError):
+        decode_remaining_length(b"\x30\xff\xff\xff\xff\x01", 1)
+
+
+def test_encode_publish() -> None:
+    packet = encode_publish(b"a/b", b"hi", 1, True, 7, None)
+    assert packet == b"\x33\x09\x00\x03a/b\x00\x07hi"
+    packet = encode_publish(b"a/b", b"", 0, False, 7, b"\x00")
+    assert packet == b"\x30\x06\x00\x03a/b\x00"
+
+
+class _ScriptedBroker:
+    """Records the packets that the client sends and answers with canned replies."""
+
+    def __init__(self) -> None:
+        self.packets: asyncio.Queue[tuple[int, bytes]] = asyncio.Queue()
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.writer = writer
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                length = multiplier = 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) << multiplier
+                    multiplier += 7
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                if header & 0xF0 == CONNECT:
+                    writer.write(encode_packet(CONNACK, b"\x00\x00"))
+                await self.packets.put((header, body))
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    async def expect(self, packet_type: int) -> bytes:
+        header, body = await asyncio.wait_for(self.packets.get(), 5)
+        assert header & 0xF0 == packet_type
+        return body
+
+    def send(self, packet: bytes) -> None:
+        assert self.writer is not None
+        self.writer.write(packet)
+
+
+async def test_native_engine() -> None:
+    broker = _ScriptedBroker()
+    server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, Client(
+        "127.0.0.1", port, protocol=ProtocolVersion.V311, engine="native"
+    ) as client:
+        await broker.expect(CONNECT)
+        # Subscribe
+        subscribe = asyncio.create_task(client.subscribe("a/#", qos=1))
+        body = await broker.expect(SUBSCRIBE)
+        assert body[2:] == b"\x00\x03a/#\x01"
+        broker.send(encode_packet(SUBACK, body[:2], b"\x01"))
+        assert list(await subscribe) == [1]
+        # Receive a QoS 1 message, which is acknowledged after delivery
+        broker.send(encode_publish(b"a/b", b"hello", 1, False, 42, None))
+        message = await client.messages.__anext__()
+        assert (message.topic.value, message.payload, message.qos) == (
+            "a/b",
+            b"hello",
+            1,
+        )
+        assert await broker.expect(PUBACK) == _UINT16.pack(42)
+        # Publish a QoS 1 message
+        publish = asyncio.create_task(client.publish("a/c", 28.4, qos=1))
+        body = await broker.expect(PUBLISH)
+        assert body[:5] == b"\x00\x03a/c"
+        assert body[7:] == b"28.4"
+        assert client.in_flight.publishes == 1
+        broker.send(struct.pack("!BBH", PUBACK, 2, _UINT16.unpack_from(body, 5)[0]))
+        await publish
+        assert client.in_flight.total == 0
+    await broker.expect(DISCONNECT)
+
+
+async def test_native_engine_malformed_packet() -> None:
+    broker = _ScriptedBroker()
+    server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        client = Client("127.0.0.1", port, engine="native")
+        await client.__aenter__()
+        await broker.expect(CONNECT)
+        # A remaining length that is longer than four bytes
+        broker.send(b"\x30\xff\xff\xff\xff\x01")
+        with pytest.raises(MqttError):
+            await asyncio.wait_for(client.messages.__anext__(), 5)
+        with pytest.raises(MqttCodeError) as exc_info:
+            await client._disconnected  # noqa: SLF001
+        assert str(exc_info.value.rc) == "Malformed packet"
+
+
+async def test_native_engine_callback_error(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that errors of callbacks are logged instead of closing the connection."""
+    broker = _ScriptedBroker()
+    server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, Client("127.0.0.1", port, engine="native") as client:
+        await broker.expect(CONNECT)
+
+        def on_message(*args: object) -> None:
+            raise IndexError
+
+        client._client.on_message = on_message  # noqa: SLF001
+        broker.send(encode_publish(b"a/b", b"hello", 1, False, 42, None))
+        # The message is still acknowledged and the connection stays open
+        assert await broker.expect(PUBACK) == _UINT16.pack(42)
+        assert not client._disconnected.done()  # noqa: SLF001
+        assert "Caught exception in on_message" in caplog.text
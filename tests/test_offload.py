@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import pickle
+import threading
+import time
+
+import pytest
+
+from aiomqtt import ExecutorDispatcher, Message
+
+pytestmark = pytest.mark.anyio
+
+
+def message(topic: str, payload: int) -> Message:
+    return Message(topic, payload, 0, False, payload, None)
+
+
+def payload_length(message: Message) -> int:
+    return len(str(message.payload))
+
+
+def test_message_pickle() -> None:
+    original = message("a/b", 1)
+    copy = pickle.loads(pickle.dumps(original))  # noqa: S301
+    assert copy.topic.value == "a/b"
+    assert (copy.payload, copy.mid) == (1, 1)
+
+
+async def test_executor_dispatcher_order_and_backpressure() -> None:
+    handled: dict[str, list[int]] = {"a": [], "b": []}
+    release = threading.Event()
+
+    def handle(message: Message) -> None:
+        release.wait()
+        # Handle later messages faster to provoke reordering
+        time.sleep(0.01 / (message.mid + 1))
+        handled[message.topic.value].append(message.mid)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        dispatcher = ExecutorDispatcher(executor, handle, max_pending=6)
+        async with dispatcher:
+            for mid in range(6):
+                await dispatcher.submit(message("ab"[mid % 2], mid))
+            assert dispatcher.pending == 6  # noqa: PLR2004
+            # The dispatcher is full, so the next message has to wait
+            blocked = asyncio.create_task(dispatcher.submit(message("a", 6)))
+            await asyncio.sleep(0.05)
+            assert not blocked.done()
+            release.set()
+            await blocked
+        assert dispatcher.pending == 0
+    # Messages with the same key are handled in order
+    assert handled == {"a": [0, 2, 4, 6], "b": [1, 3, 5]}
+    assert (dispatcher.handled, dispatcher.failed) == (7, 0)
+
+
+async def test_executor_dispatcher_process_pool() -> None:
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(2, mp_context=context) as executor:
+        dispatcher = ExecutorDispatcher(executor, payload_length, key=lambda _: 0)
+        async with dispatcher:
+            await dispatcher.submit(message("a", 10))
+            await dispatcher.submit(message("b", None))  # type: ignore[arg-type]
+    assert (dispatcher.handled, dispatcher.failed) == (2, 0)
+
+
+async def test_executor_dispatcher_failure() -> None:
+    def handle(message: Message) -> None:
+        raise ValueError
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        async with ExecutorDispatcher(executor, handle) as dispatcher:
+            await dispatcher.submit(message("a", 0))
+    assert (dispatcher.handled, dispatcher.failed) == (1, 1)
+    with pytest.raises(TypeError):
+        ExecutorDispatcher(executor, dispatcher.join)  # type: ignore[arg-type]
+
+
+async def test_executor_dispatcher_rolls_back_on_errors() -> None:
+    release = threading.Event()
+
+    def key(message: Message) -> str:
+        if message.mid < 0:
+            raise ValueError
+        return message.topic.value
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        dispatcher = ExecutorDispatcher(
+            executor, lambda _: release.wait(), key=key, max_pending=3
+        )
+        async with dispatcher:
+            # The key function fails
+            await dispatcher.submit(message("a", -1))
+            assert dispatcher.pending == 0
+            # The executor is shut down while messages wait for their predecessor
+            for mid in range(3):
+                await dispatcher.submit(message("a", mid))
+            executor.shutdown(wait=False)
+            release.set()
+        assert dispatcher.pending == 0
+        assert not dispatcher._waiting  # noqa: SLF001
+        # The executor is already shut down when the message is submitted
+        async with dispatcher:
+            await dispatcher.submit(message("b", 3))
+    assert (dispatcher.handled, dispatcher.failed) == (1, 4)
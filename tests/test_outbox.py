@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import pathlib
+from typing import Literal, cast
+
+import pytest
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from aiomqtt import Client, MqttError, Outbox, OverflowPolicy, ProtocolVersion
+from aiomqtt.outbox import _Entry
+
+from .broker import Broker
+
+pytestmark = pytest.mark.anyio
+
+
+def append(  # noqa: PLR0913
+    outbox: Outbox,
+    topic: str,
+    payload: bytes,
+    qos: int = 1,
+    retain: bool = False,
+    properties: Properties | None = None,
+) -> int | None:
+    return outbox._append(topic, payload, qos, retain, properties, sent_up_to=0)  # noqa: SLF001
+
+
+def entries(outbox: Outbox) -> list[_Entry]:
+    return list(outbox._entries())  # noqa: SLF001
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        (OverflowPolicy.DROP_NEWEST, [("a", b"1"), ("b", b"2"), ("a", b"3")]),
+        (OverflowPolicy.DROP_OLDEST, [("b", b"2"), ("a", b"3"), ("b", b"4")]),
+        (OverflowPolicy.CONFLATE, [("a", b"1"), ("b", b"4"), ("a", b"3")]),
+    ],
+)
+def test_outbox_overflow_policy(
+    tmp_path: pathlib.Path,
+    policy: OverflowPolicy,
+    expected: list[tuple[str, bytes]],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    with Outbox(
+        tmp_path / "outbox.db", max_messages=3, overflow_policy=policy
+    ) as outbox:
+        for payload, topic in enumerate("abab", start=1):
+            append(outbox, topic, str(payload).encode())
+        assert [(entry.topic, entry.payload) for entry in entries(outbox)] == expected
+        assert len(outbox) == 3  # noqa: PLR2004
+        assert outbox.size == 6  # noqa: PLR2004
+        assert outbox.dropped == 1
+    assert [record.getMessage() for record in caplog.records] == [
+        "The outbox is full, discarding messages"
+    ]
+
+
+async def test_outbox_persists_messages(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "outbox.db"
+    properties = Properties(PacketTypes.PUBLISH)  # type: ignore[no-untyped-call]
+    properties.UserProperty = ("key", "value")
+    with Outbox(path, max_bytes=20) as outbox:
+        first = append(outbox, "a", b"1", 1, True, properties)
+        second = append(outbox, "b", b"2", 2)
+        # Messages that can never fit are discarded
+        assert append(outbox, "c", b"x" * 20) is None
+        assert first is not None
+        outbox._remove(first)  # noqa: SLF001
+        append(outbox, "c", b"3", 0)
+    with Outbox(path) as outbox:
+        stored = entries(outbox)
+        assert [(entry.id, entry.topic, entry.qos) for entry in stored] == [
+            (second, "b", 2),
+            (cast("int", second) + 1, "c", 0),
+        ]
+        assert (len(outbox), outbox.size) == (2, 4)
+        for entry in stored:
+            outbox._remove(entry.id)  # noqa: SLF001
+        await asyncio.sleep(0)
+        assert len(outbox) == 0
+    with Outbox(path) as outbox:
+        assert len(outbox) == 0
+        append(outbox, "a", b"1", 1, True, properties)
+        (entry,) = entries(outbox)
+        assert entry.retain
+        assert getattr(entry.properties, "UserProperty", None) == [("key", "value")]
+
+
+@pytest.mark.parametrize("engine", ["paho", "native"])
+async def test_client_outbox(
+    broker: Broker, engine: Literal["paho", "native"], tmp_path: pathlib.Path
+) -> None:
+    with Outbox(tmp_path / "outbox.db") as outbox:
+        client = Client(
+            "127.0.0.1",
+            broker.port,
+            protocol=ProtocolVersion.V5,
+            engine=engine,
+            outbox=outbox,
+        )
+        # Messages are stored while the client is disconnected
+        await client.publish("outbox/a", b"1", qos=1)
+        await client.publish("outbox/b", b"2", qos=0)
+        assert len(outbox) == 2  # noqa: PLR2004
+        async with Client("127.0.0.1", broker.port) as subscriber:
+            await subscriber.subscribe("outbox/#", qos=2)
+            for payloads in ([b"1", b"2", b"3"], [b"4", b"5"]):
+                async with client:
+                    # Stored messages are published in order before new ones
+                    await client.publish("outbox/c", payloads[-1], qos=2)
+                received = [
+                    (await asyncio.wait_for(subscriber.messages.__anext__(), 5)).payload
+                    for _ in payloads
+                ]
+                assert received == payloads
+                await asyncio.sleep(0)
+                assert len(outbox) == 0
+                await client.publish("outbox/d", b"4", qos=1)
+        # The last message waits for the next connection
+        assert [entry.payload for entry in entries(outbox)] == [b"4"]
+
+
+@pytest.mark.parametrize("engine", ["paho", "native"])
+async def test_client_outbox_connection_lost(
+    broker: Broker,
+    engine: Literal["paho", "native"],
+    tmp_path: pathlib.Path,
+) -> None:
+    """Test that unacknowledged messages are published once after reconnecting."""
+
+    async def lose_connection(client: Client) -> None:
+        async with client:
+            broker.close_on_publish = True
+            # The connection is lost before the acknowledgement
+            await client.publish("outbox/a", b"1", qos=1)
+            await client.publish("outbox/b", b"2", qos=1)
+
+    with Outbox(tmp_path / "outbox.db") as outbox:
+        client = Client("127.0.0.1", broker.port, engine=engine, outbox=outbox)
+        async with Client("127.0.0.1", broker.port) as subscriber:
+            await subscriber.subscribe("outbox/#", qos=1)
+            with pytest.raises(MqttError):
+                await lose_connection(client)
+            broker.close_on_publish = False
+            assert len(outbox) == 2  # noqa: PLR2004
+            async with client:
+                received = [
+                    (await asyncio.wait_for(subscriber.messages.__anext__(), 5)).payload
+                    for _ in range(2)
+                ]
+                await asyncio.sleep(0.1)
+            assert received == [b"1", b"2"]
+            assert len(subscriber.messages) == 0
+            assert len(outbox) == 0
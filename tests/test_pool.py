@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from aiomqtt import ClientPool, CodecRegistry, JSONCodec, MqttError
+
+from .broker import Broker
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_client_pool(broker: Broker) -> None:
+    async with ClientPool("127.0.0.1", broker.port, size=3, identifier="pool") as pool:
+        assert [member.identifier for member in pool.members] == [
+            "pool-0",
+            "pool-1",
+            "pool-2",
+        ]
+        await pool.subscribe("pool/#", qos=1)
+        topics = [f"pool/{n}" for n in range(10)]
+        # Topics are spread over members, but always routed to the same one
+        assert len({pool.route(topic) for topic in topics}) > 1
+        assert all(pool.route(topic) is pool.route(topic) for topic in topics)
+        messages = [(topic, n) for n in range(3) for topic in topics]
+        await pool.publish_many(messages, qos=1)
+        received: dict[str, list[bytes]] = {}
+        iterator = pool.messages
+        for _ in messages:
+            message = await asyncio.wait_for(iterator.__anext__(), 5)
+            received.setdefault(message.topic.value, []).append(message.payload)  # type: ignore[arg-type]
+        # Messages to the same topic keep their order
+        assert received == {topic: [b"0", b"1", b"2"] for topic in topics}
+        await pool.unsubscribe("pool/#")
+
+
+async def test_client_pool_member_disconnects(broker: Broker) -> None:
+    async with ClientPool("127.0.0.1", broker.port, size=2) as pool:
+        await pool.subscribe("pool/#")
+        member = pool.route("pool/#")
+        other = next(client for client in pool.members if client is not member)
+        member._client.disconnect()  # noqa: SLF001
+        await asyncio.wait_for(member._disconnected, 5)  # noqa: SLF001
+        assert not member.is_connected
+        assert other.is_connected
+        # Traffic and subscriptions move to the remaining member
+        assert pool.route("pool/#") is other
+        while pool._subscriptions["pool/#"].member != pool.members.index(other):  # noqa: SLF001
+            await asyncio.sleep(0.01)
+        await pool.publish("pool/a", "hello")
+        message = await asyncio.wait_for(pool.messages.__anext__(), 5)
+        assert message.payload == b"hello"
+        other._client.disconnect()  # noqa: SLF001
+        await asyncio.wait_for(other._disconnected, 5)  # noqa: SLF001
+        with pytest.raises(MqttError):
+            await pool.publish("pool/a", "hello")
+
+
+async def test_client_pool_codecs(broker: Broker) -> None:
+    codecs = CodecRegistry([("pool/#", JSONCodec())])
+    async with ClientPool("127.0.0.1", broker.port, size=2, codecs=codecs) as pool:
+        await pool.subscribe("pool/#")
+        # Like the clients, the pool accepts any value that a codec can encode
+        await pool.publish("pool/a", {"a": 1})
+        await pool.publish_many([("pool/b", [1, 2])])
+        iterator = pool.messages
+        decoded = [
+            (await asyncio.wait_for(iterator.__anext__(), 5)).decoded for _ in range(2)
+        ]
+        assert sorted(decoded, key=str) == [[1, 2], {"a": 1}]
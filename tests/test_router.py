@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pytest
+
+from aiomqtt import Message, Router, Topic
+from aiomqtt.router import TopicTrie
+
+pytestmark = pytest.mark.anyio
+
+WILDCARDS = [
+    "a/b/c",
+    "a/+/c",
+    "+/+/+",
+    "+/#",
+    "#",
+    "a/b/c/#",
+    "$share/group/a/b/c",
+    "$share/group/a/b/+",
+    "abc",
+    "a/b",
+    "a/b/c/d",
+    "a/b/c/d/#",
+    "a/b/z",
+    "a/b/c/+",
+    "a/#",
+    "+",
+]
+
+
+@pytest.mark.parametrize("topic", ["a/b/c", "a", "a/b", "abc", "x/y/z", "a/b/c/d"])
+def test_topic_trie_agrees_with_topic_matches(topic: str) -> None:
+    """Test that the trie finds exactly the wildcards that ``Topic.matches`` finds."""
+    trie: TopicTrie[str] = TopicTrie()
+    for wildcard in WILDCARDS:
+        trie.insert(wildcard, wildcard)
+    expected = [wildcard for wildcard in WILDCARDS if Topic(topic).matches(wildcard)]
+    assert trie.match(topic) == expected
+    assert trie.match_levels(topic.split("/")) == expected
+
+
+def test_topic_trie_remove() -> None:
+    """Test that removed values are no longer matched and empty levels are pruned."""
+    trie: TopicTrie[int] = TopicTrie()
+    values = [("a/+/c", 1), ("a/b/#", 2), ("a/b/#", 3)]
+    for wildcard, value in values:
+        trie.insert(wildcard, value)
+    assert len(trie) == len(values)
+    trie.remove("a/b/#", 2)
+    assert trie.match("a/b/c") == [1, 3]
+    trie.remove("a/+/c", 1)
+    trie.remove("a/b/#", 3)
+    assert len(trie) == 0
+    assert trie.match("a/b/c") == []
+    with pytest.raises(KeyError):
+        trie.remove("a/b/#", 3)
+
+
+async def test_router_dispatch() -> None:
+    """Test that messages are dispatched to sync and async handlers in order."""
+    router = Router()
+    calls: list[str] = []
+
+    @router.route("a/+/c")
+    async def handle_plus(message: Message) -> None:
+        calls.append("plus")
+
+    @router.route("a/#")
+    def handle_hash(message: Message) -> None:
+        calls.append("hash")
+
+    router.add("x/y", lambda message: calls.append("other"))
+    message = Message("a/b/c", b"", qos=0, retain=False, mid=1, properties=None)
+    assert await router.dispatch(message) == len(calls)
+    assert calls == ["plus", "hash"]
+    router.remove("a/+/c", handle_plus)
+    assert router.match("a/b/c") == [handle_hash]
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import pytest
 
-from aiomqtt import Topic, Wildcard
+from aiomqtt import Topic, TopicCache, Wildcard
+from aiomqtt.topic import _compile_wildcard
 
 
 def test_topic_validation() -> None:
@@ -68,3 +69,35 @@ def test_topic_matches() -> None:
     assert not topic.matches("a/b/c/+")
     assert not topic.matches("$share/a/b/c")
     assert not topic.matches("$test/group/a/b/c")
+
+
+def test_topic_matches_reuses_compiled_wildcards() -> None:
+    """Test that Topic.matches() validates and splits each wildcard string only once."""
+    _compile_wildcard.cache_clear()
+    topic = Topic("a/b/c")
+    assert topic.matches("a/+/c")
+    assert topic.matches("a/+/c")
+    assert Topic("x/b/c").matches("+/b/#")
+    info = _compile_wildcard.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+    with pytest.raises(ValueError, match="Invalid wildcard: "):
+        topic.matches("a/#/c")
+
+
+def test_topic_cache() -> None:
+    """Test that TopicCache reuses topics, counts lookups, and evicts old topics."""
+    cache = TopicCache(maxsize=2)
+    topic = cache.get("a/b")
+    assert cache.get("a/b") is topic
+    cache.get("c")
+    cache.get("a/b")
+    cache.get("d")  # Evicts "c", the least recently used topic
+    assert len(cache) == cache.maxsize
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert cache.get("a/b") is topic
+    cache.get("c")
+    assert cache.misses == 4  # noqa: PLR2004
+    with pytest.raises(ValueError, match="Invalid topic: "):
+        cache.get("a/+")
+    with pytest.raises(ValueError, match="maxsize must be at least 1"):
+        TopicCache(maxsize=0)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+import pytest
+
+from aiomqtt import Client, Message, WorkerGroup
+
+from .broker import Broker
+
+pytestmark = pytest.mark.anyio
+
+
+def handle(message: Message) -> None:
+    if message.payload == b"fail":
+        msg = "Could not handle message"
+        raise ValueError(msg)
+
+
+async def wait_until(condition: Callable[[], bool]) -> None:
+    # Spawning worker processes can be slow, so we're generous with the timeout
+    for _ in range(600):
+        if condition():
+            return
+        await asyncio.sleep(0.05)
+    pytest.fail("Timed out")
+
+
+async def test_worker_group(broker: Broker) -> None:
+    def subscribed() -> bool:
+        return (
+            sum("$share/group/jobs/#" in s.subscriptions for s in broker.sessions) == 2  # noqa: PLR2004
+        )
+
+    async with WorkerGroup(
+        "127.0.0.1",
+        broker.port,
+        group="group",
+        wildcard="jobs/#",
+        handler=handle,
+        workers=2,
+        restart_delay=0,
+        report_interval=0.05,
+    ) as group:
+        await wait_until(subscribed)
+        async with Client("127.0.0.1", broker.port) as client:
+            await client.publish_many(
+                [("jobs/a", n) for n in range(9)] + [("jobs/b", "fail")]
+            )
+        await wait_until(lambda: sum(stats.handled for stats in group.stats) == 10)  # noqa: PLR2004
+        stats = group.stats
+        # The broker distributes the messages between the workers
+        assert [s.handled for s in stats] == [5, 5]
+        assert sum(s.failed for s in stats) == 1
+        # Workers that exit unexpectedly are restarted
+        process = group._workers[0].process  # noqa: SLF001
+        assert process is not None
+        process.kill()
+        await wait_until(lambda: group.stats[0].restarts == 1)
+        await wait_until(lambda: group.stats[0].pid not in (None, process.pid))
+        await wait_until(subscribed)
+    assert all(s.pid is None for s in group.stats)
+    assert not broker.sessions